@@ -5,21 +5,37 @@ import json
 import pandas as pd
 from pathlib import Path
 import os
+import sys
 
-def load_metrics_from_directory(api_dir):
-    """Load all metrics from an API directory"""
-    metrics_files = list(Path(api_dir).glob("metrics_*.json"))
-    all_metrics = {}
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from manifest import load_entry_metrics, result_sets
+from warehouse import open_warehouse
+
+def load_metrics_from_warehouse(results_dir):
+    """Load the latest metrics per model and dataset from the results warehouse
+    
+    Keyed by each result's label: the provider, or "provider/model" for
+    providers with runs of several models.
+    """
+    warehouse = open_warehouse(results_dir)
+    if warehouse is None:
+        return None
     
-    for metrics_file in metrics_files:
-        dataset_name = metrics_file.stem.replace("metrics_", "")
+    all_metrics = {}
+    with warehouse:
+        warehouse.import_results_dir(str(results_dir))
+        for result in warehouse.latest_results():
+            all_metrics.setdefault(result["label"], {})[result["dataset"]] = result["metrics"]
+    return all_metrics
+
+def load_metrics_from_manifest(results_dir):
+    """Load all metrics per API and dataset listed in the results manifest"""
+    all_metrics = {}
+    for entry in result_sets(results_dir):
         try:
-            with open(metrics_file, 'r', encoding='utf-8') as f:
-                metrics = json.load(f)
-                all_metrics[dataset_name] = metrics
+            all_metrics.setdefault(entry["provider"], {})[entry["dataset"]] = load_entry_metrics(results_dir, entry)
         except Exception as e:
-            print(f"Error loading {metrics_file}: {e}")
-    
+            print(f"Error loading {entry['provider']}/{entry['dataset']} metrics: {e}")
     return all_metrics
 
 def analyze_all_models():
@@ -31,14 +47,17 @@ def analyze_all_models():
     print("=" * 60)
     
     all_results = {}
+    stored_metrics = load_metrics_from_warehouse(results_dir)
+    if stored_metrics is None:
+        stored_metrics = load_metrics_from_manifest(results_dir)
     
     for api in apis:
-        api_dir = results_dir / api
-        if api_dir.exists():
-            print(f"\n📊 Loading {api.upper()} results...")
-            all_results[api] = load_metrics_from_directory(api_dir)
-        else:
+        labels = [label for label in stored_metrics if label.split("/")[0] == api]
+        if not labels:
             print(f"❌ No results found for {api}")
+        for label in labels:
+            print(f"\n📊 Loading {label.upper()} results...")
+            all_results[label] = stored_metrics[label]
     
     # Calculate aggregate scores
     api_scores = {}
@@ -3,7 +3,6 @@ import json
 import os
 from pathlib import Path
 from typing import Dict, Any, Optional
-import streamlit as st
 
 class ConfigManager:
     """Quản lý configuration cho API keys và settings"""
@@ -28,12 +27,16 @@ class ConfigManager:
                 # Tạo config.json từ example nếu chưa có
                 self.create_default_config()
         except Exception as e:
+            import streamlit as st
             st.error(f"Lỗi khi load config: {e}")
             self.config = self.get_default_config()
     
     def create_default_config(self):
         """Tạo config.json từ example template"""
         if self.example_file.exists():
+            # streamlit is only needed for messages, so CLI users of the config don't import it
+            import streamlit as st
+
             try:
                 # Copy example file thành config.json
                 with open(self.example_file, 'r', encoding='utf-8') as f:
@@ -92,6 +95,7 @@ class ConfigManager:
                 json.dump(self.config, f, indent=2, ensure_ascii=False)
             return True
         except Exception as e:
+            import streamlit as st
             st.error(f"Lỗi khi lưu config: {e}")
             return False
     
@@ -231,8 +235,18 @@ class ConfigManager:
             "exports_dir": "exports"
         })
     
+    def get_storage_config(self) -> Dict[str, str]:
+        """Lấy storage configuration (results_format: csv | parquet | arrow, warehouse: SQLite on/off)"""
+        return self.config.get("storage", {
+            "results_format": "csv",
+            "compression": "zstd",
+            "warehouse": True
+        })
+    
     def show_config_editor(self):
         """Hiển thị config editor trong Streamlit sidebar"""
+        import streamlit as st
+
         st.sidebar.markdown("---")
         st.sidebar.subheader("⚙️ API Configuration")
         
@@ -269,6 +283,8 @@ class ConfigManager:
     
     def show_full_config_editor(self):
         """Hiển thị full config editor"""
+        import streamlit as st
+
         st.markdown("### ⚙️ API Configuration Editor")
         
         apis_config = self.config.get("apis", {})
@@ -340,6 +356,8 @@ class ConfigManager:
 
 def show_config_editor():
     """Hiển thị config editor trong Streamlit sidebar"""
+    import streamlit as st
+
     st.sidebar.markdown("---")
     st.sidebar.subheader("⚙️ API Configuration")
     
@@ -380,6 +398,8 @@ def show_config_editor():
 
 def show_full_config_editor(config_manager: ConfigManager):
     """Hiển thị full config editor"""
+    import streamlit as st
+
     st.markdown("### ⚙️ API Configuration Editor")
     
     apis_config = config_manager.config.get("apis", {})
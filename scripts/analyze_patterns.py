@@ -9,6 +9,11 @@ import os
 from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
 
+# Shared result storage helpers (CSV/Parquet) live in src/
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from storage import read_results
+
 try:
     import matplotlib.pyplot as plt
     import seaborn as sns
@@ -58,7 +63,7 @@ def extract_question_features(question: str) -> Dict[str, int]:
 
 def analyze_hallucination_by_patterns(graded_csv: str) -> Dict:
     """Phân tích mối quan hệ giữa patterns và hallucination rates"""
-    df = pd.read_csv(graded_csv)
+    df = read_results(graded_csv, columns=['question', 'direct_hallucination', 'selfcrit_hallucination'])
     
     # Trích xuất features cho mỗi câu hỏi
     features_list = []
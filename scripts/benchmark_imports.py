@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the CLI and dashboard entry points
+Fails when an entry point gets slower than its budget or pulls in a heavy module it should import lazily
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the code paths that use them may import
+PROVIDER_SDKS = ("openai", "google.generativeai")
+HEAVY_MODULES = PROVIDER_SDKS + ("docx", "plotly", "streamlit")
+
+# (name, statement run in a fresh interpreter, budget in ms or None, modules that must stay unloaded)
+BENCHMARKS = [
+    ("grading CLI startup", "import src.evaluator as e; e.HallucinationEvaluator()", 300,
+     HEAVY_MODULES + ("pandas", "pyarrow")),
+    ("main menu", "import main", 300, HEAVY_MODULES + ("pandas", "numpy")),
+    ("config manager", "import config_manager", 300, HEAVY_MODULES),
+    ("api runner", "import src.api_runner", None, HEAVY_MODULES),
+    ("reports", "import src.reports", None, HEAVY_MODULES),
+    ("pipeline", "import src.pipeline", None, HEAVY_MODULES),
+]
+
+CHILD = """
+import json, sys, time
+sys.path[:0] = [{root!r}, {configs!r}]
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+def run_once(statement, forbidden, importtime=False):
+    """Run statement in a fresh interpreter; (elapsed ms, forbidden modules loaded, stderr)"""
+    code = CHILD.format(root=PROJECT_ROOT, configs=os.path.join(PROJECT_ROOT, "configs"),
+                        statement=statement, forbidden=tuple(forbidden))
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    result = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report["ms"], report["loaded"], result.stderr
+
+def slowest_imports(importtime_log, top=8):
+    """Top cumulative entries of a -X importtime log"""
+    rows = []
+    for line in importtime_log.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    """Run every benchmark (best of IMPORT_BENCH_RUNS) and exit non-zero on a regression"""
+    runs = int(os.getenv("IMPORT_BENCH_RUNS", "5"))
+    failures = 0
+
+    print(f"{'entry point':<22} {'best ms':>8} {'budget':>8}  status")
+    for name, statement, budget, forbidden in BENCHMARKS:
+        try:
+            timings, loaded = [], set()
+            for _ in range(runs):
+                elapsed, modules, _ = run_once(statement, forbidden)
+                timings.append(elapsed)
+                loaded.update(modules)
+        except RuntimeError as e:
+            print(f"{name:<22} {'-':>8} {'-':>8}  ❌ {e}")
+            failures += 1
+            continue
+
+        best = min(timings)
+        problems = []
+        if budget is not None and best > budget:
+            problems.append("over budget")
+        if loaded:
+            problems.append("imports " + ", ".join(sorted(loaded)))
+        status = "✅" if not problems else "❌ " + "; ".join(problems)
+        print(f"{name:<22} {best:>8.0f} {budget if budget is not None else '-':>8}  {status}")
+
+        if problems:
+            failures += 1
+            _, _, log = run_once(statement, forbidden, importtime=True)
+            for cumulative_ms, module in slowest_imports(log):
+                print(f"    {cumulative_ms:>8.1f} ms  {module}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
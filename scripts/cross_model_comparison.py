@@ -9,6 +9,16 @@ import json
 from typing import Dict, List, Tuple
 from collections import defaultdict
 
+# Shared result storage helpers (CSV/Parquet, manifest, results warehouse) live in src/
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from manifest import entry_path, load_entry_metrics, result_sets
+from storage import read_results
+from warehouse import open_warehouse
+
+# Reports go next to the results (data/results/reports), not into the working directory
+REPORTS_DIR = os.path.join("data", "results", "reports")
+
 try:
     import matplotlib.pyplot as plt
     import seaborn as sns
@@ -31,33 +41,42 @@ def collect_all_results() -> Dict[str, Dict]:
     
     all_results = {}
     
+    # Only questions and grade flags are used; answer text is never loaded
+    columns = ['question', 'direct_correct', 'selfcrit_correct',
+               'direct_hallucination', 'selfcrit_hallucination']
+    
+    # Query the results warehouse (backfilled from the results manifest) when enabled
+    warehouse = open_warehouse(results_base)
+    if warehouse is not None:
+        with warehouse:
+            warehouse.import_results_dir(results_base)
+            latest = warehouse.latest_results(columns=columns)
+        for model_family, dirs in model_dirs.items():
+            family_results = [
+                {
+                    'dir': f"{result['label']}_{result['dataset']}",
+                    'dataset': result['dataset'],
+                    'metrics': result['metrics'],
+                    'data': result['graded_data']
+                }
+                for result in latest if result['provider'] in dirs
+            ]
+            if family_results:
+                all_results[model_family] = family_results
+        return all_results
+    
+    # Otherwise read the result sets listed in the results manifest
+    entries = [entry for entry in result_sets(results_base) if 'metrics' in entry and 'graded' in entry]
     for model_family, dirs in model_dirs.items():
-        family_results = []
-        
-        for dir_name in dirs:
-            model_path = os.path.join(results_base, dir_name)
-            if os.path.exists(model_path):
-                # Look for metrics files for each dataset
-                for metrics_file in os.listdir(model_path):
-                    if metrics_file.startswith('metrics_') and metrics_file.endswith('.json'):
-                        dataset_name = metrics_file.replace('metrics_', '').replace('.json', '')
-                        
-                        metrics_path = os.path.join(model_path, metrics_file)
-                        graded_file = os.path.join(model_path, f'results_graded_{dataset_name}.csv')
-                        
-                        if os.path.exists(graded_file):
-                            with open(metrics_path, 'r', encoding='utf-8') as f:
-                                metrics = json.load(f)
-                            
-                            graded_df = pd.read_csv(graded_file)
-                            
-                            family_results.append({
-                                'dir': f"{dir_name}_{dataset_name}",
-                                'dataset': dataset_name,
-                                'metrics': metrics,
-                                'data': graded_df
-                            })
-        
+        family_results = [
+            {
+                'dir': f"{entry['provider']}_{entry['dataset']}",
+                'dataset': entry['dataset'],
+                'metrics': load_entry_metrics(results_base, entry),
+                'data': read_results(entry_path(results_base, entry, 'graded'), columns=columns)
+            }
+            for entry in entries if entry['provider'] in dirs
+        ]
         if family_results:
             all_results[model_family] = family_results
     
@@ -249,10 +268,12 @@ def generate_comprehensive_report(all_results: Dict, summary_df: pd.DataFrame,
         report_content.append("- Self-critique prompting chưa hiệu quả, cần cải thiện prompt design")
     
     # Save report
-    with open('cross_model_comparison_report.txt', 'w', encoding='utf-8') as f:
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    report_path = os.path.join(REPORTS_DIR, 'cross_model_comparison_report.txt')
+    with open(report_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(report_content))
     
-    print("✓ Đã tạo báo cáo tổng hợp: cross_model_comparison_report.txt")
+    print(f"✓ Đã tạo báo cáo tổng hợp: {report_path}")
 
 def plot_model_comparison(summary_df: pd.DataFrame, question_difficulty: Dict):
     """Vẽ biểu đồ so sánh các models"""
@@ -340,8 +361,10 @@ def plot_model_comparison(summary_df: pd.DataFrame, question_difficulty: Dict):
                           xytext=(5, 5), textcoords='offset points', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig('cross_model_comparison.png', dpi=300, bbox_inches='tight')
-    print("✓ Đã lưu biểu đồ so sánh: cross_model_comparison.png")
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    chart_path = os.path.join(REPORTS_DIR, 'cross_model_comparison.png')
+    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Đã lưu biểu đồ so sánh: {chart_path}")
 
 def main():
     print("=== So sánh Hallucination giữa các LLM Models ===")
@@ -4,12 +4,10 @@ Supports: OpenAI, DeepSeek, Gemini, Ollama
 """
 
 import os
+import threading
 import pandas as pd
-import requests
 import json
-from typing import List, Dict, Optional
-from openai import OpenAI
-import google.generativeai as genai
+from typing import List, Dict, Iterator, Optional, Tuple
 
 # Default prompts
 DEFAULT_DIRECT_PROMPT = (
@@ -26,6 +24,39 @@ DEFAULT_SELFCRIT_PROMPT = (
     "Câu hỏi: {q}"
 )
 
+# Provider clients (and their connection pools) shared by every runner with the same credentials
+_client_pool: Dict[Tuple, object] = {}
+_client_pool_lock = threading.Lock()
+
+def pooled_client(provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    """Client for (provider, base_url, api_key), created on first use and reused afterwards
+
+    Gemini clients are bound to a model, so the model is part of their key;
+    Ollama gets a requests.Session so its HTTP connections are kept alive.
+    Each provider SDK is imported on first use, so other providers never load it.
+    """
+    if provider == "openai":
+        # The OpenAI client always talks to its default endpoint
+        base_url = None
+    key = (provider, base_url, api_key, model if provider == "gemini" else None)
+    with _client_pool_lock:
+        client = _client_pool.get(key)
+        if client is None:
+            if provider in ["openai", "deepseek"]:
+                from openai import OpenAI
+                client = OpenAI(api_key=api_key, base_url=base_url)
+            elif provider == "gemini":
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                client = genai.GenerativeModel(model)
+            elif provider == "ollama":
+                import requests
+                client = requests.Session()
+            else:
+                raise ValueError(f"Unsupported provider: {provider}")
+            _client_pool[key] = client
+    return client
+
 class APIRunner:
     """Unified API runner for all LLM providers"""
     
@@ -39,21 +70,12 @@ class APIRunner:
         self._setup_client()
     
     def _setup_client(self):
-        """Setup API client based on provider"""
-        if self.provider == "openai":
-            self.client = OpenAI(api_key=self.api_key)
-        elif self.provider == "deepseek":
-            self.client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url or "https://api.deepseek.com/v1"
-            )
-        elif self.provider == "gemini":
-            genai.configure(api_key=self.api_key)
-            self.client = genai.GenerativeModel(self.model)
+        """Setup API client based on provider, reusing a pooled one when available"""
+        if self.provider == "deepseek":
+            self.base_url = self.base_url or "https://api.deepseek.com/v1"
         elif self.provider == "ollama":
             self.base_url = self.base_url or "http://localhost:11434"
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+        self.client = pooled_client(self.provider, self.model, self.api_key, self.base_url)
     
     def chat_once(self, messages: List[Dict[str, str]]) -> str:
         """Send single chat request to API"""
@@ -79,7 +101,7 @@ class APIRunner:
                     "messages": messages,
                     "stream": False
                 }
-                resp = requests.post(
+                resp = self.client.post(
                     f"{self.base_url}/api/chat",
                     json=payload,
                     timeout=self.timeout
@@ -133,16 +155,15 @@ class APIRunner:
             return text[pos:]
         return text
     
-    def run_experiment(self, input_csv: str, output_csv: str, prompts: Dict[str, str]) -> None:
-        """Run complete experiment with direct and self-critique prompts"""
-        df = pd.read_csv(input_csv)
-        rows = []
-        
+    def iter_experiment(self, questions_df: pd.DataFrame, prompts: Optional[Dict[str, str]] = None,
+                        question_col: str = "question", answer_col: Optional[str] = None) -> Iterator[Dict]:
+        """Yield one completed result row per question as soon as both prompts return"""
+        prompts = prompts or {}
         direct_template = prompts.get("direct", DEFAULT_DIRECT_PROMPT)
         selfcrit_template = prompts.get("selfcrit", DEFAULT_SELFCRIT_PROMPT)
         
-        for i, row in df.iterrows():
-            question = row["question"]
+        for i, (_, row) in enumerate(questions_df.iterrows()):
+            question = row[question_col]
             
             # Direct prompt
             direct_prompt = direct_template.format(q=question)
@@ -153,9 +174,13 @@ class APIRunner:
             selfcrit_answer = self.chat_once([{"role": "user", "content": selfcrit_prompt}])
             selfcrit_final = self.extract_final(selfcrit_answer)
             
-            rows.append({
+            record = {
                 "idx": i + 1,
-                "question": question,
+                "question": question
+            }
+            if answer_col:
+                record["answer"] = row.get(answer_col, "")
+            record.update({
                 "direct_answer": direct_answer,
                 "selfcrit_answer": selfcrit_answer,
                 "selfcrit_final_span": selfcrit_final,
@@ -164,11 +189,50 @@ class APIRunner:
                 "direct_prompt": direct_prompt,
                 "selfcrit_prompt": selfcrit_prompt
             })
-            
-            print(f"[{i+1:02d}] Completed - {self.provider}/{self.model}")
+            yield record
+    
+    def run_experiment(self, input_csv: str, output_csv: str, prompts: Dict[str, str]) -> None:
+        """Run complete experiment with direct and self-critique prompts"""
+        df = pd.read_csv(input_csv)
+        
+        try:
+            from src.manifest import update_result_set
+            from src.storage import open_row_sink
+            from src.warehouse import open_warehouse
+        except ImportError:
+            from manifest import update_result_set
+            from storage import open_row_sink
+            from warehouse import open_warehouse
+        
+        # Raw responses also go to the results warehouse; grading is recorded by the evaluator
+        warehouse = open_warehouse()
+        run_id = None
+        dataset = os.path.splitext(os.path.basename(input_csv))[0]
+        if warehouse is not None:
+            run_id = warehouse.start_run(self.provider, self.model, dataset, source=os.path.abspath(output_csv))
+        
+        # Rows are appended as they complete, so a partial CSV run still leaves its results
+        try:
+            with open_row_sink(output_csv) as sink:
+                for record in self.iter_experiment(df, prompts):
+                    sink.write(record)
+                    if warehouse is not None:
+                        warehouse.record_rows(run_id, [record])
+                    print(f"[{record['idx']:02d}] Completed - {self.provider}/{self.model}")
+            if warehouse is not None:
+                warehouse.finish_run(run_id, status="inferred")
+            # output_csv lives in results_dir/<provider>/
+            update_result_set(os.path.dirname(os.path.dirname(os.path.abspath(output_csv))),
+                              self.provider, dataset, model=self.model, raw_path=output_csv,
+                              rows=sink.rows_written)
+        except BaseException:
+            if warehouse is not None:
+                warehouse.finish_run(run_id, status="failed")
+            raise
+        finally:
+            if warehouse is not None:
+                warehouse.close()
         
-        # Save results
-        pd.DataFrame(rows).to_csv(output_csv, index=False, encoding="utf-8")
         print(f"Results saved to: {output_csv}")
 
 # Default prompt templates
@@ -0,0 +1,79 @@
+"""
+Content-addressed text store for Hallucination Detection results
+Long response and prompt texts are kept once, compressed, and referenced by their hash
+"""
+
+import hashlib
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+BLOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+COMPRESSION_LEVEL = 6
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH = 500
+
+def text_hash(text: str) -> str:
+    """Content address of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class BlobStore:
+    """Deduplicated, zlib-compressed texts in a table of an SQLite database
+
+    Writers do not commit, so blobs land in the caller's transaction together
+    with the rows that reference them.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.conn.executescript(BLOB_SCHEMA)
+
+    def put_many(self, texts: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Store texts (missing ones stay None) and return their hashes"""
+        refs, new = [], {}
+        for text in texts:
+            if text is None:
+                refs.append(None)
+                continue
+            ref = text_hash(text)
+            refs.append(ref)
+            new.setdefault(ref, text)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO blobs (hash, size, data) VALUES (?, ?, ?)",
+            ((ref, len(text), zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)) for ref, text in new.items()),
+        )
+        return refs
+
+    def get_many(self, refs: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Texts of the given hashes (unknown and missing refs are left out)"""
+        wanted = list({ref for ref in refs if isinstance(ref, str)})
+        texts = {}
+        for start in range(0, len(wanted), LOOKUP_BATCH):
+            batch = wanted[start:start + LOOKUP_BATCH]
+            rows = self.conn.execute(
+                f"SELECT hash, data FROM blobs WHERE hash IN ({', '.join('?' * len(batch))})", batch
+            )
+            for ref, data in rows:
+                texts[ref] = zlib.decompress(data).decode("utf-8")
+        return texts
+
+    def resolve(self, refs: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Texts in the order of refs, None where a ref is missing"""
+        refs = list(refs)
+        texts = self.get_many(refs)
+        return [texts.get(ref) if isinstance(ref, str) else None for ref in refs]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of distinct texts and their raw vs stored size in bytes"""
+        count, raw, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+        ).fetchone()
+        return {"blobs": count, "text_chars": raw, "stored_bytes": stored}
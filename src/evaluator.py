@@ -3,18 +3,493 @@ Evaluation and Report Generation for Hallucination Detection
 Handles grading, metrics calculation, and Word report generation
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import numpy as np
 import json
 import re
 import os
-from typing import Dict, List, Tuple
-from docx import Document
-from docx.shared import Pt
+import math
+from array import array
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# pandas is imported where tables are built, so importing the evaluator stays cheap for CLIs
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Rows per chunk when grading in parallel
+DEFAULT_GRADING_CHUNK_SIZE = 5000
+
+# Grading modes: exact normalized substring, or substring plus symmetric n-gram similarity
+MATCH_MODES = ("exact", "fuzzy")
+
+# Vietnamese/English magnitude words after a number ("66 tỷ", "25 triệu")
+MAGNITUDE_WORDS = {
+    "nghìn": 1e3, "ngàn": 1e3, "triệu": 1e6, "tỷ": 1e9, "tỉ": 1e9,
+    "thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12
+}
+
+# Unit aliases -> canonical unit
+UNIT_ALIASES = {
+    "mét": "m", "giây": "s", "độ c": "°c", "phần trăm": "%", "tesla": "t"
+}
+
+# Canonical unit -> (dimension, factor to the dimension's base unit)
+UNIT_DIMENSIONS = {
+    "m": ("length", 1.0), "km": ("length", 1e3), "cm": ("length", 1e-2), "mm": ("length", 1e-3),
+    "au": ("length", 1.495978707e11), "năm ánh sáng": ("length", 9.4607304725808e15),
+    "m/s": ("speed", 1.0), "km/s": ("speed", 1e3), "km/h": ("speed", 1 / 3.6),
+    "kg": ("mass", 1.0), "g": ("mass", 1e-3), "tấn": ("mass", 1e3),
+    "s": ("time", 1.0), "phút": ("time", 60.0), "giờ": ("time", 3600.0),
+    "ngày": ("time", 86400.0), "năm": ("time", 31557600.0),
+    "k": ("temperature_k", 1.0), "°c": ("temperature_c", 1.0),
+    "ev": ("energy", 1.0), "kev": ("energy", 1e3), "mev": ("energy", 1e6), "gev": ("energy", 1e9),
+    "hz": ("frequency", 1.0), "khz": ("frequency", 1e3), "mhz": ("frequency", 1e6), "ghz": ("frequency", 1e9),
+    "pa": ("pressure", 1.0), "kpa": ("pressure", 1e3), "atm": ("pressure", 101325.0),
+    "t": ("magnetic_field", 1.0),
+    "%": ("percent", 1.0), "lần": ("ratio", 1.0)
+}
+
+# Bare integers up to this many digits (years, counts) must match exactly
+EXACT_INTEGER_DIGITS = 6
+
+# Upper bound on the relative slack granted by a gold's rounding precision
+MAX_ROUNDING_TOLERANCE = 0.05
+
+# Bootstrap defaults for metric confidence intervals
+DEFAULT_BOOTSTRAP_RESAMPLES = 10000
+DEFAULT_BOOTSTRAP_SEED = 42
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+
+# Cap on resample x row cells gathered at once, bounds bootstrap memory on big frames
+BOOTSTRAP_BLOCK_CELLS = 5_000_000
+
+# (section, metric, graded column) for every rate reported in metrics
+RATE_COLUMNS = [
+    ("direct", "correct_rate", "direct_correct"),
+    ("direct", "uncertainty_rate", "direct_uncertain"),
+    ("direct", "hallucination_rate", "direct_hallucination"),
+    ("selfcrit", "correct_rate", "selfcrit_correct"),
+    ("selfcrit", "uncertainty_rate", "selfcrit_uncertain"),
+    ("selfcrit", "hallucination_rate", "selfcrit_hallucination"),
+]
+
+GRADE_FLAG_COLUMNS = [column for _, _, column in RATE_COLUMNS]
+
+# Bits after the grade flags in MetricsAccumulator's packed byte: whether the row's
+# self-critique has both draft and final segments, and whether the final revised the draft
+REVISION_KNOWN_BIT = len(GRADE_FLAG_COLUMNS)
+REVISED_BIT = REVISION_KNOWN_BIT + 1
+
+# improvement metric -> (minuend column, subtrahend column), paired per question
+DELTA_COLUMNS = {
+    "correct_delta": ("selfcrit_correct", "direct_correct"),
+    "hallucination_delta": ("direct_hallucination", "selfcrit_hallucination"),
+    "uncertainty_delta": ("selfcrit_uncertain", "direct_uncertain"),
+}
+
+# Self-critique answers follow the prompt's "Bước 1 — Nháp / Bước 2 — Tự kiểm / Bước 3 — Cuối cùng"
+# steps; step 1 is the draft, step 2 the critique and every later step the final answer
+SELFCRIT_SEGMENTS = ("draft", "critique", "final")
+
+# Character offsets of each segment in selfcrit_answer, SEGMENT_ABSENT when the step is missing
+SEGMENT_COLUMNS = [f"selfcrit_{segment}_{bound}" for segment in SELFCRIT_SEGMENTS for bound in ("start", "end")]
+SEGMENT_ABSENT = -1
+
+# A step header at the start of a line: optional markdown (#, >, **), "Bước <n>", its title and a
+# colon. The title ends at the first colon (or after a known step name following one), so answer
+# text on the same line is not swallowed
+SELFCRIT_STEP_RE = re.compile(r"""
+    ^[ \t>#*_]*Bước\s*(\d+)
+    (?:[ \t]*[—–\-:.)][ \t]*(?:\*\*)?[ \t]*
+       (?:nháp|tự[ \t]*kiểm(?:[ \t]*tra)?|(?:[đd]áp[ \t]*án[ \t]*)?cuối[ \t]*cùng|kết[ \t]*luận))?
+    [^\n:*]*
+    (?::[ \t]*\*\*|\*\*[ \t]*:?|:)?
+""", re.M | re.I | re.X)
+
+def segment_selfcrit(text) -> Dict[str, Tuple[int, int]]:
+    """(start, end) offsets of the draft, critique and final segments of a self-critique answer
+
+    Headers are excluded and surrounding whitespace trimmed; segments whose
+    step is missing are left out. Text before the first header counts as the
+    draft when the answer has no step 1 header.
+    """
+    if not isinstance(text, str):
+        return {}
+
+    headers = []
+    for m in SELFCRIT_STEP_RE.finditer(text):
+        step = int(m.group(1))
+        if step >= 1:
+            headers.append((SELFCRIT_SEGMENTS[min(step, len(SELFCRIT_SEGMENTS)) - 1], m.start(), m.end()))
+    if not headers:
+        return {}
+
+    spans = {}
+    if headers[0][0] != "draft" and text[:headers[0][1]].strip():
+        spans["draft"] = (0, headers[0][1])
+    for i, (segment, _, content_start) in enumerate(headers):
+        end = headers[i + 1][1] if i + 1 < len(headers) else len(text)
+        if segment not in spans:
+            spans[segment] = (content_start, end)
+        elif spans[segment][1] == headers[i][1]:
+            # Consecutive headers of one segment (steps 3, 4, ...) extend it
+            spans[segment] = (spans[segment][0], end)
+
+    trimmed = {}
+    for segment, (start, end) in spans.items():
+        body = text[start:end]
+        start, end = start + len(body) - len(body.lstrip()), start + len(body.rstrip())
+        if end > start:
+            trimmed[segment] = (start, end)
+    return trimmed
+
+def selfcrit_segments(row) -> Dict[str, str]:
+    """Draft, critique and final text of one result row
+
+    Uses the offsets stored at grading time, segmenting the answer on the fly
+    for rows graded before they existed.
+    """
+    import pandas as pd
+
+    text = row.get("selfcrit_answer")
+    if not isinstance(text, str):
+        return {}
+
+    spans = {}
+    if all(column in row and not pd.isna(row[column]) for column in SEGMENT_COLUMNS):
+        for segment in SELFCRIT_SEGMENTS:
+            start, end = row[f"selfcrit_{segment}_start"], row[f"selfcrit_{segment}_end"]
+            if int(start) != SEGMENT_ABSENT:
+                spans[segment] = (int(start), int(end))
+    else:
+        spans = segment_selfcrit(text)
+    return {segment: text[start:end] for segment, (start, end) in spans.items()}
+
+def _optional_flag(value) -> Optional[bool]:
+    """Nullable flag as a bool, None when missing (None, NaN or pd.NA)"""
+    try:
+        if value is None or value != value:
+            return None
+        return bool(value)
+    except TypeError:
+        return None
+
+def bootstrap_means(values: np.ndarray, n_resamples: int, seed: Optional[int] = None,
+                    present: Optional[np.ndarray] = None) -> np.ndarray:
+    """Column means of values (rows x columns) under bootstrap row resampling
+    
+    All columns share one resampling index matrix, so differences between
+    columns stay paired per row. Resamples are drawn in blocks to bound memory.
+    With present (a 0/1 matrix shaped like values), each column's mean covers
+    only its present rows; a resample that draws none of them gives NaN.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = values.shape[0]
+    block = max(1, BOOTSTRAP_BLOCK_CELLS // max(n_rows, 1))
+    
+    means = np.empty((n_resamples, values.shape[1]))
+    for start in range(0, n_resamples, block):
+        stop = min(start + block, n_resamples)
+        index = rng.integers(0, n_rows, size=(stop - start, n_rows))
+        # Turn the index matrix into per-row draw counts so the means are one BLAS matmul
+        offsets = np.arange(stop - start)[:, None] * n_rows
+        counts = np.bincount((index + offsets).ravel(), minlength=(stop - start) * n_rows)
+        counts = counts.reshape(stop - start, n_rows)
+        if present is None:
+            means[start:stop] = counts @ values / n_rows
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means[start:stop] = (counts @ values) / (counts @ present)
+    return means
+
+def wilson_interval(successes: int, total: int, confidence_level: float = DEFAULT_CONFIDENCE_LEVEL) -> List[float]:
+    """Wilson score interval of a rate, usable from the first few rows of a run"""
+    if total == 0:
+        return [0.0, 1.0]
+    z = NormalDist().inv_cdf(1 - (1 - confidence_level) / 2)
+    rate = successes / total
+    denominator = 1 + z * z / total
+    centre = (rate + z * z / (2 * total)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total)) / denominator
+    return [max(centre - half_width, 0.0), min(centre + half_width, 1.0)]
+
+def _alternation(words) -> str:
+    """Regex alternation preferring the longest word"""
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+# Single-pass quantity pattern: number, fraction/exponent, range ("10-20", "10 đến 20"), magnitude words, unit
+QUANTITY_RE = re.compile(r"""
+    (?<![\w.,/^])
+    (?P<sign>-)?
+    (?P<num>\d+(?:[.,]\d+)*)
+    (?:
+        /(?P<den>\d+)(?![.,]?\d)
+      | e(?P<exp>[-+]?\d+)
+      | \s*(?:[x×*·]|\\times)\s*10\s*(?:\^|\*\*)\s*(?P<exp10>[-+]?\d+)
+      | \s*(?:\^|\*\*)\s*(?P<pow>[-+]?\d+)
+    )?
+    (?:(?:\s*-\s*|\s+(?:đến|tới)\s+)(?P<hi>\d+(?:[.,]\d+)*))?
+    (?P<mag>(?:\s*(?:%s)(?!\w))*)
+    (?:\s*(?P<unit>%s)(?!\w))?
+    (?!\w)
+""" % (_alternation(MAGNITUDE_WORDS), _alternation(list(UNIT_DIMENSIONS) + list(UNIT_ALIASES))), re.X)
+
+_SUPERSCRIPT_RE = re.compile(r"[⁻⁰¹²³⁴⁵⁶⁷⁸⁹]+")
+_SUPERSCRIPT_DIGITS = str.maketrans("⁻⁰¹²³⁴⁵⁶⁷⁸⁹", "-0123456789")
+_NUMERIC_PUNCTUATION = str.maketrans({"−": "-", "–": "-"})
+
+# values: ((low, high, half_ulp), ...) alternative readings of the number
+Quantity = namedtuple("Quantity", ["values", "unit", "exact", "start"])
+
+def _parse_decimal(raw: str) -> List[Tuple[float, int]]:
+    """Candidate (value, decimals) readings of a number with ./, separators"""
+    seps = [c for c in raw if c in ".,"]
+    if not seps:
+        return [(float(raw), 0)]
+    
+    groups = re.split(r"[.,]", raw)
+    if len(set(seps)) == 2:
+        # Mixed separators: the last one is the decimal point
+        decimal = seps[-1]
+        thousands = "," if decimal == "." else "."
+        return [(float(raw.replace(thousands, "").replace(decimal, ".")), len(groups[-1]))]
+    
+    sep = seps[0]
+    if len(seps) > 1:
+        if all(len(g) == 3 for g in groups[1:]):
+            return [(float(raw.replace(sep, "")), 0)]
+        # Not a well-formed number (e.g. "1,2,3"), read each part separately
+        return [(float(g), 0) for g in groups]
+    
+    decimal_reading = (float(raw.replace(sep, ".")), len(groups[1]))
+    if len(groups[1]) == 3:
+        # "1,400" / "6.626": thousands separator or decimal point depending on locale
+        return [decimal_reading, (float(raw.replace(sep, "")), 0)]
+    return [decimal_reading]
+
+def _numeric_text(text: str) -> str:
+    """Unify minus/range dashes and superscript exponents for quantity parsing"""
+    text = text.translate(_NUMERIC_PUNCTUATION)
+    return _SUPERSCRIPT_RE.sub(lambda m: "^" + m.group(0).translate(_SUPERSCRIPT_DIGITS), text)
+
+def extract_quantities(text: str) -> List[Quantity]:
+    """Parse every number/quantity in normalized text in a single regex pass"""
+    quantities = []
+    for m in QUANTITY_RE.finditer(_numeric_text(text)):
+        try:
+            readings = _parse_decimal(m.group("num"))
+            high_readings = _parse_decimal(m.group("hi")) if m.group("hi") else None
+            
+            scale = 1.0
+            for word in m.group("mag").split():
+                scale *= MAGNITUDE_WORDS[word]
+            sign = -1.0 if m.group("sign") else 1.0
+            
+            values = []
+            for i, (value, decimals) in enumerate(readings):
+                half_ulp = 0.5 * 10 ** -decimals
+                if m.group("den"):
+                    value, half_ulp = value / float(m.group("den")), 0.0
+                elif m.group("exp") or m.group("exp10"):
+                    exponent = int(m.group("exp") or m.group("exp10"))
+                    value, half_ulp = value * 10.0 ** exponent, half_ulp * 10.0 ** exponent
+                elif m.group("pow"):
+                    value, half_ulp = value ** int(m.group("pow")), 0.0
+                
+                low = sign * value * scale
+                if high_readings:
+                    high = high_readings[min(i, len(high_readings) - 1)][0] * scale
+                else:
+                    high = low
+                if math.isfinite(low) and math.isfinite(high):
+                    values.append((min(low, high), max(low, high), half_ulp * scale))
+        except (OverflowError, ValueError, ZeroDivisionError):
+            continue
+        
+        if not values:
+            continue
+        
+        unit = m.group("unit")
+        unit = UNIT_ALIASES.get(unit, unit)
+        # Bare integers and integer ranges ("1939 đến 1945") get no relative slack
+        exact = (
+            not any(m.group(g) for g in ("den", "exp", "exp10", "pow", "unit"))
+            and not m.group("mag").strip()
+            and all(bound is None or (bound.isdigit() and len(bound) <= EXACT_INTEGER_DIGITS)
+                    for bound in (m.group("num"), m.group("hi")))
+        )
+        quantities.append(Quantity(tuple(values), unit, exact, m.start()))
+    
+    return quantities
+
+def quantities_match(gold: Quantity, answer: Quantity, tolerance: float) -> bool:
+    """Check an answer quantity against a gold quantity within tolerance
+
+    A range gold ("10-20 km") accepts a single value inside it, but an answer
+    range only when both of its ends are inside: "5-15 km" half misses it.
+    A point gold matches when either end of an answer range is close enough.
+    """
+    gold_factor = answer_factor = 1.0
+    if gold.unit and answer.unit:
+        gold_dim, answer_dim = UNIT_DIMENSIONS.get(gold.unit), UNIT_DIMENSIONS.get(answer.unit)
+        if gold_dim and answer_dim:
+            if gold_dim[0] != answer_dim[0]:
+                return False
+            gold_factor, answer_factor = gold_dim[1], answer_dim[1]
+        elif gold.unit != answer.unit:
+            return False
+    
+    # A bare answer number may express a percentage as a fraction (68% -> 0.68)
+    percent_scales = (1.0, 0.01) if gold.unit == "%" and not answer.unit else (1.0,)
+    
+    for low, high, half_ulp in gold.values:
+        for answer_low, answer_high, _ in answer.values:
+            for percent_scale in percent_scales:
+                factor = gold_factor * percent_scale
+                magnitude = max(abs(low), abs(high))
+                if gold.exact:
+                    tol = 0.0
+                else:
+                    # Allow rounding to the gold's stated precision, capped for coarse golds like "0.1"
+                    tol = max(tolerance * magnitude, min(half_ulp, MAX_ROUNDING_TOLERANCE * magnitude)) * factor
+                inside = [low * factor - tol <= point * answer_factor <= high * factor + tol
+                          for point in (answer_low, answer_high)]
+                # A point gold is hit by either end of an answer range ("26.000 - 28.000" for 26000)
+                if all(inside) if low < high else any(inside):
+                    return True
+    return False
+
+def _best_window_dice(gold_set: FrozenSet[str], tokens: List[str]) -> float:
+    """Highest Dice score of gold_set against the n-gram sets of windows of len(gold_set) tokens"""
+    width = min(len(gold_set), len(tokens))
+    if not width:
+        return 0.0
+    counts = Counter(tokens[:width])
+    overlap = sum(1 for token in counts if token in gold_set)
+    best = 2 * overlap / (len(gold_set) + len(counts))
+    # Slide the window one token at a time, updating its distinct and shared token counts
+    for leaving, entering in zip(tokens, tokens[width:]):
+        counts[leaving] -= 1
+        if not counts[leaving]:
+            del counts[leaving]
+            overlap -= leaving in gold_set
+        if entering not in counts:
+            overlap += entering in gold_set
+        counts[entering] += 1
+        best = max(best, 2 * overlap / (len(gold_set) + len(counts)))
+    return best
+
+# Evaluator owned by each parallel grading worker process
+_worker_evaluator = None
+
+def _init_grading_worker(evaluator):
+    """Install the evaluator (and its compiled patterns) once per worker process"""
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+
+def _grade_chunk(chunk):
+    """Grade one (results, gold answers) chunk inside a worker process"""
+    results_chunk, gold_answers = chunk
+    return _worker_evaluator.grade_rows(results_chunk, gold_answers)
+
+class MetricsAccumulator:
+    """Running grade counts for streaming runs
+    
+    Keeps one packed byte of grade flags per row, so metrics (including
+    bootstrap CIs at the end) never need the graded rows or their text.
+    """
+    
+    def __init__(self, confidence_level: float = DEFAULT_CONFIDENCE_LEVEL):
+        self.confidence_level = confidence_level
+        self.total = 0
+        self.counts = {column: 0 for column in GRADE_FLAG_COLUMNS}
+        # Self-critiques with both a draft and a final segment, and those revised
+        self.segmented = 0
+        self.revised = 0
+        self._packed_flags = array("B")
+    
+    def update(self, graded_row: Dict):
+        """Add one graded row"""
+        packed = 0
+        for bit, column in enumerate(GRADE_FLAG_COLUMNS):
+            if bool(graded_row.get(column, False)):
+                self.counts[column] += 1
+                packed |= 1 << bit
+        revised = _optional_flag(graded_row.get("selfcrit_revised"))
+        if revised is not None:
+            self.segmented += 1
+            packed |= 1 << REVISION_KNOWN_BIT
+            if bool(revised):
+                self.revised += 1
+                packed |= 1 << REVISED_BIT
+        self._packed_flags.append(packed)
+        self.total += 1
+    
+    def metrics(self) -> Dict:
+        """Current metrics in the calculate_metrics layout
+        
+        Rates carry Wilson intervals, which are cheap enough to refresh after
+        every row; calculate_metrics replaces them with bootstrap CIs at the end.
+        """
+        if self.total == 0:
+            return {}
+        
+        metrics = {"total_questions": self.total, "direct": {}, "selfcrit": {}}
+        for section, metric, column in RATE_COLUMNS:
+            metrics[section][metric] = self.counts[column] / self.total
+        
+        metrics["improvement"] = {
+            metric: (self.counts[a] - self.counts[b]) / self.total
+            for metric, (a, b) in DELTA_COLUMNS.items()
+        }
+        if self.segmented:
+            metrics["selfcrit"]["revision_rate"] = self.revised / self.segmented
+        metrics["confidence_intervals"] = self.confidence_intervals()
+        return metrics
+    
+    def confidence_intervals(self) -> Dict:
+        """Wilson score intervals of the running rates"""
+        intervals = {"level": self.confidence_level, "method": "wilson", "direct": {}, "selfcrit": {}}
+        for section, metric, column in RATE_COLUMNS:
+            intervals[section][metric] = wilson_interval(self.counts[column], self.total, self.confidence_level)
+        return intervals
+    
+    def flags_frame(self) -> pd.DataFrame:
+        """Grade flags of every row seen so far, one column per flag, plus selfcrit_revised (NA if unknown)"""
+        import pandas as pd
+
+        packed = np.frombuffer(self._packed_flags.tobytes(), dtype=np.uint8)
+        frame = pd.DataFrame({
+            column: (packed >> bit) & 1 == 1 for bit, column in enumerate(GRADE_FLAG_COLUMNS)
+        })
+        frame["selfcrit_revised"] = pd.arrays.BooleanArray(
+            (packed >> REVISED_BIT) & 1 == 1, (packed >> REVISION_KNOWN_BIT) & 1 == 0
+        )
+        return frame
 
 class HallucinationEvaluator:
     """Comprehensive evaluator for hallucination detection experiments"""
     
-    def __init__(self):
+    def __init__(self, match_mode: str = "exact", fuzzy_threshold: float = 0.75, ngram_size: int = 1,
+                 numeric_tolerance: float = 0.01,
+                 bootstrap_resamples: int = DEFAULT_BOOTSTRAP_RESAMPLES,
+                 bootstrap_seed: Optional[int] = DEFAULT_BOOTSTRAP_SEED,
+                 confidence_level: float = DEFAULT_CONFIDENCE_LEVEL):
+        if match_mode not in MATCH_MODES:
+            raise ValueError(f"Unsupported match mode: {match_mode}. Choose from {MATCH_MODES}")
+        
+        self.match_mode = match_mode
+        self.fuzzy_threshold = fuzzy_threshold
+        self.ngram_size = ngram_size
+        self.numeric_tolerance = numeric_tolerance
+        self.bootstrap_resamples = bootstrap_resamples
+        self.bootstrap_seed = bootstrap_seed
+        self.confidence_level = confidence_level
+        
         self.uncertainty_patterns = [
             r"không chắc", r"không rõ", r"khó nói", r"not sure", 
             r"uncertain", r"có thể", r"might be", r"maybe", r"possibly"
@@ -29,6 +504,16 @@ class HallucinationEvaluator:
             "union châu âu": "european union",
             "speed of light": "tốc độ ánh sáng"
         }
+        
+        # Compile once so grading large result sets doesn't re-parse patterns per row
+        self._uncertainty_re = re.compile("|".join(self.uncertainty_patterns))
+        self._whitespace_re = re.compile(r"\s+")
+        self._token_re = re.compile(r"\w+")
+        
+        # Gold answer -> word n-gram set, built once per distinct gold answer
+        self._gold_ngram_index: Dict[str, FrozenSet[str]] = {}
+        # Gold answer -> parsed numeric quantity (None when the gold isn't numeric)
+        self._gold_quantity_cache: Dict[str, Optional[Quantity]] = {}
     
     def normalize(self, text: str) -> str:
         """Normalize text for comparison"""
@@ -42,96 +527,307 @@ class HallucinationEvaluator:
             text = text.replace(old, new)
         
         # Clean whitespace
-        text = re.sub(r"\s+", " ", text)
+        text = self._whitespace_re.sub(" ", text)
         return text
     
     def contains_uncertainty(self, text: str) -> bool:
         """Check if text contains uncertainty expressions"""
         normalized = self.normalize(text)
-        return any(re.search(pattern, normalized) for pattern in self.uncertainty_patterns)
+        return self._uncertainty_re.search(normalized) is not None
     
     def check_correctness(self, answer: str, gold_answer: str) -> bool:
         """Check if answer is correct against gold standard"""
-        answer_norm = self.normalize(answer)
-        gold_norm = self.normalize(gold_answer)
+        return bool(self.correctness([answer], [gold_answer])[0])
+    
+    def parse_gold_quantity(self, gold_answer: str) -> Optional[Quantity]:
+        """Leading numeric quantity of a gold answer, cached per distinct gold
+        
+        Only golds that start with the number (after at most two words such as
+        "Khoảng" or "z ≈") are graded numerically, so textual answers that merely
+        mention a number ("Mọi số chẵn lớn hơn 2 ...") keep substring grading.
+        """
+        if gold_answer in self._gold_quantity_cache:
+            return self._gold_quantity_cache[gold_answer]
         
-        # Direct substring match
-        if gold_norm in answer_norm:
-            return True
-        
-        # Special cases for scientific notation
-        if gold_norm == "3e8":
-            speed_variants = [
-                "3e8", "300,000,000", "300000000", "3 x 10^8", 
-                "3×10^8", "3*10^8", "299792458", "3*10**8"
-            ]
-            return any(variant in answer_norm for variant in speed_variants)
-        
-        # Mathematical equivalencies
-        if "%" in gold_norm:
-            # Handle percentage formats
-            gold_num = re.search(r"(\d+(?:\.\d+)?)", gold_norm)
-            if gold_num:
-                variants = [
-                    f"{gold_num.group(1)}%",
-                    f"{gold_num.group(1)} phần trăm",
-                    f"{float(gold_num.group(1))/100}"
-                ]
-                return any(variant in answer_norm for variant in variants)
-        
-        return False
-    
-    def grade_responses(self, results_df: pd.DataFrame, questions_df: pd.DataFrame) -> pd.DataFrame:
-        """Grade all responses and calculate metrics"""
-        graded_rows = []
-        
-        # Detect answer column name (case-insensitive)
-        answer_col = None
+        gold_norm = self.normalize(gold_answer)
+        quantities = extract_quantities(gold_norm)
+        quantity = None
+        if quantities:
+            prefix = gold_norm[:quantities[0].start].split()
+            if len(prefix) <= 2 and not any(ch.isdigit() for ch in "".join(prefix)):
+                quantity = quantities[0]
+        
+        self._gold_quantity_cache[gold_answer] = quantity
+        return quantity
+    
+    def numeric_matches(self, answers: List, gold_answers: List) -> np.ndarray:
+        """Numeric/unit-aware equivalence of each answer to its gold answer"""
+        matches = np.zeros(len(answers), dtype=bool)
+        for i, (answer, gold) in enumerate(zip(answers, gold_answers)):
+            gold_quantity = self.parse_gold_quantity(gold) if isinstance(gold, str) else None
+            if gold_quantity is None:
+                continue
+            matches[i] = any(
+                quantities_match(gold_quantity, quantity, self.numeric_tolerance)
+                for quantity in extract_quantities(self.normalize(answer))
+            )
+        return matches
+    
+    def correctness(self, answers: List, gold_answers: List, similarity: Optional[np.ndarray] = None) -> np.ndarray:
+        """Correctness of a whole answer column against its gold answers
+        
+        Normalized substring match first; rows that fail it fall back to numeric
+        equivalence (scientific notation, magnitude words, separators, units),
+        then in fuzzy mode to fuzzy_matches. Every grading path goes through here;
+        similarity passes scores already computed for these rows.
+        """
+        correct = np.fromiter(
+            (self.normalize(g) in self.normalize(a) for a, g in zip(answers, gold_answers)),
+            dtype=bool, count=len(answers)
+        )
+        
+        remaining = np.flatnonzero(~correct)
+        if len(remaining):
+            correct[remaining] = self.numeric_matches(
+                [answers[i] for i in remaining], [gold_answers[i] for i in remaining]
+            )
+        
+        remaining = np.flatnonzero(~correct)
+        if self.match_mode == "fuzzy" and len(remaining):
+            correct[remaining] = self.fuzzy_matches(
+                [answers[i] for i in remaining], [gold_answers[i] for i in remaining],
+                None if similarity is None else similarity[remaining]
+            )
+        return correct
+    
+    def _ngram_list(self, text: str) -> List[str]:
+        """Word n-grams of normalized text in order, numbers left out (whole text if shorter than n)
+        
+        Numbers are graded by numeric_matches, so they never count towards similarity.
+        """
+        tokens = [t for t in self._token_re.findall(self.normalize(text)) if not any(c.isdigit() for c in t)]
+        n = self.ngram_size
+        if n == 1:
+            return tokens
+        if len(tokens) < n:
+            return [" ".join(tokens)] if tokens else []
+        return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+    
+    def ngrams(self, text: str) -> FrozenSet[str]:
+        """Word n-gram set of normalized text"""
+        return frozenset(self._ngram_list(text))
+    
+    def build_gold_index(self, gold_answers: List) -> Dict[str, FrozenSet[str]]:
+        """Precompute n-gram sets for every distinct gold answer of a dataset"""
+        for gold in set(g for g in gold_answers if isinstance(g, str)):
+            if gold not in self._gold_ngram_index:
+                self._gold_ngram_index[gold] = self.ngrams(gold)
+        return self._gold_ngram_index
+    
+    def similarity_scores(self, answers: List, gold_answers: List) -> np.ndarray:
+        """Best match of each gold answer inside its answer, numbers excluded
+
+        The Dice score of the gold's n-gram set against every window of the answer
+        as long as the gold, keeping the best one. A long response is scored on its
+        closest passage, so a correct paraphrase is not diluted by the rest of the
+        text, while gold words scattered across the response still score low.
+        """
+        index = self.build_gold_index(gold_answers)
+        empty = frozenset()
+        
+        scores = np.zeros(len(answers))
+        for i, (answer, gold) in enumerate(zip(answers, gold_answers)):
+            gold_set = index.get(gold, empty) if isinstance(gold, str) else empty
+            if gold_set:
+                scores[i] = _best_window_dice(gold_set, self._ngram_list(answer))
+        return scores
+    
+    def _number_tokens(self, text: str) -> FrozenSet[str]:
+        """Tokens of normalized text that contain digits"""
+        return frozenset(t for t in self._token_re.findall(self.normalize(text)) if any(c.isdigit() for c in t))
+    
+    def fuzzy_matches(self, answers: List, gold_answers: List, scores: Optional[np.ndarray] = None) -> np.ndarray:
+        """Answers whose similarity clears fuzzy_threshold without contradicting a number
+        
+        Numeric golds are left to numeric_matches entirely; for other golds every
+        number they mention must also appear in the answer.
+        """
+        if scores is None:
+            scores = self.similarity_scores(answers, gold_answers)
+        matches = np.zeros(len(answers), dtype=bool)
+        for i, (answer, gold) in enumerate(zip(answers, gold_answers)):
+            if scores[i] < self.fuzzy_threshold or not isinstance(gold, str):
+                continue
+            if self.parse_gold_quantity(gold) is not None:
+                continue
+            matches[i] = self._number_tokens(gold) <= self._number_tokens(answer)
+        return matches
+    
+    def revised_answers(self, drafts: List, finals: List, gold_answers: List) -> np.ndarray:
+        """Whether each self-critique final changed the answer of its draft, not just its wording
+
+        The answer changed when the final's grade differs from the draft's or, for
+        numeric golds, when both give quantities and none of them agree.
+        """
+        revised = self.correctness(drafts, gold_answers) != self.correctness(finals, gold_answers)
+        for i in np.flatnonzero(~revised):
+            gold = gold_answers[i]
+            if not isinstance(gold, str) or self.parse_gold_quantity(gold) is None:
+                continue
+            draft_quantities = extract_quantities(self.normalize(drafts[i]))
+            final_quantities = extract_quantities(self.normalize(finals[i]))
+            if draft_quantities and final_quantities:
+                revised[i] = not any(quantities_match(draft, final, self.numeric_tolerance)
+                                     for draft in draft_quantities for final in final_quantities)
+        return revised
+    
+    def find_answer_column(self, questions_df: pd.DataFrame) -> str:
+        """Detect the gold answer column name (case-insensitive)"""
         for col in questions_df.columns:
             col_lower = col.lower()
             if col_lower in ["answer", "ground_truth", "correct_answer", "gold_answer", "best_answer", "best answer"]:
-                answer_col = col
-                break
+                return col
             elif "answer" in col_lower and ("correct" in col_lower or "best" in col_lower or "gold" in col_lower):
-                answer_col = col
-                break
-        
-        if answer_col is None:
-            raise ValueError(f"No answer column found in dataset. Available columns: {list(questions_df.columns)}")
-        
-        for _, row in results_df.iterrows():
-            question_idx = row.get("idx", 0) - 1
-            if question_idx >= 0 and question_idx < len(questions_df):
-                gold_answer = questions_df.iloc[question_idx][answer_col]
-            else:
-                gold_answer = ""
-            
-            # Grade direct answer
-            direct_correct = self.check_correctness(row["direct_answer"], gold_answer)
-            direct_uncertain = self.contains_uncertainty(row["direct_answer"])
-            direct_hallucination = not direct_correct and not direct_uncertain
-            
-            # Grade self-critique answer
-            selfcrit_final = row.get("selfcrit_final_span", row["selfcrit_answer"])
-            selfcrit_correct = self.check_correctness(selfcrit_final, gold_answer)
-            selfcrit_uncertain = self.contains_uncertainty(selfcrit_final)
-            selfcrit_hallucination = not selfcrit_correct and not selfcrit_uncertain
-            
-            graded_rows.append({
-                **row.to_dict(),
-                "gold_answer": gold_answer,
-                "direct_correct": direct_correct,
-                "direct_uncertain": direct_uncertain,
-                "direct_hallucination": direct_hallucination,
-                "selfcrit_correct": selfcrit_correct,
-                "selfcrit_uncertain": selfcrit_uncertain,
-                "selfcrit_hallucination": selfcrit_hallucination
-            })
-        
-        return pd.DataFrame(graded_rows)
-    
-    def calculate_metrics(self, graded_df: pd.DataFrame) -> Dict:
-        """Calculate comprehensive metrics"""
+                return col
+        
+        raise ValueError(f"No answer column found in dataset. Available columns: {list(questions_df.columns)}")
+    
+    def lookup_gold_answers(self, results_df: pd.DataFrame, questions_df: pd.DataFrame) -> List:
+        """Map each result row to its gold answer via the 1-based idx column"""
+        import pandas as pd
+
+        answer_col = self.find_answer_column(questions_df)
+        answers = questions_df[answer_col].tolist()
+        
+        if "idx" in results_df.columns:
+            positions = pd.to_numeric(results_df["idx"], errors="coerce").fillna(0).astype(int) - 1
+        else:
+            positions = pd.Series(-1, index=results_df.index)
+        
+        return [answers[pos] if 0 <= pos < len(answers) else "" for pos in positions]
+    
+    def grade_rows(self, results_df: pd.DataFrame, gold_answers: List) -> pd.DataFrame:
+        """Grade result rows against already aligned gold answers"""
+        import pandas as pd
+
+        graded_df = results_df.copy()
+        
+        direct_answers = results_df["direct_answer"].tolist()
+        if "selfcrit_final_span" in results_df.columns:
+            selfcrit_finals = results_df["selfcrit_final_span"].tolist()
+        else:
+            selfcrit_finals = results_df["selfcrit_answer"].tolist()
+        
+        gold_answers = list(gold_answers)
+        
+        # Fuzzy mode records the similarity behind its decisions, scored once and reused by correctness
+        direct_similarity = selfcrit_similarity = None
+        if self.match_mode == "fuzzy":
+            direct_similarity = self.similarity_scores(direct_answers, gold_answers)
+            selfcrit_similarity = self.similarity_scores(selfcrit_finals, gold_answers)
+            graded_df["direct_similarity"] = direct_similarity
+            graded_df["selfcrit_similarity"] = selfcrit_similarity
+        
+        # Grade direct answers
+        direct_correct = self.correctness(direct_answers, gold_answers, direct_similarity)
+        direct_uncertain = np.array([self.contains_uncertainty(a) for a in direct_answers], dtype=bool)
+        
+        # Grade self-critique answers
+        selfcrit_correct = self.correctness(selfcrit_finals, gold_answers, selfcrit_similarity)
+        selfcrit_uncertain = np.array([self.contains_uncertainty(a) for a in selfcrit_finals], dtype=bool)
+        
+        graded_df["gold_answer"] = gold_answers
+        graded_df["direct_correct"] = direct_correct
+        graded_df["direct_uncertain"] = direct_uncertain
+        graded_df["direct_hallucination"] = ~direct_correct & ~direct_uncertain
+        graded_df["selfcrit_correct"] = selfcrit_correct
+        graded_df["selfcrit_uncertain"] = selfcrit_uncertain
+        graded_df["selfcrit_hallucination"] = ~selfcrit_correct & ~selfcrit_uncertain
+
+        # Segment each self-critique once here so readers only slice the stored offsets
+        offsets = {column: [] for column in SEGMENT_COLUMNS}
+        segmented, drafts, finals = [], [], []
+        for i, text in enumerate(results_df["selfcrit_answer"].tolist()):
+            spans = segment_selfcrit(text)
+            for segment in SELFCRIT_SEGMENTS:
+                start, end = spans.get(segment, (SEGMENT_ABSENT, SEGMENT_ABSENT))
+                offsets[f"selfcrit_{segment}_start"].append(start)
+                offsets[f"selfcrit_{segment}_end"].append(end)
+            if "draft" in spans and "final" in spans:
+                segmented.append(i)
+                drafts.append(text[slice(*spans["draft"])])
+                finals.append(text[slice(*spans["final"])])
+        for column, values in offsets.items():
+            graded_df[column] = np.array(values, dtype=np.int32)
+        revised = pd.array([pd.NA] * len(graded_df), dtype="boolean")
+        if segmented:
+            revised[segmented] = self.revised_answers(drafts, finals, [gold_answers[i] for i in segmented])
+        graded_df["selfcrit_revised"] = revised
+
+        return graded_df.reset_index(drop=True)
+    
+    def grade_record(self, record: Dict, gold_answer) -> Dict:
+        """Grade a single result row as it arrives from a streaming run"""
+        import pandas as pd
+
+        return self.grade_rows(pd.DataFrame([record]), [gold_answer]).iloc[0].to_dict()
+    
+    def new_accumulator(self) -> MetricsAccumulator:
+        """Fresh running-metrics accumulator for a streaming run"""
+        return MetricsAccumulator(self.confidence_level)
+    
+    def grade_stream(self, records: Iterable[Dict], questions_df: pd.DataFrame) -> Iterator[Dict]:
+        """Lazily grade result rows one at a time, matching gold answers by idx"""
+        answers = questions_df[self.find_answer_column(questions_df)].tolist()
+        
+        for record in records:
+            pos = int(record.get("idx", 0) or 0) - 1
+            gold_answer = answers[pos] if 0 <= pos < len(answers) else ""
+            yield self.grade_record(record, gold_answer)
+    
+    def grade_responses(self, results_df: pd.DataFrame, questions_df: pd.DataFrame,
+                        n_jobs: int = 1, chunk_size: int = DEFAULT_GRADING_CHUNK_SIZE) -> pd.DataFrame:
+        """Grade all responses and calculate metrics
+        
+        With n_jobs > 1 (or None for all cores) large result sets are split into
+        chunks and graded on a process pool, then concatenated in original order.
+        """
+        gold_answers = self.lookup_gold_answers(results_df, questions_df)
+        
+        if n_jobs == 1 or len(results_df) <= chunk_size:
+            return self.grade_rows(results_df, gold_answers)
+        
+        return self.grade_responses_parallel(results_df, gold_answers, n_jobs, chunk_size)
+    
+    def grade_responses_parallel(self, results_df: pd.DataFrame, gold_answers: List,
+                                 n_jobs: Optional[int] = None,
+                                 chunk_size: int = DEFAULT_GRADING_CHUNK_SIZE) -> pd.DataFrame:
+        """Grade result chunks on a ProcessPoolExecutor, preserving row order"""
+        import pandas as pd
+
+        chunks = [
+            (results_df.iloc[start:start + chunk_size], gold_answers[start:start + chunk_size])
+            for start in range(0, len(results_df), chunk_size)
+        ]
+        
+        # Each worker receives this evaluator once via the initializer, not per chunk
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_grading_worker,
+                                 initargs=(self,)) as executor:
+            graded_chunks = list(executor.map(_grade_chunk, chunks))
+        
+        if not graded_chunks:
+            return self.grade_rows(results_df, gold_answers)
+        
+        return pd.concat(graded_chunks, ignore_index=True)
+    
+    def calculate_metrics(self, graded_df: pd.DataFrame, n_resamples: Optional[int] = None,
+                          seed: Optional[int] = None) -> Dict:
+        """Calculate comprehensive metrics
+        
+        Adds percentile bootstrap confidence intervals (paired for the
+        improvement deltas) unless n_resamples is 0.
+        """
         total = len(graded_df)
         if total == 0:
             return {}
@@ -156,78 +852,81 @@ class HallucinationEvaluator:
             "hallucination_delta": metrics["direct"]["hallucination_rate"] - metrics["selfcrit"]["hallucination_rate"],
             "uncertainty_delta": metrics["selfcrit"]["uncertainty_rate"] - metrics["direct"]["uncertainty_rate"]
         }
+
+        # Share of segmented self-critiques whose final answer differs from the draft
+        if "selfcrit_revised" in graded_df.columns:
+            revised = graded_df["selfcrit_revised"].astype("boolean").dropna()
+            if len(revised):
+                metrics["selfcrit"]["revision_rate"] = float(revised.mean())
+
+        n_resamples = self.bootstrap_resamples if n_resamples is None else n_resamples
+        if n_resamples > 0:
+            metrics["confidence_intervals"] = self.bootstrap_confidence_intervals(
+                graded_df, n_resamples, self.bootstrap_seed if seed is None else seed
+            )
         
         return metrics
     
-    def generate_word_report(self, graded_df: pd.DataFrame, metrics: Dict, output_path: str):
-        """Generate comprehensive Word report"""
-        doc = Document()
-        
-        # Title
-        title = doc.add_heading("Hallucination Detection Experiment Report", 0)
-        
-        # Executive Summary
-        doc.add_heading("Executive Summary", level=1)
-        
-        summary_data = [
-            f"Total Questions: {metrics['total_questions']}",
-            f"Direct Correct Rate: {metrics['direct']['correct_rate']:.1%}",
-            f"Self-Critique Correct Rate: {metrics['selfcrit']['correct_rate']:.1%}",
-            f"Direct Hallucination Rate: {metrics['direct']['hallucination_rate']:.1%}",
-            f"Self-Critique Hallucination Rate: {metrics['selfcrit']['hallucination_rate']:.1%}",
-            f"Hallucination Reduction: {metrics['improvement']['hallucination_delta']:.1%}"
-        ]
-        
-        for item in summary_data:
-            doc.add_paragraph(f"• {item}")
-        
-        # Detailed Metrics
-        doc.add_heading("Detailed Metrics", level=1)
-        
-        # Create comparison table
-        table = doc.add_table(rows=4, cols=3)
-        table.style = 'Table Grid'
-        
-        headers = ["Metric", "Direct Prompt", "Self-Critique"]
-        for i, header in enumerate(headers):
-            table.cell(0, i).text = header
-        
-        table.cell(1, 0).text = "Correct Rate"
-        table.cell(1, 1).text = f"{metrics['direct']['correct_rate']:.1%}"
-        table.cell(1, 2).text = f"{metrics['selfcrit']['correct_rate']:.1%}"
-        
-        table.cell(2, 0).text = "Uncertainty Rate"
-        table.cell(2, 1).text = f"{metrics['direct']['uncertainty_rate']:.1%}"
-        table.cell(2, 2).text = f"{metrics['selfcrit']['uncertainty_rate']:.1%}"
-        
-        table.cell(3, 0).text = "Hallucination Rate"
-        table.cell(3, 1).text = f"{metrics['direct']['hallucination_rate']:.1%}"
-        table.cell(3, 2).text = f"{metrics['selfcrit']['hallucination_rate']:.1%}"
-        
-        # Sample Responses
-        doc.add_heading("Sample Responses", level=1)
-        
-        # Show first 5 responses
-        for i in range(min(5, len(graded_df))):
-            row = graded_df.iloc[i]
-            doc.add_heading(f"Question {i+1}", level=2)
-            doc.add_paragraph(f"Q: {row['question']}")
-            doc.add_paragraph(f"Gold Answer: {row['gold_answer']}")
-            doc.add_paragraph(f"Direct: {row['direct_answer']} ({'✓' if row['direct_correct'] else '✗'})")
-            doc.add_paragraph(f"Self-Critique: {row.get('selfcrit_final_span', row['selfcrit_answer'])} ({'✓' if row['selfcrit_correct'] else '✗'})")
+    def bootstrap_confidence_intervals(self, graded_df: pd.DataFrame, n_resamples: int,
+                                       seed: Optional[int] = None) -> Dict:
+        """Percentile bootstrap CIs for every rate and paired CIs for the deltas
+        
+        NA flags are left out of each rate, as the point estimates' mean() does.
+        """
+        flags = graded_df[GRADE_FLAG_COLUMNS].astype("Float64")
+        means = bootstrap_means(flags.fillna(0).to_numpy(float), n_resamples, seed,
+                                present=flags.notna().to_numpy(float))
+        
+        # Deltas of rates from the same resample stay paired per question
+        position = {column: i for i, column in enumerate(GRADE_FLAG_COLUMNS)}
+        deltas = [means[:, position[a]] - means[:, position[b]] for a, b in DELTA_COLUMNS.values()]
+        means = np.column_stack([means, *deltas])
+        
+        alpha = (1 - self.confidence_level) / 2
+        lows, highs = np.nanquantile(means, [alpha, 1 - alpha], axis=0)
+        bounds = [[float(low), float(high)] for low, high in zip(lows, highs)]
+        
+        intervals = {
+            "level": self.confidence_level,
+            "n_resamples": n_resamples,
+            "seed": seed,
+            "direct": {},
+            "selfcrit": {},
+            "improvement": {}
+        }
+        for (section, metric, _), bound in zip(RATE_COLUMNS, bounds):
+            intervals[section][metric] = bound
+        for metric, bound in zip(DELTA_COLUMNS, bounds[len(RATE_COLUMNS):]):
+            intervals["improvement"][metric] = bound
         
-        # Save document
-        doc.save(output_path)
+        return intervals
+    
+    def generate_word_report(self, graded_df: pd.DataFrame, metrics: Dict, output_path: str,
+                             template_path: Optional[str] = None):
+        """Generate comprehensive Word report"""
+        try:
+            from src.reports import render_word_report
+        except ImportError:
+            from reports import render_word_report
+
+        render_word_report(graded_df, metrics, output_path, template_path=template_path)
         print(f"Word report saved to: {output_path}")
     
-    def run_evaluation(self, questions_csv: str, results_csv: str, output_dir: str) -> Dict:
+    def run_evaluation(self, questions_csv: str, results_csv: str, output_dir: str, n_jobs: int = 1) -> Dict:
         """Run complete evaluation pipeline"""
+        import pandas as pd
+
         # Load data
+        try:
+            from src.storage import FORMAT_EXTENSIONS, get_storage_config, read_results, write_results
+        except ImportError:
+            from storage import FORMAT_EXTENSIONS, get_storage_config, read_results, write_results
+        
         questions_df = pd.read_csv(questions_csv)
-        results_df = pd.read_csv(results_csv)
+        results_df = read_results(results_csv)
         
         # Grade responses
-        graded_df = self.grade_responses(results_df, questions_df)
+        graded_df = self.grade_responses(results_df, questions_df, n_jobs=n_jobs)
         
         # Calculate metrics
         metrics = self.calculate_metrics(graded_df)
@@ -236,14 +935,35 @@ class HallucinationEvaluator:
         os.makedirs(output_dir, exist_ok=True)
         
         # Save graded results
-        graded_csv = os.path.join(output_dir, "results_graded.csv")
-        graded_df.to_csv(graded_csv, index=False, encoding="utf-8")
+        results_format = get_storage_config()["results_format"]
+        graded_path = os.path.join(output_dir, f"results_graded{FORMAT_EXTENSIONS[results_format]}")
+        write_results(graded_df, graded_path)
         
         # Save metrics
         metrics_json = os.path.join(output_dir, "metrics.json")
         with open(metrics_json, "w", encoding="utf-8") as f:
             json.dump(metrics, f, indent=2, ensure_ascii=False)
         
+        # Record the graded run in the results manifest and warehouse (output_dir is results_dir/<provider>)
+        try:
+            from src.manifest import update_result_set
+            from src.warehouse import open_warehouse
+        except ImportError:
+            from manifest import update_result_set
+            from warehouse import open_warehouse
+        provider = os.path.basename(os.path.normpath(output_dir))
+        if "api" in graded_df.columns and len(graded_df):
+            provider = str(graded_df["api"].iloc[0])
+        dataset = os.path.splitext(os.path.basename(questions_csv))[0]
+        model = str(graded_df["model"].iloc[0]) if "model" in graded_df.columns and len(graded_df) else None
+        update_result_set(os.path.dirname(os.path.abspath(output_dir)), provider, dataset, model=model,
+                          graded_path=graded_path, metrics_path=metrics_json, metrics=metrics,
+                          rows=len(graded_df))
+        warehouse = open_warehouse()
+        if warehouse is not None:
+            with warehouse:
+                warehouse.import_graded(provider, dataset, graded_df, metrics, source=os.path.abspath(graded_path))
+        
         # Generate Word report
         report_docx = os.path.join(output_dir, "experiment_report.docx")
         self.generate_word_report(graded_df, metrics, report_docx)
@@ -256,9 +976,20 @@ def main():
     questions_csv = os.getenv("INPUT_QA", "data/scientific_facts_basic.csv")
     results_csv = os.getenv("INPUT_RAW", "data/results/openai/results_raw.csv")
     output_dir = os.getenv("OUTPUT_DIR", "data/results/openai")
+    # 0 = use all cores for parallel grading
+    n_jobs = int(os.getenv("GRADING_JOBS", "1")) or None
+    match_mode = os.getenv("MATCH_MODE", "exact")
+    fuzzy_threshold = float(os.getenv("FUZZY_THRESHOLD", "0.75"))
+    numeric_tolerance = float(os.getenv("NUMERIC_TOLERANCE", "0.01"))
+    # 0 disables bootstrap confidence intervals
+    bootstrap_resamples = int(os.getenv("BOOTSTRAP_RESAMPLES", str(DEFAULT_BOOTSTRAP_RESAMPLES)))
+    bootstrap_seed = int(os.getenv("BOOTSTRAP_SEED", str(DEFAULT_BOOTSTRAP_SEED)))
     
-    evaluator = HallucinationEvaluator()
-    metrics = evaluator.run_evaluation(questions_csv, results_csv, output_dir)
+    evaluator = HallucinationEvaluator(match_mode=match_mode, fuzzy_threshold=fuzzy_threshold,
+                                       numeric_tolerance=numeric_tolerance,
+                                       bootstrap_resamples=bootstrap_resamples,
+                                       bootstrap_seed=bootstrap_seed)
+    metrics = evaluator.run_evaluation(questions_csv, results_csv, output_dir, n_jobs=n_jobs)
     
     print("Metrics Summary:")
     print(f"Correct Rate (Direct): {metrics['direct']['correct_rate']:.1%}")
@@ -0,0 +1,135 @@
+"""
+Bulk results export for Hallucination Detection
+Zips selected result sets on disk file by file, so memory stays bounded however large the results are
+"""
+
+import glob
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from src.manifest import entry_path, result_sets
+    from src.storage import temp_path
+except ImportError:
+    from manifest import entry_path, result_sets
+    from storage import temp_path
+
+EXPORT_KINDS = ("raw", "graded", "metrics", "reports")
+
+# Archives kept under <results>/exports before the oldest are deleted
+MAX_EXPORTS = 5
+
+# Archives younger than this (seconds) are never pruned: a session's download button may still point at them
+MIN_EXPORT_AGE = float(os.getenv("EXPORT_MIN_AGE", str(24 * 3600)))
+
+EXPORTS_DIR = "exports"
+
+# Cross-model reports (scripts/cross_model_comparison.py) live here
+REPORTS_DIR = "reports"
+
+# Formats that are compressed already; deflating them again only costs CPU
+_STORED_EXTENSIONS = {".parquet", ".arrow", ".docx", ".png", ".zip"}
+
+def exports_dir(results_dir: str) -> str:
+    """Directory holding built archives"""
+    return os.path.join(str(results_dir), EXPORTS_DIR)
+
+def reports_dir(results_dir: str) -> str:
+    """Directory holding cross-model reports"""
+    return os.path.join(str(results_dir), REPORTS_DIR)
+
+def entry_files(results_dir: str, entry: Dict, kinds: Iterable[str] = EXPORT_KINDS) -> List[str]:
+    """Files of one result set for the requested kinds"""
+    files = []
+    for kind in kinds:
+        if kind == "reports":
+            graded = entry_path(results_dir, entry, "graded")
+            if graded:
+                files.extend(sorted(glob.glob(os.path.join(glob.escape(os.path.dirname(graded)),
+                                                           f"report_{glob.escape(entry['dataset'])}.*"))))
+            continue
+        path = entry_path(results_dir, entry, kind)
+        if path and os.path.exists(path):
+            files.append(path)
+    return files
+
+def _add_file(archive: zipfile.ZipFile, path: str, arcname: str):
+    """Copy one file into the archive in chunks"""
+    compression = zipfile.ZIP_STORED if os.path.splitext(path)[1] in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+    archive.write(path, arcname, compress_type=compression)
+
+def write_results_zip(results_dir: str, dest_path: str, keys: Optional[Iterable[str]] = None,
+                      kinds: Iterable[str] = EXPORT_KINDS) -> Dict:
+    """Write the selected result sets ("provider/dataset" keys, default all) to a zip at dest_path
+
+    The archive is built next to dest_path and renamed into place when complete.
+    Returns a summary with the archive path, file count and size.
+    """
+    results_dir = str(results_dir)
+    kinds = [kind for kind in kinds if kind in EXPORT_KINDS]
+    keys = set(keys) if keys is not None else None
+    entries = [entry for entry in result_sets(results_dir)
+               if keys is None or f"{entry['provider']}/{entry['dataset']}" in keys]
+
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    tmp_path = temp_path(dest_path)
+    files = 0
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for entry in entries:
+                prefix = f"{entry['provider']}/{entry['dataset']}"
+                for path in entry_files(results_dir, entry, kinds):
+                    _add_file(archive, path, f"{prefix}/{os.path.basename(path)}")
+                    files += 1
+            if "reports" in kinds and os.path.isdir(reports_dir(results_dir)):
+                for name in sorted(os.listdir(reports_dir(results_dir))):
+                    _add_file(archive, os.path.join(reports_dir(results_dir), name), f"{REPORTS_DIR}/{name}")
+                    files += 1
+            # Which runs the archive holds, for whoever unpacks it
+            archive.writestr("manifest.json", json.dumps({
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+                "kinds": kinds,
+                "result_sets": entries,
+            }, indent=2, ensure_ascii=False))
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {"path": dest_path, "result_sets": len(entries), "files": files, "size": os.path.getsize(dest_path)}
+
+def _prune_exports(directory: str, keep: int, min_age: float = MIN_EXPORT_AGE):
+    archives = sorted(glob.glob(os.path.join(glob.escape(directory), "results_*.zip")))
+    cutoff = time.time() - min_age
+    for path in archives[:max(len(archives) - keep, 0)]:
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # pruned by another session meanwhile
+
+def export_results(results_dir: str, keys: Optional[Iterable[str]] = None,
+                   kinds: Iterable[str] = EXPORT_KINDS, keep: int = MAX_EXPORTS) -> Dict:
+    """Build a timestamped archive under <results>/exports
+
+    Older archives beyond the newest `keep` are deleted once they are MIN_EXPORT_AGE old.
+    """
+    directory = exports_dir(results_dir)
+    dest_path = os.path.join(directory, f"results_{datetime.now():%Y%m%d_%H%M%S_%f}.zip")
+    summary = write_results_zip(results_dir, dest_path, keys=keys, kinds=kinds)
+    _prune_exports(directory, keep)
+    return summary
+
+def main():
+    """Export every result set under RESULTS_DIR (EXPORT_KINDS limits the file kinds)"""
+    results_dir = os.getenv("RESULTS_DIR", "data/results")
+    kinds = [kind.strip() for kind in os.getenv("EXPORT_KINDS", ",".join(EXPORT_KINDS)).split(",") if kind.strip()]
+    summary = export_results(results_dir, kinds=kinds)
+    print(f"Exported {summary['result_sets']} result set(s), {summary['files']} file(s), "
+          f"{summary['size'] / 1e6:.1f} MB to {summary['path']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Process-wide frame cache for Hallucination Detection
+Graded frames are shared by every session and evicted least recently used beyond a memory budget
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+# Memory budget of the shared cache, unless FRAME_CACHE_MB says otherwise
+DEFAULT_BUDGET_MB = 512
+
+def frame_nbytes(frame) -> int:
+    """Memory held by a frame, including the strings of object columns"""
+    try:
+        return int(frame.memory_usage(index=True, deep=True).sum())
+    except AttributeError:
+        return 0
+
+class FrameCache:
+    """Thread-safe LRU of frames bounded by total size in bytes
+
+    Sessions keep only keys (see manifest.LazyResult); a frame evicted here is
+    reloaded by its loader on next access. A frame larger than the whole
+    budget is returned but not kept.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = int(budget_bytes)
+        self._frames: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, loader: Callable[[], object]):
+        """Cached frame for key, loading (and caching) it with loader() on a miss"""
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return self._frames[key][0]
+            self.misses += 1
+        # Loaded outside the lock so slow reads do not block other sessions;
+        # two sessions missing the same key at once both load it, and one copy wins
+        frame = loader()
+        self.put(key, frame)
+        return frame
+
+    def put(self, key: Hashable, frame):
+        """Cache a frame, evicting the least recently used ones to stay within the budget"""
+        size = frame_nbytes(frame)
+        with self._lock:
+            self._discard(key)
+            if size > self.budget_bytes:
+                return
+            self._frames[key] = (frame, size)
+            self._bytes += size
+            while self._bytes > self.budget_bytes:
+                self._discard(next(iter(self._frames)))
+                self.evictions += 1
+
+    def _discard(self, key: Hashable):
+        entry = self._frames.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def discard(self, key: Hashable):
+        """Drop one frame (e.g. after its file was rewritten)"""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        """Drop every frame"""
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Frame count, bytes used, budget and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+_shared_cache: Optional[FrameCache] = None
+_shared_cache_lock = threading.Lock()
+
+def shared_frame_cache() -> FrameCache:
+    """The process's frame cache; FRAME_CACHE_MB sets its budget"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            budget_mb = float(os.getenv("FRAME_CACHE_MB", str(DEFAULT_BUDGET_MB)))
+            _shared_cache = FrameCache(int(budget_mb * 1024 * 1024))
+        return _shared_cache
@@ -0,0 +1,405 @@
+"""
+Persistent experiment queue for Hallucination Detection
+Jobs live in an SQLite file shared by every Streamlit session and process; a fixed
+pool of workers per process claims them under global per-provider concurrency limits
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    from src.jobs import ACTIVE_STATES, CANCELLED, COMPLETED, FAILED, MAX_FINISHED_JOBS, QUEUED, RUNNING, JobCancelled
+except ImportError:
+    from jobs import ACTIVE_STATES, CANCELLED, COMPLETED, FAILED, MAX_FINISHED_JOBS, QUEUED, RUNNING, JobCancelled
+
+QUEUE_FILE = "jobs.db"
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "results")
+
+# Running jobs allowed per provider across all processes, unless PROVIDER_CONCURRENCY says otherwise
+DEFAULT_PROVIDER_CONCURRENCY = 2
+
+# Idle workers look for new jobs this often (seconds)
+POLL_INTERVAL = 1.0
+
+# A running job whose worker has not reported for this long is failed (its process is gone)
+DEFAULT_STALE_SECONDS = 900
+
+# Workers refresh the heartbeat of their running jobs this often (seconds), between reports too
+HEARTBEAT_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    params_json TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    provider TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    metrics_json TEXT,
+    result_json TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    heartbeat_at TEXT
+);
+-- At most one queued or running job per identical request
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe ON jobs(dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+"""
+
+def _now() -> str:
+    """UTC timestamp that sorts lexicographically"""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+def _json_safe(value):
+    """value without the parts JSON cannot hold (e.g. a report Future in a result dict)"""
+    if isinstance(value, dict):
+        safe = {}
+        for key, item in value.items():
+            try:
+                json.dumps(item)
+            except (TypeError, ValueError):
+                continue
+            safe[key] = item
+        return safe
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return None
+
+def dedupe_key(kind: str, params: Dict) -> str:
+    """Identity of a request: same kind and parameters means the same job"""
+    return hashlib.sha256(json.dumps([kind, params], sort_keys=True).encode("utf-8")).hexdigest()
+
+class QueuedJob:
+    """Read-only view of one queue row"""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.label = row["label"]
+        self.kind = row["kind"]
+        self.metadata = json.loads(row["params_json"])
+        self.provider = row["provider"]
+        self.status = row["status"]
+        self.progress = row["progress"]
+        self.message = row["message"]
+        self.metrics = json.loads(row["metrics_json"]) if row["metrics_json"] else None
+        self.result = json.loads(row["result_json"]) if row["result_json"] else None
+        self.error = row["error"]
+        self.cancel_requested = bool(row["cancel_requested"])
+        self.worker = row["worker"]
+        self.created_at = row["created_at"]
+        self.started_at = row["started_at"]
+        self.finished_at = row["finished_at"]
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+class JobQueue:
+    """SQLite-backed job queue; safe to share between threads, sessions and processes
+
+    Every call opens its own short-lived connection, and claims run in an
+    immediate transaction, so concurrency limits hold across processes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, label: str, kind: str, params: Dict, provider: Optional[str] = None) -> Tuple[str, bool]:
+        """Queue a job; (job id, True) or (id of the identical queued/running job, False)"""
+        key = dedupe_key(kind, params)
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, label, kind, params_json, dedupe_key, provider, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, label, kind, json.dumps(params), key, provider, QUEUED, _now()),
+                )
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)", (key, *ACTIVE_STATES)
+                ).fetchone()
+                if row is not None:
+                    return row["id"], False
+                raise
+            self._forget_finished(conn)
+        return job_id, True
+
+    def _forget_finished(self, conn: sqlite3.Connection):
+        conn.execute(
+            "DELETE FROM jobs WHERE status NOT IN (?, ?) AND id NOT IN "
+            "(SELECT id FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at DESC LIMIT ?)",
+            (*ACTIVE_STATES, *ACTIVE_STATES, MAX_FINISHED_JOBS),
+        )
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        """Job by id (None once forgotten)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return QueuedJob(row) if row is not None else None
+
+    def jobs(self, active_only: bool = False) -> List[QueuedJob]:
+        """Jobs in submission order"""
+        query = "SELECT * FROM jobs"
+        params = ()
+        if active_only:
+            query += " WHERE status IN (?, ?)"
+            params = ACTIVE_STATES
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created_at, rowid", params).fetchall()
+        return [QueuedJob(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs are cancelled at once, running ones at their next report"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, _now(), job_id, QUEUED),
+            )
+            updated = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING)
+            ).rowcount
+            cancelled = conn.execute(
+                "SELECT 1 FROM jobs WHERE id = ? AND status = ?", (job_id, CANCELLED)
+            ).fetchone()
+        return bool(updated or cancelled)
+
+    def claim(self, worker: str, kinds: List[str], limits: Dict[str, int],
+              default_limit: int = DEFAULT_PROVIDER_CONCURRENCY) -> Optional[QueuedJob]:
+        """Atomically start the oldest queued job whose provider is below its concurrency limit"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = dict(conn.execute(
+                    "SELECT provider, COUNT(*) FROM jobs WHERE status = ? GROUP BY provider", (RUNNING,)
+                ).fetchall())
+                queued = conn.execute(
+                    f"SELECT id, provider FROM jobs WHERE status = ? AND kind IN ({', '.join('?' * len(kinds))}) "
+                    "ORDER BY created_at, rowid", (QUEUED, *kinds)
+                ).fetchall()
+                for row in queued:
+                    if running.get(row["provider"], 0) < limits.get(row["provider"], default_limit):
+                        now = _now()
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                            (RUNNING, worker, now, now, row["id"]),
+                        )
+                        conn.execute("COMMIT")
+                        return self.get(row["id"])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return None
+
+    def report(self, job_id: str, **fields) -> bool:
+        """Update progress, message and/or metrics of a running job
+
+        Returns True, without updating, once cancellation was requested.
+        """
+        columns = {"progress": "progress", "message": "message", "metrics": "metrics_json"}
+        updates = {columns[name]: json.dumps(value, default=float) if name == "metrics" else value
+                   for name, value in fields.items()}
+        with self._connect() as conn:
+            updated = conn.execute(
+                f"UPDATE jobs SET {''.join(f'{column} = ?, ' for column in updates)}heartbeat_at = ? "
+                "WHERE id = ? AND cancel_requested = 0",
+                (*updates.values(), _now(), job_id),
+            ).rowcount
+        return not updated
+
+    def finish(self, job_id: str, status: str, result=None, error: Optional[str] = None):
+        """Record the outcome of a job"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result_json = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(_json_safe(result)) if result is not None else None, error, _now(), job_id),
+            )
+
+    def heartbeat(self, job_ids: List[str]):
+        """Mark running jobs as alive even when their handler has nothing to report"""
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND id IN ({', '.join('?' * len(job_ids))})",
+                (_now(), RUNNING, *job_ids),
+            )
+
+    def fail_orphaned(self, worker_prefix: str, live_workers: List[str] = ()) -> int:
+        """Fail running jobs claimed by an earlier process with this host:pid that are not held by live_workers"""
+        prefix = f"{worker_prefix}:"
+        query = "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND substr(worker, 1, ?) = ?"
+        if live_workers:
+            query += f" AND worker NOT IN ({', '.join('?' * len(live_workers))})"
+        with self._connect() as conn:
+            return conn.execute(
+                query, (FAILED, "Worker restarted", _now(), RUNNING, len(prefix), prefix, *live_workers)
+            ).rowcount
+
+    def fail_stale(self, stale_seconds: int = DEFAULT_STALE_SECONDS) -> int:
+        """Fail running jobs whose worker stopped reporting (e.g. the process was restarted)"""
+        cutoff = (datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=stale_seconds)).isoformat(timespec="seconds")
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat_at < ?",
+                (FAILED, "Worker stopped responding", _now(), RUNNING, cutoff),
+            ).rowcount
+
+class QueueProgress:
+    """Progress sink of a queued job, with the st.progress / st.empty().text interface
+
+    Every update is written to the queue and is a cancellation point.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self._queue = queue
+        self._job_id = job_id
+
+    def _report(self, **fields):
+        if self._queue.report(self._job_id, **fields):
+            raise JobCancelled(f"Job {self._job_id} cancelled")
+
+    def progress(self, value: float):
+        """Record progress in [0, 1]"""
+        self._report(progress=min(max(float(value), 0.0), 1.0))
+
+    def text(self, message: str):
+        """Record the current status message"""
+        self._report(message=str(message))
+
+    def metrics(self, metrics: Dict):
+        """Record the job's partial results for live display"""
+        self._report(metrics=metrics)
+
+class QueueWorkers:
+    """Fixed pool of daemon threads running queued jobs with the handler registered for their kind
+
+    handlers maps a job kind to fn(params, progress) returning the job result.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict, QueueProgress], object]],
+                 workers: int, provider_limits: Optional[Dict[str, int]] = None,
+                 stale_seconds: int = DEFAULT_STALE_SECONDS):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.provider_limits = provider_limits or {}
+        self.stale_seconds = stale_seconds
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running: Set[str] = set()
+        self._running_lock = threading.Lock()
+
+    # Worker ids of every pool started in this process, so no pool fails another's jobs
+    _live_workers: List[str] = []
+    _live_lock = threading.Lock()
+
+    def start(self) -> "QueueWorkers":
+        """Start the worker threads and their heartbeat
+
+        Running jobs left by an earlier process with the same host and pid
+        (e.g. a container restart) are failed first: nothing runs them any more.
+        """
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        with QueueWorkers._live_lock:
+            offset = len(QueueWorkers._live_workers)
+            workers = [f"{prefix}:{offset + i}" for i in range(self.workers)]
+            self.queue.fail_orphaned(prefix, QueueWorkers._live_workers)
+            QueueWorkers._live_workers.extend(workers)
+        for i, worker in enumerate(workers):
+            thread = threading.Thread(target=self._loop, args=(worker,),
+                                      name=f"queue-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self._heartbeat, name="queue-heartbeat", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop claiming new jobs; running jobs finish first"""
+        self._stop.set()
+
+    def _loop(self, worker: str):
+        while not self._stop.is_set():
+            self.queue.fail_stale(self.stale_seconds)
+            job = self.queue.claim(worker, list(self.handlers), self.provider_limits)
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            self._run(job)
+
+    def _heartbeat(self):
+        # Handlers may go quiet for long stretches (a slow API call), so liveness is
+        # reported here rather than only through QueueProgress
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._running_lock:
+                job_ids = list(self._running)
+            if job_ids:
+                self.queue.heartbeat(job_ids)
+            elif self._stop.is_set():
+                return
+
+    def _run(self, job: QueuedJob):
+        with self._running_lock:
+            self._running.add(job.id)
+        try:
+            self._run_handler(job)
+        finally:
+            with self._running_lock:
+                self._running.discard(job.id)
+
+    def _run_handler(self, job: QueuedJob):
+        result, error, status = None, None, COMPLETED
+        try:
+            result = self.handlers[job.kind](job.metadata, QueueProgress(self.queue, job.id))
+            # Jobs that report errors in their result (e.g. run_experiment) still fail
+            if isinstance(result, dict) and "error" in result:
+                error, status = result["error"], FAILED
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            import traceback
+            error, status = f"{e}\n{traceback.format_exc()}", FAILED
+        if status != CANCELLED and (self.queue.get(job.id) or job).cancel_requested:
+            status = CANCELLED
+        self.queue.finish(job.id, status, result=result, error=error)
+
+def open_job_queue(results_dir: Optional[str] = None) -> JobQueue:
+    """Queue stored next to the results (JOB_QUEUE_DB overrides the path)"""
+    return JobQueue(os.getenv("JOB_QUEUE_DB") or os.path.join(str(results_dir or DEFAULT_RESULTS_DIR), QUEUE_FILE))
+
+def provider_limits_from_env() -> Dict[str, int]:
+    """PROVIDER_CONCURRENCY, e.g. "openai=4,gemini=1": running jobs allowed per provider"""
+    limits = {}
+    for item in os.getenv("PROVIDER_CONCURRENCY", "").split(","):
+        if "=" in item:
+            provider, limit = item.split("=", 1)
+            limits[provider.strip().lower()] = int(limit)
+    return limits
@@ -0,0 +1,22 @@
+"""
+Experiment job states for Hallucination Detection
+Shared by the persistent queue (job_queue.py) and the dashboard that displays it
+"""
+
+import os
+
+# Queue workers per dashboard process, unless EXPERIMENT_WORKERS says otherwise
+DEFAULT_MAX_WORKERS = 4
+
+# Finished jobs kept for display before the oldest are forgotten
+MAX_FINISHED_JOBS = 100
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+def max_workers_from_env() -> int:
+    """EXPERIMENT_WORKERS, the number of experiments that may run at once"""
+    return int(os.getenv("EXPERIMENT_WORKERS", str(DEFAULT_MAX_WORKERS))) or DEFAULT_MAX_WORKERS
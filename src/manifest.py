@@ -0,0 +1,378 @@
+"""
+Results manifest for Hallucination Detection experiments
+One small JSON index of every provider x dataset result set, kept current by the writers
+
+Runs are stored append-only as <provider>/<model>/<dataset>/<run_id>/; the
+manifest entry of a provider x dataset points at its latest run, and each
+<provider>/<model>/<dataset>/history.jsonl gets one line of headline metrics per run.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from src.frame_cache import shared_frame_cache
+    from src.storage import read_results, temp_path
+except ImportError:
+    from frame_cache import shared_frame_cache
+    from storage import read_results, temp_path
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Headline numbers copied from metrics files so overviews need no other reads
+HEADLINE_METRICS = [
+    ("direct", "correct_rate"), ("direct", "hallucination_rate"),
+    ("selfcrit", "correct_rate"), ("selfcrit", "hallucination_rate"),
+    ("improvement", "hallucination_delta"),
+]
+
+LOCK_TIMEOUT = 30
+
+HISTORY_FILE = "history.jsonl"
+
+# Characters allowed in a path component built from a model or dataset name
+_UNSAFE_PATH_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+def new_run_id() -> str:
+    """Run id that sorts by start time (UTC)"""
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+def _path_component(name: str) -> str:
+    """Model/dataset name usable as a directory name (e.g. "llama3:8b" -> "llama3_8b")"""
+    return _UNSAFE_PATH_RE.sub("_", str(name)).strip("._") or "unknown"
+
+def series_dir(results_dir: str, provider: str, model: Optional[str], dataset: str) -> str:
+    """Directory holding every run of one provider x model x dataset"""
+    return os.path.join(str(results_dir), provider.lower(), _path_component(model or "unknown"),
+                        _path_component(dataset))
+
+def create_run_dir(results_dir: str, provider: str, model: Optional[str], dataset: str,
+                   run_id: Optional[str] = None) -> Tuple[str, str]:
+    """Create the directory of a new run and return (run_id, path)
+
+    The directory must not exist yet, so a run never overwrites an earlier one.
+    """
+    run_id = run_id or new_run_id()
+    path = os.path.join(series_dir(results_dir, provider, model, dataset), run_id)
+    os.makedirs(path)
+    return run_id, path
+
+def manifest_path(results_dir: str) -> str:
+    """Location of the manifest inside a results directory"""
+    return os.path.join(str(results_dir), MANIFEST_FILE)
+
+def _file_entry(results_dir: str, path: str, rows: Optional[int] = None, with_hash: bool = False) -> Dict:
+    """Relative path, size and mtime of a result file (plus row count / content hash)"""
+    stat = os.stat(path)
+    entry = {
+        "path": os.path.relpath(path, results_dir).replace(os.sep, "/"),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+    if rows is not None:
+        entry["rows"] = int(rows)
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        entry["sha256"] = digest.hexdigest()
+    return entry
+
+def headline_metrics(metrics: Dict) -> Dict[str, float]:
+    """Flat headline metrics, e.g. {"selfcrit_hallucination_rate": 0.37}"""
+    headline = {}
+    for section, name in HEADLINE_METRICS:
+        value = metrics.get(section, {}).get(name)
+        if value is not None:
+            headline[f"{section}_{name}"] = float(value)
+    return headline
+
+def load_manifest(results_dir: str) -> Dict:
+    """Current manifest; empty when none has been written yet"""
+    try:
+        with open(manifest_path(results_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "result_sets": {}}
+
+def _write_manifest(results_dir: str, manifest: Dict):
+    """Replace the manifest atomically so readers never see a half-written file"""
+    path = manifest_path(results_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = temp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _modify_manifest(results_dir: str, change: Callable[[Dict], None]):
+    """Read-modify-write the manifest under a lock file shared by all writers"""
+    lock_path = f"{manifest_path(results_dir)}.lock"
+    os.makedirs(str(results_dir), exist_ok=True)
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            _break_stale_lock(lock_path)
+            time.sleep(0.05)
+    try:
+        os.write(fd, token.encode("utf-8"))
+        manifest = load_manifest(results_dir)
+        change(manifest)
+        manifest["version"] = MANIFEST_VERSION
+        manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        _write_manifest(results_dir, manifest)
+    finally:
+        os.close(fd)
+        # The lock may have been broken and taken by another writer meanwhile
+        if _lock_owner(lock_path) == token:
+            os.remove(lock_path)
+
+def _lock_owner(lock_path: str) -> Optional[str]:
+    """Token written into a lock file by the writer holding it"""
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _break_stale_lock(lock_path: str):
+    """Remove a lock left behind by a crashed writer, i.e. untouched for LOCK_TIMEOUT seconds"""
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT:
+            os.remove(lock_path)
+    except FileNotFoundError:
+        # Released (or broken by another waiter) in the meantime
+        pass
+
+def update_result_set(results_dir: str, provider: str, dataset: str, model: Optional[str] = None,
+                      raw_path: Optional[str] = None, graded_path: Optional[str] = None,
+                      metrics_path: Optional[str] = None, metrics: Optional[Dict] = None,
+                      rows: Optional[int] = None, run_id: Optional[str] = None):
+    """Record (or refresh) one result set after its files were written
+
+    With a run_id the entry points at that run, and once its metrics are known
+    they are appended to the run history.
+    """
+    results_dir = str(results_dir)
+    provider = provider.lower()
+    files = {}
+    if raw_path and os.path.exists(raw_path):
+        files["raw"] = _file_entry(results_dir, raw_path, rows=rows)
+    if graded_path and os.path.exists(graded_path):
+        files["graded"] = _file_entry(results_dir, graded_path, rows=rows, with_hash=True)
+    if metrics_path and os.path.exists(metrics_path):
+        files["metrics"] = _file_entry(results_dir, metrics_path)
+        if metrics is None:
+            with open(metrics_path, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+
+    def change(manifest):
+        entry = manifest["result_sets"].setdefault(f"{provider}/{dataset}", {
+            "provider": provider,
+            "dataset": dataset,
+        })
+        if model:
+            entry["model"] = model
+        if run_id and entry.get("run_id") != run_id:
+            # A new run replaces every file of the previous one in the entry
+            for kind in ("raw", "graded", "metrics"):
+                entry.pop(kind, None)
+            entry["run_id"] = run_id
+        entry.update(files)
+        if metrics:
+            entry["headline"] = headline_metrics(metrics)
+        entry["updated_at"] = datetime.now().isoformat(timespec="seconds")
+
+    _modify_manifest(results_dir, change)
+    if run_id and metrics:
+        append_run_history(results_dir, provider, model, dataset, run_id, metrics)
+
+def append_run_history(results_dir: str, provider: str, model: Optional[str], dataset: str,
+                       run_id: str, metrics: Dict):
+    """Append the headline metrics of a finished run to its series history"""
+    line = json.dumps({
+        "run_id": run_id,
+        "provider": provider.lower(),
+        "model": model,
+        "dataset": dataset,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        **headline_metrics(metrics),
+    }, ensure_ascii=False)
+    path = os.path.join(series_dir(results_dir, provider, model, dataset), HISTORY_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # One short write in append mode: concurrent writers never interleave lines
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+def _subdirs(path: str) -> List[str]:
+    """Sorted names of the directories in path (none when it does not exist)"""
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+def metric_history(results_dir: str, provider: Optional[str] = None, model: Optional[str] = None,
+                   dataset: Optional[str] = None) -> List[Dict]:
+    """Headline metrics of every recorded run, oldest first, optionally filtered
+
+    Only the history files of matching series are read; runs themselves are not opened.
+    """
+    results_dir = str(results_dir)
+    history = []
+    for provider_name in [provider.lower()] if provider else _subdirs(results_dir):
+        provider_dir = os.path.join(results_dir, provider_name)
+        for model_name in [_path_component(model)] if model else _subdirs(provider_dir):
+            model_dir = os.path.join(provider_dir, model_name)
+            for dataset_name in [_path_component(dataset)] if dataset else _subdirs(model_dir):
+                path = os.path.join(model_dir, dataset_name, HISTORY_FILE)
+                if not os.path.exists(path):
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    history.extend(json.loads(line) for line in f if line.strip())
+    return sorted(history, key=lambda run: run["run_id"])
+
+def _scan_result_files(directory: str) -> Dict[str, Dict[str, str]]:
+    """Result files in one directory by dataset and kind (graded/raw/metrics)"""
+    files = {}
+    for filename in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(filename)
+        for kind, prefix, extensions in (("graded", "results_graded_", (".csv", ".parquet", ".arrow")),
+                                         ("raw", "results_raw_", (".csv", ".parquet", ".arrow")),
+                                         ("metrics", "metrics_", (".json",))):
+            if stem.startswith(prefix) and ext in extensions:
+                dataset_files = files.setdefault(stem[len(prefix):], {})
+                # Columnar files take precedence over a CSV of the same result set
+                if kind not in dataset_files or ext != ".csv":
+                    dataset_files[kind] = os.path.join(directory, filename)
+    return files
+
+def _latest_runs(provider_dir: str) -> Dict[str, Tuple[str, str]]:
+    """Newest run directory per dataset in the run layout: {dataset: (run_id, path)}"""
+    latest = {}
+    for model_name in _subdirs(provider_dir):
+        model_dir = os.path.join(provider_dir, model_name)
+        for dataset_name in _subdirs(model_dir):
+            dataset_dir = os.path.join(model_dir, dataset_name)
+            # Run ids sort by start time; the newest run with graded results wins
+            for run_id in reversed(_subdirs(dataset_dir)):
+                run_path = os.path.join(dataset_dir, run_id)
+                graded = [d for d, paths in _scan_result_files(run_path).items() if "graded" in paths]
+                for dataset in graded:
+                    if run_id > latest.get(dataset, ("",))[0]:
+                        latest[dataset] = (run_id, run_path)
+                if graded:
+                    break
+    return latest
+
+def rebuild_manifest(results_dir: str) -> Dict:
+    """Index result files written before the manifest existed (or by other tools)
+
+    This is the only place that parses result file names.
+    """
+    results_dir = str(results_dir)
+    result_sets = {}
+    for provider in _subdirs(results_dir):
+        if provider.startswith("."):
+            # Caches such as .arrow_cache
+            continue
+        provider_dir = os.path.join(results_dir, provider)
+        files = _scan_result_files(provider_dir)
+        run_ids = {}
+        # The latest run in the run layout supersedes flat legacy files
+        for dataset, (run_id, run_path) in _latest_runs(provider_dir).items():
+            files[dataset] = _scan_result_files(run_path)[dataset]
+            run_ids[dataset] = run_id
+
+        for dataset, paths in files.items():
+            if "graded" not in paths:
+                continue
+            try:
+                graded = read_results(paths["graded"], columns=["idx", "model"])
+                entry = {
+                    "provider": provider,
+                    "dataset": dataset,
+                    "graded": _file_entry(results_dir, paths["graded"], rows=len(graded), with_hash=True),
+                    "updated_at": datetime.now().isoformat(timespec="seconds"),
+                }
+                if "model" in graded.columns and len(graded):
+                    entry["model"] = str(graded["model"].iloc[0])
+                if dataset in run_ids:
+                    entry["run_id"] = run_ids[dataset]
+                if "raw" in paths:
+                    entry["raw"] = _file_entry(results_dir, paths["raw"])
+                if "metrics" in paths:
+                    entry["metrics"] = _file_entry(results_dir, paths["metrics"])
+                    with open(paths["metrics"], "r", encoding="utf-8") as f:
+                        entry["headline"] = headline_metrics(json.load(f))
+            except Exception as e:
+                print(f"Skipping {paths['graded']}: {e}")
+                continue
+            result_sets[f"{provider}/{dataset}"] = entry
+
+    _modify_manifest(results_dir, lambda manifest: manifest.update(result_sets=result_sets))
+    return load_manifest(results_dir)
+
+def result_sets(results_dir: str) -> List[Dict]:
+    """Manifest entries sorted by provider and dataset, building the manifest on first use"""
+    if not os.path.exists(manifest_path(results_dir)):
+        if not os.path.isdir(str(results_dir)):
+            return []
+        rebuild_manifest(results_dir)
+    entries = load_manifest(results_dir)["result_sets"].values()
+    return sorted(entries, key=lambda entry: (entry["provider"], entry["dataset"]))
+
+def entry_path(results_dir: str, entry: Dict, kind: str) -> Optional[str]:
+    """Absolute path of a file ("raw", "graded", "metrics") listed in a manifest entry"""
+    if kind not in entry:
+        return None
+    return os.path.join(str(results_dir), *entry[kind]["path"].split("/"))
+
+def load_entry_metrics(results_dir: str, entry: Dict) -> Dict:
+    """Full metrics of a manifest entry"""
+    path = entry_path(results_dir, entry, "metrics")
+    if path is None:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class LazyResult(dict):
+    """Result-set handle whose graded_data frame is served by the shared frame cache
+
+    The handle holds no frame itself, so sessions can keep many of them; cache_key
+    must identify the frame's source and content, e.g. ("warehouse", run id, ...)
+    or ("file", path, hash, columns), since the same run id can name both.
+    """
+
+    def __init__(self, load_graded: Callable, cache_key: Optional[Tuple] = None, **fields):
+        super().__init__(**fields)
+        self._load_graded = load_graded
+        self._cache_key = cache_key if cache_key is not None else ("result", uuid.uuid4().hex)
+
+    def __missing__(self, key):
+        if key != "graded_data":
+            raise KeyError(key)
+        return shared_frame_cache().get(self._cache_key, self._load_graded)
+
+    def __contains__(self, key):
+        return key == "graded_data" or super().__contains__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+def main():
+    """Rebuild the manifest from the files under RESULTS_DIR"""
+    results_dir = os.getenv("RESULTS_DIR", "data/results")
+    manifest = rebuild_manifest(results_dir)
+    print(f"Indexed {len(manifest['result_sets'])} result set(s) in {manifest_path(results_dir)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Streaming experiment pipeline
+Runner rows flow straight into grading, running metrics and incremental sinks
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+try:
+    from src.storage import open_row_sink, temp_path
+except ImportError:
+    from storage import open_row_sink, temp_path
+
+def write_json_atomic(path: str, data: Dict):
+    """Replace a JSON file atomically so readers never see a half-written file"""
+    path = str(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def run_streaming_pipeline(records: Iterable[Dict], evaluator, questions_df: pd.DataFrame,
+                           raw_csv: Optional[str] = None, graded_csv: Optional[str] = None,
+                           metrics_json: Optional[str] = None, metrics_every: int = 1,
+                           on_update: Optional[Callable[[Dict, object], None]] = None,
+                           warehouse=None, run_id: Optional[str] = None) -> Dict:
+    """Grade runner rows as they arrive and keep sinks and running metrics current
+    
+    records is usually APIRunner.iter_experiment(...). Raw and graded rows go
+    to a row sink per file as they arrive: CSV rows are readable at once, while
+    Parquet and Arrow rows are written in row groups and the file appears when
+    the run finishes. Partial metrics are rewritten to metrics_json every
+    metrics_every rows with "status": "running", then replaced by the final
+    metrics (with bootstrap CIs computed from the packed grade flags). With a warehouse and
+    a run_id from warehouse.start_run, each graded row is also stored there
+    and the run is closed with the final metrics (or marked failed).
+    on_update(graded_row, accumulator) runs after each row; accumulator.metrics()
+    includes Wilson intervals for the running rates.
+    """
+    accumulator = evaluator.new_accumulator()
+    raw_sink = open_row_sink(raw_csv) if raw_csv else None
+    graded_sink = open_row_sink(graded_csv) if graded_csv else None
+    
+    def tee_raw(rows):
+        for row in rows:
+            if raw_sink:
+                raw_sink.write(row)
+            yield row
+    
+    try:
+        for graded in evaluator.grade_stream(tee_raw(records), questions_df):
+            if graded_sink:
+                graded_sink.write(graded)
+            if warehouse is not None:
+                warehouse.record_rows(run_id, [graded])
+            accumulator.update(graded)
+            
+            if metrics_json and accumulator.total % max(metrics_every, 1) == 0:
+                write_json_atomic(metrics_json, {**accumulator.metrics(), "status": "running"})
+            if on_update:
+                on_update(graded, accumulator)
+    except BaseException:
+        if warehouse is not None:
+            warehouse.finish_run(run_id, status="failed")
+        raise
+    finally:
+        if raw_sink:
+            raw_sink.close()
+        if graded_sink:
+            graded_sink.close()
+    
+    metrics = evaluator.calculate_metrics(accumulator.flags_frame())
+    if metrics_json and metrics:
+        write_json_atomic(metrics_json, metrics)
+    if warehouse is not None:
+        warehouse.finish_run(run_id, metrics)
+    return metrics
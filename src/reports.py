@@ -0,0 +1,440 @@
+"""
+Report rendering for Hallucination Detection experiments
+Word reports are rendered from a prebuilt template with bulk-filled tables
+"""
+
+import copy
+import hashlib
+import html
+import json
+import math
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    from src.manifest import entry_path, result_sets
+    from src.storage import read_results
+except ImportError:
+    from manifest import entry_path, result_sets
+    from storage import read_results
+
+# Placeholder syntax used inside report templates: {{name}}
+PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+# Characters that are not allowed in WordprocessingML text
+_INVALID_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Marker paragraph replaced by the sample responses section
+SAMPLE_RESPONSES_MARKER = "{{sample_responses}}"
+
+# Number of questions shown in the sample responses section
+SAMPLE_RESPONSE_COUNT = 5
+
+APPENDIX_HEADERS = ["#", "Question", "Gold Answer", "Direct", "Self-Critique"]
+
+# Questions per page in the per-question section of HTML/Markdown reports
+DEFAULT_PAGE_SIZE = 50
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Render bookkeeping for batch report generation, kept next to the provider folders
+REPORT_STATE_FILE = ".report_state.json"
+
+# Single background worker keeps report rendering off the inference/metrics path
+_report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+
+def _clean(value) -> str:
+    """Text safe for a Word XML text node"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return _INVALID_XML_RE.sub("", str(value))
+
+def _verdict(correct, uncertain) -> str:
+    """Compact per-answer grade: ✓ correct, ? uncertain, ✗ hallucination"""
+    if bool(correct):
+        return "✓"
+    if bool(uncertain):
+        return "?"
+    return "✗"
+
+def report_values(metrics: Dict) -> Dict[str, str]:
+    """Formatted placeholder values shared by every report format"""
+    direct, selfcrit = metrics["direct"], metrics["selfcrit"]
+    return {
+        "total_questions": str(metrics["total_questions"]),
+        "direct_correct_rate": f"{direct['correct_rate']:.1%}",
+        "direct_uncertainty_rate": f"{direct['uncertainty_rate']:.1%}",
+        "direct_hallucination_rate": f"{direct['hallucination_rate']:.1%}",
+        "selfcrit_correct_rate": f"{selfcrit['correct_rate']:.1%}",
+        "selfcrit_uncertainty_rate": f"{selfcrit['uncertainty_rate']:.1%}",
+        "selfcrit_hallucination_rate": f"{selfcrit['hallucination_rate']:.1%}",
+        "hallucination_delta": f"{metrics['improvement']['hallucination_delta']:.1%}",
+    }
+
+def build_default_template() -> bytes:
+    """Build the default report template (headings, styles, placeholder tables)"""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading("Hallucination Detection Experiment Report", 0)
+
+    # Executive Summary
+    doc.add_heading("Executive Summary", level=1)
+    for line in [
+        "Total Questions: {{total_questions}}",
+        "Direct Correct Rate: {{direct_correct_rate}}",
+        "Self-Critique Correct Rate: {{selfcrit_correct_rate}}",
+        "Direct Hallucination Rate: {{direct_hallucination_rate}}",
+        "Self-Critique Hallucination Rate: {{selfcrit_hallucination_rate}}",
+        "Hallucination Reduction: {{hallucination_delta}}",
+    ]:
+        doc.add_paragraph(f"• {line}")
+
+    # Detailed Metrics
+    doc.add_heading("Detailed Metrics", level=1)
+    rows = [
+        ["Metric", "Direct Prompt", "Self-Critique"],
+        ["Correct Rate", "{{direct_correct_rate}}", "{{selfcrit_correct_rate}}"],
+        ["Uncertainty Rate", "{{direct_uncertainty_rate}}", "{{selfcrit_uncertainty_rate}}"],
+        ["Hallucination Rate", "{{direct_hallucination_rate}}", "{{selfcrit_hallucination_rate}}"],
+    ]
+    table = doc.add_table(rows=len(rows), cols=3)
+    table.style = "Table Grid"
+    for r, row in enumerate(rows):
+        for c, text in enumerate(row):
+            table.cell(r, c).text = text
+
+    # Sample Responses
+    doc.add_heading("Sample Responses", level=1)
+    doc.add_paragraph(SAMPLE_RESPONSES_MARKER)
+
+    # Per-question appendix: header row plus one prototype row cloned per question
+    doc.add_heading("Appendix: Per-Question Results", level=1)
+    doc.add_paragraph("✓ correct, ? uncertain, ✗ hallucination (confident but wrong)")
+    appendix = doc.add_table(rows=2, cols=len(APPENDIX_HEADERS))
+    appendix.style = "Table Grid"
+    for c, header in enumerate(APPENDIX_HEADERS):
+        appendix.cell(0, c).text = header
+        appendix.cell(1, c).text = f"{{{{col{c}}}}}"
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+@lru_cache(maxsize=8)
+def _template_bytes(template_path: Optional[str]) -> bytes:
+    """Template bytes, built or read once per process"""
+    if template_path is None:
+        return build_default_template()
+    with open(template_path, "rb") as f:
+        return f.read()
+
+def _replace_placeholders(root, values: Dict[str, str]):
+    """Substitute {{name}} in every text node below an XML element"""
+    from docx.oxml.ns import qn
+
+    for node in root.iter(qn("w:t")):
+        if node.text and "{{" in node.text:
+            node.text = PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), node.text)
+
+def _fill_sample_responses(doc, graded_df: pd.DataFrame):
+    """Replace the marker paragraph with the first few graded questions"""
+    marker = next((p for p in doc.paragraphs if p.text == SAMPLE_RESPONSES_MARKER), None)
+    if marker is None:
+        return
+
+    for i in range(min(SAMPLE_RESPONSE_COUNT, len(graded_df))):
+        row = graded_df.iloc[i]
+        selfcrit_final = row.get("selfcrit_final_span", row["selfcrit_answer"])
+        marker.insert_paragraph_before(f"Question {i+1}", style="Heading 2")
+        marker.insert_paragraph_before(_clean(f"Q: {row['question']}"))
+        marker.insert_paragraph_before(_clean(f"Gold Answer: {row['gold_answer']}"))
+        marker.insert_paragraph_before(_clean(f"Direct: {row['direct_answer']} ({'✓' if row['direct_correct'] else '✗'})"))
+        marker.insert_paragraph_before(_clean(f"Self-Critique: {selfcrit_final} ({'✓' if row['selfcrit_correct'] else '✗'})"))
+
+    marker._element.getparent().remove(marker._element)
+
+def _fill_appendix(doc, graded_df: pd.DataFrame):
+    """Clone the prototype row once per question, writing text nodes directly"""
+    from docx.oxml.ns import qn
+
+    table = next((t for t in doc.tables if len(t.rows) == 2 and t.cell(1, 0).text == "{{col0}}"), None)
+    if table is None:
+        return
+
+    tbl = table._tbl
+    prototype = tbl.tr_lst[1]
+
+    columns = [
+        graded_df["idx"].tolist() if "idx" in graded_df.columns else list(range(1, len(graded_df) + 1)),
+        graded_df["question"].tolist(),
+        graded_df["gold_answer"].tolist(),
+        [_verdict(c, u) for c, u in zip(graded_df["direct_correct"], graded_df["direct_uncertain"])],
+        [_verdict(c, u) for c, u in zip(graded_df["selfcrit_correct"], graded_df["selfcrit_uncertain"])],
+    ]
+
+    for values in zip(*columns):
+        tr = copy.deepcopy(prototype)
+        for node, value in zip(tr.iter(qn("w:t")), values):
+            node.text = _clean(value)
+        tbl.append(tr)
+
+    tbl.remove(prototype)
+
+def render_word_report(graded_df: pd.DataFrame, metrics: Dict, output_path: str,
+                       template_path: Optional[str] = None, include_appendix: bool = True) -> str:
+    """Render a Word report from the template
+
+    A custom template_path must use the same {{placeholders}}, sample
+    responses marker paragraph and appendix prototype row as the default.
+    """
+    from docx import Document
+
+    doc = Document(BytesIO(_template_bytes(template_path)))
+
+    _replace_placeholders(doc.element.body, report_values(metrics))
+    _fill_sample_responses(doc, graded_df)
+    if include_appendix:
+        _fill_appendix(doc, graded_df)
+
+    doc.save(output_path)
+    return output_path
+
+def word_report_bytes(graded_df: pd.DataFrame, metrics: Dict, **kwargs) -> bytes:
+    """Render a Word report in memory (for download buttons)"""
+    buffer = BytesIO()
+    render_word_report(graded_df, metrics, buffer, **kwargs)
+    return buffer.getvalue()
+
+def page_count(n_rows: int, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """Number of pages in the per-question section"""
+    return max(1, math.ceil(n_rows / page_size))
+
+def _summary_lines(values: Dict[str, str]) -> List[str]:
+    """Executive summary lines, same wording as the Word report"""
+    return [
+        f"Total Questions: {values['total_questions']}",
+        f"Direct Correct Rate: {values['direct_correct_rate']}",
+        f"Self-Critique Correct Rate: {values['selfcrit_correct_rate']}",
+        f"Direct Hallucination Rate: {values['direct_hallucination_rate']}",
+        f"Self-Critique Hallucination Rate: {values['selfcrit_hallucination_rate']}",
+        f"Hallucination Reduction: {values['hallucination_delta']}",
+    ]
+
+def _metrics_rows(values: Dict[str, str]) -> List[List[str]]:
+    """Detailed metrics table rows (header first)"""
+    return [
+        ["Metric", "Direct Prompt", "Self-Critique"],
+        ["Correct Rate", values["direct_correct_rate"], values["selfcrit_correct_rate"]],
+        ["Uncertainty Rate", values["direct_uncertainty_rate"], values["selfcrit_uncertainty_rate"]],
+        ["Hallucination Rate", values["direct_hallucination_rate"], values["selfcrit_hallucination_rate"]],
+    ]
+
+def _question_rows(graded_df: pd.DataFrame, page: int, page_size: int) -> List[List[str]]:
+    """Per-question rows for one page (1-based)"""
+    start = (page - 1) * page_size
+    chunk = graded_df.iloc[start:start + page_size]
+    numbers = chunk["idx"].tolist() if "idx" in chunk.columns else range(start + 1, start + len(chunk) + 1)
+    return [
+        [_clean(n), _clean(q), _clean(g), _verdict(dc, du), _verdict(sc, su)]
+        for n, q, g, dc, du, sc, su in zip(
+            numbers, chunk["question"], chunk["gold_answer"],
+            chunk["direct_correct"], chunk["direct_uncertain"],
+            chunk["selfcrit_correct"], chunk["selfcrit_uncertain"],
+        )
+    ]
+
+def _md_cell(text: str) -> str:
+    """Markdown table cell: single line, pipes escaped"""
+    return " ".join(text.split()).replace("|", "\\|")
+
+def _md_table(rows: List[List[str]]) -> List[str]:
+    """Markdown table lines, first row is the header"""
+    lines = ["| " + " | ".join(_md_cell(c) for c in rows[0]) + " |",
+             "|" + "---|" * len(rows[0])]
+    lines.extend("| " + " | ".join(_md_cell(c) for c in row) + " |" for row in rows[1:])
+    return lines
+
+def render_markdown_report(graded_df: pd.DataFrame, metrics: Dict,
+                           page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> str:
+    """Render a Markdown report; the per-question section shows one page"""
+    values = report_values(metrics)
+    pages = page_count(len(graded_df), page_size)
+    page = min(max(1, page), pages)
+
+    lines = ["# Hallucination Detection Experiment Report", "", "## Executive Summary", ""]
+    lines.extend(f"- {line}" for line in _summary_lines(values))
+    lines += ["", "## Detailed Metrics", ""]
+    lines.extend(_md_table(_metrics_rows(values)))
+    lines += ["", f"## Per-Question Results (page {page}/{pages})", "",
+              "✓ correct, ? uncertain, ✗ hallucination (confident but wrong)", ""]
+    lines.extend(_md_table([APPENDIX_HEADERS] + _question_rows(graded_df, page, page_size)))
+    return "\n".join(lines) + "\n"
+
+def _html_table(rows: List[List[str]]) -> str:
+    """HTML table, first row is the header"""
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in rows[0])
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>"
+        for row in rows[1:]
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+def render_html_report(graded_df: pd.DataFrame, metrics: Dict,
+                       page: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE) -> str:
+    """Render a standalone HTML report
+
+    With page=None every page of the per-question section is included,
+    each in its own collapsible block; otherwise only the given page.
+    """
+    values = report_values(metrics)
+    pages = page_count(len(graded_df), page_size)
+    selected = range(1, pages + 1) if page is None else [min(max(1, page), pages)]
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        "<title>Hallucination Detection Experiment Report</title>",
+        "<style>body{font-family:sans-serif;max-width:1100px;margin:auto}"
+        "table{border-collapse:collapse;width:100%}th,td{border:1px solid #999;padding:4px;text-align:left}</style>",
+        "</head><body>",
+        "<h1>Hallucination Detection Experiment Report</h1>",
+        "<h2>Executive Summary</h2><ul>",
+        "".join(f"<li>{html.escape(line)}</li>" for line in _summary_lines(values)),
+        "</ul><h2>Detailed Metrics</h2>",
+        _html_table(_metrics_rows(values)),
+        "<h2>Per-Question Results</h2>",
+        "<p>✓ correct, ? uncertain, ✗ hallucination (confident but wrong)</p>",
+    ]
+    for p in selected:
+        parts.append(f"<details{' open' if p == selected[0] else ''}><summary>Page {p}/{pages}</summary>")
+        parts.append(_html_table([APPENDIX_HEADERS] + _question_rows(graded_df, p, page_size)))
+        parts.append("</details>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+def _render_from_files(graded_path: str, metrics: Dict, output_path: str, **kwargs) -> str:
+    """Background job body: load the graded results and render them"""
+    graded_df = read_results(graded_path)
+    return render_word_report(graded_df, metrics, output_path, **kwargs)
+
+def submit_word_report(graded_path: str, metrics: Dict, output_path: str, **kwargs) -> Future:
+    """Queue a Word report for background rendering and return its Future"""
+    return _report_executor.submit(_render_from_files, str(graded_path), metrics, str(output_path), **kwargs)
+
+def _file_signature(path: str, previous: Optional[Dict] = None) -> Dict:
+    """mtime/size/sha256 of a file; the hash is reused while mtime and size are unchanged"""
+    stat = os.stat(path)
+    signature = {"mtime": stat.st_mtime, "size": stat.st_size}
+    if previous and previous.get("mtime") == signature["mtime"] and previous.get("size") == signature["size"]:
+        signature["sha256"] = previous.get("sha256")
+        return signature
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    signature["sha256"] = digest.hexdigest()
+    return signature
+
+def discover_result_sets(results_dir: str) -> List[Dict]:
+    """Every provider x dataset in the results manifest with graded results and metrics"""
+    discovered = []
+    for entry in result_sets(results_dir):
+        if "metrics" not in entry or "graded" not in entry:
+            continue
+        graded_path = entry_path(results_dir, entry, "graded")
+        provider_dir = os.path.dirname(graded_path)
+        discovered.append({
+            "provider": entry["provider"],
+            "dataset": entry["dataset"],
+            "graded_path": graded_path,
+            "metrics_json": entry_path(results_dir, entry, "metrics"),
+            "docx": os.path.join(provider_dir, f"report_{entry['dataset']}.docx"),
+            "html": os.path.join(provider_dir, f"report_{entry['dataset']}.html"),
+        })
+    return discovered
+
+def _render_result_set(result_set: Dict) -> Dict:
+    """Process-pool job: render the Word and HTML reports of one result set"""
+    graded_df = read_results(result_set["graded_path"])
+    with open(result_set["metrics_json"], "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+    render_word_report(graded_df, metrics, result_set["docx"])
+    with open(result_set["html"], "w", encoding="utf-8") as f:
+        f.write(render_html_report(graded_df, metrics))
+    return result_set
+
+def generate_all_reports(results_dir: str = "data/results", n_jobs: Optional[int] = None,
+                         force: bool = False) -> Dict[str, List[str]]:
+    """Render reports for every result set under results_dir in a process pool
+
+    Sets whose graded CSV and metrics content are unchanged since the last
+    render (and whose reports still exist) are skipped unless force=True.
+    """
+    try:
+        from src.pipeline import write_json_atomic
+    except ImportError:
+        from pipeline import write_json_atomic
+
+    state_path = os.path.join(results_dir, REPORT_STATE_FILE)
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    pending, skipped, signatures = [], [], {}
+    for result_set in discover_result_sets(results_dir):
+        key = os.path.relpath(result_set["graded_path"], results_dir)
+        previous = state.get(key, {})
+        signature = {
+            "graded": _file_signature(result_set["graded_path"], previous.get("graded")),
+            "metrics": _file_signature(result_set["metrics_json"], previous.get("metrics")),
+        }
+        signatures[key] = signature
+        unchanged = all(
+            previous.get(name, {}).get("sha256") == signature[name]["sha256"]
+            for name in ("graded", "metrics")
+        )
+        if unchanged and not force and os.path.exists(result_set["docx"]) and os.path.exists(result_set["html"]):
+            skipped.append(key)
+            state[key] = signature
+        else:
+            pending.append((key, result_set))
+
+    rendered, failed = [], []
+    if pending:
+        max_workers = min(n_jobs or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(_render_result_set, result_set) for key, result_set in pending}
+            for key, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Report failed for {key}: {e}")
+                    failed.append(key)
+                    continue
+                state[key] = signatures[key]
+                rendered.append(key)
+
+    write_json_atomic(state_path, state)
+    return {"rendered": rendered, "skipped": skipped, "failed": failed}
+
+def main():
+    """Regenerate reports for every provider x dataset result set"""
+    results_dir = os.getenv("RESULTS_DIR", "data/results")
+    # 0 = use all cores
+    n_jobs = int(os.getenv("REPORT_JOBS", "0")) or None
+    force = os.getenv("FORCE_REPORTS", "0") == "1"
+
+    summary = generate_all_reports(results_dir, n_jobs=n_jobs, force=force)
+    print(f"Reports rendered: {len(summary['rendered'])}, "
+          f"unchanged: {len(summary['skipped'])}, failed: {len(summary['failed'])}")
+
+if __name__ == "__main__":
+    main()
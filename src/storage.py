@@ -0,0 +1,400 @@
+"""
+Result storage for Hallucination Detection experiments
+Raw and graded results are stored as CSV, Parquet or Arrow IPC; readers support column projection
+"""
+
+import csv
+import json
+import os
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+STORAGE_FORMATS = ("csv", "parquet", "arrow")
+DEFAULT_STORAGE_FORMAT = "csv"
+DEFAULT_COMPRESSION = "zstd"
+
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Rows ParquetRowSink buffers before writing them out as one row group
+SINK_BATCH_ROWS = 500
+
+# Memory-mappable Arrow snapshots of result sets for the dashboard
+ARROW_CACHE_DIR = ".arrow_cache"
+
+# Explicit column types; columns not listed here are stored as strings
+INT_COLUMNS = (
+    "idx",
+    "selfcrit_draft_start", "selfcrit_draft_end",
+    "selfcrit_critique_start", "selfcrit_critique_end",
+    "selfcrit_final_start", "selfcrit_final_end",
+)
+DICTIONARY_COLUMNS = ("api", "provider", "model", "dataset", "direct_prompt_template", "selfcrit_prompt_template")
+BOOL_COLUMNS = (
+    "direct_correct", "direct_uncertain", "direct_hallucination",
+    "selfcrit_correct", "selfcrit_uncertain", "selfcrit_hallucination",
+    "selfcrit_revised",
+)
+FLOAT_COLUMNS = ("direct_similarity", "selfcrit_similarity")
+
+# Columns needed by views that only look at grades (no answer text)
+GRADE_COLUMNS = ["idx", "api", "model", *BOOL_COLUMNS]
+
+# Full prompts are a template filled with the question; in memory only the
+# template is kept, as a categorical whose codes are the template ids
+PROMPT_COLUMNS = ("direct_prompt", "selfcrit_prompt")
+TEMPLATE_SUFFIX = "_template"
+QUESTION_PLACEHOLDER = "{q}"
+
+def _config_path() -> str:
+    """configs/config.json of the project, falling back to the example template"""
+    configs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs")
+    config_file = os.path.join(configs_dir, "config.json")
+    if os.path.exists(config_file):
+        return config_file
+    return os.path.join(configs_dir, "config.example.json")
+
+def get_storage_config() -> Dict:
+    """Storage settings from the "storage" config section, overridable by RESULTS_FORMAT"""
+    storage = {"results_format": DEFAULT_STORAGE_FORMAT, "compression": DEFAULT_COMPRESSION, "warehouse": True}
+    try:
+        with open(_config_path(), "r", encoding="utf-8") as f:
+            storage.update(json.load(f).get("storage", {}))
+    except (OSError, ValueError):
+        pass
+
+    storage["results_format"] = os.getenv("RESULTS_FORMAT", storage["results_format"]).lower()
+    if storage["results_format"] not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown results format: {storage['results_format']} (expected one of {STORAGE_FORMATS})")
+    return storage
+
+def results_path(directory: str, kind: str, dataset: str, results_format: Optional[str] = None) -> str:
+    """Path of results_<kind>_<dataset> in the configured (or given) format"""
+    results_format = results_format or get_storage_config()["results_format"]
+    return os.path.join(str(directory), f"results_{kind}_{dataset}{FORMAT_EXTENSIONS[results_format]}")
+
+def results_schema(columns: Iterable[str]):
+    """Arrow schema for a results table with the given columns"""
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if column in INT_COLUMNS:
+            field_type = pa.int32()
+        elif column in DICTIONARY_COLUMNS:
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        elif column in BOOL_COLUMNS:
+            field_type = pa.bool_()
+        elif column in FLOAT_COLUMNS:
+            field_type = pa.float32()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(column, field_type))
+    return pa.schema(fields)
+
+def _text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce untyped columns to strings (missing values stay null) so the schema holds"""
+    typed = set(INT_COLUMNS) | set(BOOL_COLUMNS) | set(FLOAT_COLUMNS)
+    df = df.copy()
+    for column in df.columns:
+        if column not in typed:
+            df[column] = df[column].map(lambda v: None if pd.isna(v) else str(v), na_action="ignore")
+    return df
+
+def _as_flag(value):
+    """Grade flag from a bool, 0/1 or "True"/"False" cell; missing stays NA"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return pd.NA
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value)
+
+def _intern_prompts(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace full prompt columns by categorical template columns where lossless"""
+    if "question" not in df.columns:
+        return df
+    for column in PROMPT_COLUMNS:
+        if column not in df.columns:
+            continue
+        templates = []
+        for prompt, question in zip(df[column].tolist(), df["question"].tolist()):
+            if not isinstance(prompt, str):
+                templates.append(None)
+                continue
+            template = prompt.replace(question, QUESTION_PLACEHOLDER, 1) if isinstance(question, str) and question else prompt
+            if template.replace(QUESTION_PLACEHOLDER, question if isinstance(question, str) else "", 1) != prompt \
+                    or QUESTION_PLACEHOLDER not in template:
+                # Not template + question: keep the column as text
+                break
+            templates.append(template)
+        else:
+            position = df.columns.get_loc(column)
+            df = df.drop(columns=[column])
+            df.insert(position, column + TEMPLATE_SUFFIX, pd.Categorical(templates))
+    return df
+
+def expand_prompts(df: pd.DataFrame) -> pd.DataFrame:
+    """Restore full prompt columns from their template columns (files keep full text)"""
+    for column in PROMPT_COLUMNS:
+        template_column = column + TEMPLATE_SUFFIX
+        if template_column not in df.columns:
+            continue
+        prompts = [
+            template.replace(QUESTION_PLACEHOLDER, question if isinstance(question, str) else "", 1)
+            if isinstance(template, str) else None
+            for template, question in zip(df[template_column].tolist(), df["question"].tolist())
+        ]
+        position = df.columns.get_loc(template_column)
+        df = df.drop(columns=[template_column])
+        df.insert(position, column, prompts)
+    return df
+
+def prompt_text(row, column: str) -> Optional[str]:
+    """Full prompt of one result row, whether stored as text or as a template"""
+    prompt = row.get(column)
+    if isinstance(prompt, str):
+        return prompt
+    template = row.get(column + TEMPLATE_SUFFIX)
+    if isinstance(template, str):
+        question = row.get("question")
+        return template.replace(QUESTION_PLACEHOLDER, question if isinstance(question, str) else "", 1)
+    return None
+
+def compact_results(df: pd.DataFrame) -> pd.DataFrame:
+    """Enforce the in-memory results schema
+
+    Low-cardinality text becomes categorical, grade flags nullable booleans,
+    idx a 32-bit int, similarities float32 and prompts interned templates.
+    """
+    df = _intern_prompts(df)
+    for column in df.columns:
+        if column in INT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int32")
+        elif column in DICTIONARY_COLUMNS:
+            df[column] = df[column].astype("category")
+        elif column in BOOL_COLUMNS:
+            if df[column].dtype == bool:
+                df[column] = df[column].astype("boolean")
+            else:
+                df[column] = df[column].map(_as_flag).astype("boolean")
+        elif column in FLOAT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float32")
+    return df
+
+def temp_path(path: str) -> str:
+    """Scratch name next to path, unique per writer (process and thread) for an atomic os.replace"""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+def write_results(df: pd.DataFrame, path: str, compression: Optional[str] = None):
+    """Write a results table; the format follows the file extension
+
+    CSV and Parquet files hold full prompt text for other tools; Arrow files
+    keep the in-memory (template) layout so they can be mapped as is.
+    """
+    path = str(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if not path.endswith(FORMAT_EXTENSIONS["arrow"]):
+        df = expand_prompts(df)
+
+    if not path.endswith((FORMAT_EXTENSIONS["parquet"], FORMAT_EXTENSIONS["arrow"])):
+        df.to_csv(path, index=False, encoding="utf-8")
+        return
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(_text_columns(df), schema=results_schema(df.columns), preserve_index=False)
+    tmp_path = temp_path(path)
+    try:
+        if path.endswith(FORMAT_EXTENSIONS["arrow"]):
+            _write_ipc(table, tmp_path)
+        else:
+            import pyarrow.parquet as pq
+
+            dictionary_columns = [c for c in df.columns if c in DICTIONARY_COLUMNS]
+            pq.write_table(table, tmp_path,
+                           compression=compression or get_storage_config()["compression"],
+                           use_dictionary=dictionary_columns or False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _write_ipc(table, path: str):
+    """Write an Arrow IPC file, uncompressed so readers can map the buffers instead of decoding them"""
+    import pyarrow as pa
+
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def read_results(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a results table in the compact schema, loading only the requested columns that exist"""
+    path = str(path)
+
+    if path.endswith(FORMAT_EXTENSIONS["arrow"]):
+        return _read_mapped(path, columns)
+
+    if path.endswith(FORMAT_EXTENSIONS["parquet"]):
+        import pyarrow.parquet as pq
+
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        return compact_results(pq.read_table(path, columns=columns).to_pandas())
+
+    if columns is not None:
+        wanted = set(columns)
+        return compact_results(pd.read_csv(path, usecols=lambda c: c in wanted))
+    return compact_results(pd.read_csv(path))
+
+def _read_mapped(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Memory-map an Arrow IPC file into a frame backed by the mapped buffers
+
+    Columns use pandas' Arrow dtypes, so no private copy is made: every session
+    and rerun reading the same file shares the OS page cache.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if columns is not None:
+        # Prompts are stored as templates and need the question to be expanded
+        columns = list(columns) + [extra for c in PROMPT_COLUMNS if c in columns
+                                   for extra in (c + TEMPLATE_SUFFIX, "question") if extra not in columns]
+        table = table.select([c for c in columns if c in table.column_names])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def mapped_results(cache_path: str, build: Callable[[], pd.DataFrame],
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Memory-mapped results from an Arrow snapshot, writing it with build() if missing
+
+    Snapshots hold every column and must be keyed by content (a hash or a
+    finished run id), so a stale one is never read.
+    """
+    if not os.path.exists(cache_path):
+        write_results(build(), cache_path)
+    return _read_mapped(cache_path, columns)
+
+def prune_arrow_cache(cache_dir: str, keep: Iterable[str]):
+    """Delete snapshots that are no longer referenced"""
+    keep = {os.path.abspath(path) for path in keep}
+    for root, _, filenames in os.walk(str(cache_dir)):
+        for filename in filenames:
+            path = os.path.abspath(os.path.join(root, filename))
+            if path not in keep and filename.endswith(FORMAT_EXTENSIONS["arrow"]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Still mapped by a reader on a platform that forbids removal
+                    pass
+
+class CsvRowSink:
+    """Append rows to a CSV file as they arrive (header taken from the first row)"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row: Dict):
+        """Write and flush one row"""
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row.keys()), extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+        self.rows_written += 1
+
+    def close(self):
+        """Close the underlying file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class ParquetRowSink:
+    """Write rows to a Parquet (or Arrow IPC) file in row groups of batch_rows
+
+    Both are only readable once their footer is written, so unlike CsvRowSink
+    the file appears (atomically) when the run finishes. Arrow output is
+    spooled as Parquet and converted on close, since an IPC file cannot change
+    its dictionaries from one batch to the next.
+    """
+
+    def __init__(self, path: str, batch_rows: int = SINK_BATCH_ROWS):
+        self.path = str(path)
+        self.batch_rows = batch_rows
+        self.rows_written = 0
+        self._rows = []
+        self._schema = None
+        self._writer = None
+        self._tmp_path = temp_path(self.path)
+
+    def write(self, row: Dict):
+        """Buffer one row, writing a row group once batch_rows are buffered"""
+        self._rows.append(row)
+        self.rows_written += 1
+        if len(self._rows) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = pd.DataFrame(self._rows)
+        if self._writer is None:
+            # Columns are fixed by the first batch, like CsvRowSink's header
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._schema = results_schema(df.columns)
+            dictionary_columns = [c for c in df.columns if c in DICTIONARY_COLUMNS]
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema,
+                                            compression=get_storage_config()["compression"],
+                                            use_dictionary=dictionary_columns or False)
+        df = df.reindex(columns=self._schema.names)
+        self._writer.write_table(pa.Table.from_pandas(_text_columns(df), schema=self._schema, preserve_index=False))
+        self._rows = []
+
+    def close(self):
+        """Write the remaining rows and move the finished file into place"""
+        if self._rows:
+            self._flush()
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        try:
+            if self.path.endswith(FORMAT_EXTENSIONS["arrow"]):
+                import pyarrow.parquet as pq
+
+                arrow_path = temp_path(self.path)
+                try:
+                    _write_ipc(pq.read_table(self._tmp_path).unify_dictionaries().combine_chunks(), arrow_path)
+                    os.replace(arrow_path, self.path)
+                finally:
+                    if os.path.exists(arrow_path):
+                        os.remove(arrow_path)
+            else:
+                os.replace(self._tmp_path, self.path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_row_sink(path: str):
+    """Row sink for a results file; the format follows the file extension"""
+    if str(path).endswith((FORMAT_EXTENSIONS["parquet"], FORMAT_EXTENSIONS["arrow"])):
+        return ParquetRowSink(path)
+    return CsvRowSink(path)
@@ -0,0 +1,516 @@
+"""
+SQLite results warehouse for Hallucination Detection experiments
+Runs, questions, responses and grades from every provider/model/dataset in one indexed store
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    from src.blobstore import BlobStore
+    from src.evaluator import SEGMENT_COLUMNS
+    from src.manifest import LazyResult, entry_path, load_entry_metrics, new_run_id, result_sets
+    from src.storage import FORMAT_EXTENSIONS, compact_results, expand_prompts, mapped_results, read_results
+except ImportError:
+    from blobstore import BlobStore
+    from evaluator import SEGMENT_COLUMNS
+    from manifest import LazyResult, entry_path, load_entry_metrics, new_run_id, result_sets
+    from storage import FORMAT_EXTENSIONS, compact_results, expand_prompts, mapped_results, read_results
+
+WAREHOUSE_FILE = "results.db"
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "results")
+
+GRADE_FLAGS = (
+    "direct_correct", "direct_uncertain", "direct_hallucination",
+    "selfcrit_correct", "selfcrit_uncertain", "selfcrit_hallucination",
+)
+# Self-critique segment offsets and the revised flag, stored with the grades so
+# readers never re-segment answers
+GRADE_DETAILS = (*SEGMENT_COLUMNS, "selfcrit_revised")
+GRADE_COLUMNS = (*GRADE_FLAGS, *GRADE_DETAILS)
+RESPONSE_TEXT = ("direct_answer", "selfcrit_answer", "selfcrit_final_span", "direct_prompt", "selfcrit_prompt")
+QUESTION_TEXT = ("question", "gold_answer")
+
+# Response texts live in the blob store; responses hold "<column>_ref" hashes
+REF_SUFFIX = "_ref"
+TEXT_REF_COLUMNS = tuple(c + REF_SUFFIX for c in RESPONSE_TEXT)
+SCHEMA_VERSION = 1
+
+RESPONSES_TABLE = """
+CREATE TABLE IF NOT EXISTS responses (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL,
+    direct_answer_ref TEXT,
+    selfcrit_answer_ref TEXT,
+    selfcrit_final_span_ref TEXT,
+    direct_prompt_ref TEXT,
+    selfcrit_prompt_ref TEXT,
+    PRIMARY KEY (run_id, question_id)
+)"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT,
+    dataset TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    source TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    n_questions INTEGER,
+    direct_hallucination_rate REAL,
+    selfcrit_hallucination_rate REAL,
+    metrics_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_provider_model_dataset ON runs(provider, model, dataset, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs(dataset, started_at);
+
+CREATE TABLE IF NOT EXISTS questions (
+    dataset TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    question TEXT,
+    gold_answer TEXT,
+    PRIMARY KEY (dataset, question_id)
+);
+
+%s
+
+CREATE TABLE IF NOT EXISTS grades (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL,
+    direct_correct INTEGER,
+    direct_uncertain INTEGER,
+    direct_hallucination INTEGER,
+    selfcrit_correct INTEGER,
+    selfcrit_uncertain INTEGER,
+    selfcrit_hallucination INTEGER,
+%s,
+    selfcrit_revised INTEGER,
+    PRIMARY KEY (run_id, question_id)
+);
+CREATE INDEX IF NOT EXISTS idx_grades_question ON grades(question_id, run_id);
+""" % (RESPONSES_TABLE.strip() + ";", ",\n".join(f"    {column} INTEGER" for column in SEGMENT_COLUMNS))
+
+def _now() -> str:
+    """UTC timestamp that sorts lexicographically"""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+def _text(value) -> Optional[str]:
+    """Text column value, keeping missing values as NULL"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return str(value)
+
+def _flag(value) -> Optional[int]:
+    """Grade flag as 0/1, keeping missing values as NULL"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        return int(value.strip().lower() == "true")
+    return int(bool(value))
+
+def _int(value) -> Optional[int]:
+    """Integer column value, keeping missing values as NULL"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return int(value)
+
+def warehouse_enabled() -> bool:
+    """The warehouse is on unless RESULTS_WAREHOUSE=0 or the storage config disables it"""
+    if os.getenv("RESULTS_WAREHOUSE") is not None:
+        return os.getenv("RESULTS_WAREHOUSE") != "0"
+    try:
+        from src.storage import get_storage_config
+    except ImportError:
+        from storage import get_storage_config
+    return bool(get_storage_config().get("warehouse", True))
+
+def open_warehouse(results_dir: Optional[str] = None) -> Optional["ResultsWarehouse"]:
+    """Warehouse stored next to the provider folders, or None when disabled"""
+    if not warehouse_enabled():
+        return None
+    return ResultsWarehouse(os.path.join(str(results_dir or DEFAULT_RESULTS_DIR), WAREHOUSE_FILE))
+
+class ResultsWarehouse:
+    """Single-file SQLite store for experiment runs and their per-question results"""
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.blobs = BlobStore(self.conn)
+        self._migrate_response_text()
+        self.conn.executescript(SCHEMA)
+        self._add_grade_details()
+
+    def _migrate_response_text(self):
+        """Move inline response texts of a version 0 warehouse into the blob store"""
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(responses)")}
+        # Explicit statements in one transaction (executescript would commit midway),
+        # so a failed migration leaves the version 0 table untouched
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if "direct_answer" in columns:
+                self.conn.execute("ALTER TABLE responses RENAME TO responses_v0")
+                self.conn.execute(RESPONSES_TABLE)
+                old = self.conn.execute(f"SELECT run_id, question_id, {', '.join(RESPONSE_TEXT)} FROM responses_v0").fetchall()
+                refs = [self.blobs.put_many(row[2:]) for row in old]
+                self.conn.executemany(
+                    f"INSERT INTO responses (run_id, question_id, {', '.join(c + REF_SUFFIX for c in RESPONSE_TEXT)}) "
+                    f"VALUES (?, ?, {', '.join('?' * len(RESPONSE_TEXT))})",
+                    [(row[0], row[1], *row_refs) for row, row_refs in zip(old, refs)],
+                )
+                self.conn.execute("DROP TABLE responses_v0")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def _add_grade_details(self):
+        """Add the segment offset and revised columns to a grades table created before them"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(grades)")}
+        with self.conn:
+            for column in GRADE_DETAILS:
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE grades ADD COLUMN {column} INTEGER")
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Writers
+
+    def start_run(self, provider: str, model: Optional[str], dataset: str,
+                  run_id: Optional[str] = None, source: Optional[str] = None) -> str:
+        """Register a new run and return its id"""
+        with self.conn:
+            return self._insert_run(provider, model, dataset, run_id, source)
+
+    def record_rows(self, run_id: str, rows: Iterable[Dict]):
+        """Store questions, responses and (when present) grades for a batch of result rows"""
+        (dataset,) = self.conn.execute("SELECT dataset FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        with self.conn:
+            self._insert_rows(run_id, dataset, rows)
+
+    def finish_run(self, run_id: str, metrics: Optional[Dict] = None, status: str = "completed"):
+        """Mark a run finished and store its metrics"""
+        with self.conn:
+            self._update_finished(run_id, metrics, status)
+
+    def _insert_run(self, provider, model, dataset, run_id, source) -> str:
+        run_id = run_id or new_run_id()
+        self.conn.execute(
+            "INSERT INTO runs (run_id, provider, model, dataset, source, started_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, provider.lower(), model, dataset, source, _now()),
+        )
+        return run_id
+
+    def _insert_rows(self, run_id, dataset, rows):
+        questions, responses, grades = [], [], []
+        for row in rows:
+            question_id = int(row["idx"])
+            questions.append((dataset, question_id, _text(row.get("question")),
+                              _text(row.get("gold_answer", row.get("answer")))))
+            responses.append((run_id, question_id, *(_text(row.get(c)) for c in RESPONSE_TEXT)))
+            if "direct_correct" in row:
+                grades.append((run_id, question_id, *(_flag(row.get(c)) for c in GRADE_FLAGS),
+                               *(_int(row.get(c)) for c in SEGMENT_COLUMNS), _flag(row.get("selfcrit_revised"))))
+
+        # Identical texts (e.g. from cached reruns) share one blob
+        width = len(RESPONSE_TEXT)
+        refs = self.blobs.put_many(text for response in responses for text in response[2:])
+        responses = [(*response[:2], *refs[i * width:(i + 1) * width]) for i, response in enumerate(responses)]
+
+        # Gold answers arrive with grading; keep an existing one when a raw row has none
+        self.conn.executemany(
+            "INSERT INTO questions (dataset, question_id, question, gold_answer) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(dataset, question_id) DO UPDATE SET question = excluded.question, "
+            "gold_answer = COALESCE(excluded.gold_answer, questions.gold_answer)",
+            questions,
+        )
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO responses (run_id, question_id, {', '.join(c + REF_SUFFIX for c in RESPONSE_TEXT)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(RESPONSE_TEXT))})",
+            responses,
+        )
+        if grades:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO grades (run_id, question_id, {', '.join(GRADE_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(GRADE_COLUMNS))})",
+                grades,
+            )
+
+    def _update_finished(self, run_id, metrics, status):
+        metrics = metrics or {}
+        self.conn.execute(
+            "UPDATE runs SET status = ?, finished_at = ?, "
+            "n_questions = (SELECT COUNT(*) FROM responses WHERE run_id = ?), "
+            "direct_hallucination_rate = ?, selfcrit_hallucination_rate = ?, metrics_json = ? "
+            "WHERE run_id = ?",
+            (status, _now(), run_id,
+             metrics.get("direct", {}).get("hallucination_rate"),
+             metrics.get("selfcrit", {}).get("hallucination_rate"),
+             json.dumps(metrics, ensure_ascii=False, default=float) if metrics else None,
+             run_id),
+        )
+
+    def has_run(self, run_id: str) -> bool:
+        """Whether a run id is already stored"""
+        return self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def import_graded(self, provider: str, dataset: str, graded_df: pd.DataFrame, metrics: Dict,
+                      run_id: Optional[str] = None, source: Optional[str] = None) -> str:
+        """Store a whole graded result set as one completed run"""
+        model = None
+        if "model" in graded_df.columns and len(graded_df):
+            model = _text(graded_df["model"].iloc[0])
+        # One transaction: a failed import leaves no half-written run behind
+        with self.conn:
+            run_id = self._insert_run(provider, model, dataset, run_id, source)
+            self._insert_rows(run_id, dataset, expand_prompts(graded_df).to_dict("records"))
+            self._update_finished(run_id, metrics, "completed")
+        return run_id
+
+    def _recorded_after(self, path: str, mtime: float) -> bool:
+        """Whether a completed run written by a pipeline already covers this file version"""
+        modified = datetime.fromtimestamp(int(mtime), timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+        (finished,) = self.conn.execute(
+            "SELECT MAX(finished_at) FROM runs WHERE source = ? AND status = 'completed'",
+            (os.path.abspath(path),),
+        ).fetchone()
+        return finished is not None and finished >= modified
+
+    def import_results_dir(self, results_dir: str) -> List[str]:
+        """Backfill result sets listed in the results manifest of results_dir
+
+        Runs from the run layout keep their run id; other run ids are derived
+        from the graded file content hash recorded in the manifest, so re-importing an unchanged file is a no-op, and files
+        written by a run that recorded itself here (source = the graded file)
+        are not imported twice.
+        """
+        imported = []
+        for entry in result_sets(results_dir):
+            if "metrics" not in entry or "sha256" not in entry.get("graded", {}):
+                continue
+            graded_path = entry_path(results_dir, entry, "graded")
+            provider, dataset = entry["provider"], entry["dataset"]
+            # Runs in the run layout keep their own id
+            run_id = entry.get("run_id") or f"import-{provider}-{dataset}-{entry['graded']['sha256'][:12]}"
+            if self.has_run(run_id) or self._recorded_after(graded_path, entry["graded"]["mtime"]):
+                continue
+
+            try:
+                self.import_graded(provider, dataset, read_results(graded_path),
+                                   load_entry_metrics(results_dir, entry),
+                                   run_id=run_id, source=os.path.abspath(graded_path))
+            except Exception as e:
+                print(f"Skipping {graded_path}: {e}")
+                continue
+            imported.append(run_id)
+        return imported
+
+    # Readers
+
+    def runs(self, provider: Optional[str] = None, model: Optional[str] = None,
+             dataset: Optional[str] = None, status: Optional[str] = "completed") -> pd.DataFrame:
+        """Run table filtered on any of provider/model/dataset, newest first"""
+        clauses, params = [], []
+        for column, value in (("provider", provider and provider.lower()), ("model", model),
+                              ("dataset", dataset), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return pd.read_sql_query(f"SELECT * FROM runs {where} ORDER BY started_at DESC, run_id DESC",
+                                 self.conn, params=params)
+
+    def latest_runs(self) -> pd.DataFrame:
+        """Most recent completed run per (provider, model, dataset)"""
+        return pd.read_sql_query(
+            "SELECT * FROM ("
+            "  SELECT runs.*, ROW_NUMBER() OVER ("
+            "    PARTITION BY provider, model, dataset ORDER BY started_at DESC, run_id DESC) AS rank"
+            "  FROM runs WHERE status = 'completed'"
+            ") WHERE rank = 1 ORDER BY provider, model, dataset",
+            self.conn,
+        ).drop(columns="rank")
+
+    def run_metrics(self, run_id: str) -> Dict:
+        """Stored metrics of a run"""
+        row = self.conn.execute("SELECT metrics_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def run_frame(self, run_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-question results of a run in the graded-CSV layout
+
+        Only the tables holding the requested columns are joined, so a grade-only
+        view never reads answer text. Requesting "<column>_ref" (e.g.
+        "selfcrit_answer_ref") returns blob hashes instead of text, to be looked
+        up with texts() only for the rows that are displayed.
+        """
+        wanted = None if columns is None else set(columns)
+
+        def want(column):
+            return wanted is None or column in wanted
+
+        select = ["g.question_id AS idx"]
+        joins = ""
+        if any(want(c) for c in QUESTION_TEXT):
+            select += [f"q.{c}" for c in QUESTION_TEXT if want(c)]
+            joins += " JOIN runs r ON r.run_id = g.run_id" \
+                     " LEFT JOIN questions q ON q.dataset = r.dataset AND q.question_id = g.question_id"
+        resolved = [c for c in RESPONSE_TEXT if want(c)]
+        refs = [c + REF_SUFFIX for c in RESPONSE_TEXT if wanted is not None and c + REF_SUFFIX in wanted]
+        if resolved or refs:
+            select += [f"s.{c}{REF_SUFFIX} AS {c}" for c in resolved] + [f"s.{c}" for c in refs]
+            joins += " LEFT JOIN responses s ON s.run_id = g.run_id AND s.question_id = g.question_id"
+        select += [f"g.{c}" for c in GRADE_COLUMNS if want(c)]
+
+        frame = pd.read_sql_query(
+            f"SELECT {', '.join(select)} FROM grades g{joins} WHERE g.run_id = ? ORDER BY g.question_id",
+            self.conn, params=(run_id,),
+        )
+        if resolved:
+            texts = self.blobs.get_many(ref for c in resolved for ref in frame[c])
+            for c in resolved:
+                frame[c] = [texts.get(ref) if isinstance(ref, str) else None for ref in frame[c]]
+        if want("api") or want("model"):
+            provider, model = self.conn.execute(
+                "SELECT provider, model FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if want("api"):
+                frame["api"] = provider
+            if want("model"):
+                frame["model"] = model
+        return compact_results(frame)
+
+    def texts(self, refs: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Response texts for blob hashes from a "<column>_ref" column"""
+        return self.blobs.resolve(refs)
+
+    def hallucination_rates(self, dataset: Optional[str] = None, last_n: Optional[int] = None) -> pd.DataFrame:
+        """Hallucination rates per completed run, optionally the last_n runs per (provider, model)"""
+        params = []
+        where = "WHERE r.status = 'completed'"
+        if dataset is not None:
+            where += " AND r.dataset = ?"
+            params.append(dataset)
+        query = (
+            "SELECT r.provider, r.model, r.dataset, r.run_id, r.started_at, COUNT(*) AS n_questions,"
+            "  AVG(g.direct_hallucination) AS direct_hallucination_rate,"
+            "  AVG(g.selfcrit_hallucination) AS selfcrit_hallucination_rate,"
+            "  ROW_NUMBER() OVER (PARTITION BY r.provider, r.model, r.dataset"
+            "    ORDER BY r.started_at DESC, r.run_id DESC) AS recency"
+            f" FROM runs r JOIN grades g ON g.run_id = r.run_id {where}"
+            " GROUP BY r.run_id"
+        )
+        if last_n is not None:
+            query = f"SELECT * FROM ({query}) WHERE recency <= ?"
+            params.append(int(last_n))
+        return pd.read_sql_query(f"{query} ORDER BY provider, model, dataset, recency", self.conn, params=params)
+
+    def latest_results(self, columns: Optional[List[str]] = None,
+                       arrow_cache_dir: Optional[str] = None, text_refs: bool = False) -> List[Dict]:
+        """Latest completed run per (provider, model, dataset) with its metrics
+
+        Each result's "label" names it among the others: the provider, or
+        "provider/model" for providers with runs of several models.
+        The per-question frame ("graded_data") is queried on first access over
+        a fresh connection, so it stays available after this warehouse closes.
+        With arrow_cache_dir, each run is exported once to an Arrow snapshot
+        there and later reads memory-map it (completed runs never change).
+        With text_refs, frames hold "<column>_ref" hashes instead of response
+        text; with_texts() resolves the rows that are actually shown.
+        """
+        if text_refs and columns is None:
+            columns = REF_FRAME_COLUMNS
+
+        def load_graded(run_id):
+            if arrow_cache_dir is None:
+                return partial(read_run_frame, self.db_path, run_id, columns)
+            return partial(mapped_results, run_snapshot_path(arrow_cache_dir, run_id, text_refs),
+                           partial(read_run_frame, self.db_path, run_id, REF_FRAME_COLUMNS if text_refs else None),
+                           columns)
+
+        runs = self.latest_runs()
+        models = runs.groupby("provider")["model"].nunique(dropna=False)
+        return [
+            LazyResult(
+                load_graded(run.run_id),
+                cache_key=("warehouse", run.run_id, text_refs, tuple(columns) if columns else None),
+                label=f"{run.provider}/{run.model or 'unknown'}" if models[run.provider] > 1 else run.provider,
+                provider=run.provider,
+                model=run.model,
+                dataset=run.dataset,
+                run_id=run.run_id,
+                source=run.source,
+                metrics=json.loads(run.metrics_json) if isinstance(run.metrics_json, str) else {},
+                **({"text_db": self.db_path} if text_refs else {}),
+            )
+            for run in runs.itertuples(index=False)
+        ]
+
+# Every column of a run, with response texts as blob hashes
+REF_FRAME_COLUMNS = ["idx", *QUESTION_TEXT, *TEXT_REF_COLUMNS, *GRADE_COLUMNS, "api", "model"]
+
+def run_snapshot_path(arrow_cache_dir: str, run_id: str, text_refs: bool = False) -> str:
+    """Arrow snapshot of a completed run inside a snapshot directory"""
+    suffix = "-refs" if text_refs else ""
+    return os.path.join(str(arrow_cache_dir), "runs", f"{run_id}{suffix}{FORMAT_EXTENSIONS['arrow']}")
+
+def read_run_frame(db_path: str, run_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Per-question frame of one run, opening the warehouse just for this read"""
+    with ResultsWarehouse(db_path) as warehouse:
+        return warehouse.run_frame(run_id, columns=columns)
+
+def read_texts(db_path: str, refs: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """Response texts for blob hashes, opening the warehouse just for this lookup"""
+    with ResultsWarehouse(db_path) as warehouse:
+        return warehouse.texts(refs)
+
+def with_texts(frame: pd.DataFrame, db_path: str) -> pd.DataFrame:
+    """Rows of a text_refs frame with their "<column>_ref" hashes replaced by the texts"""
+    refs = [c for c in TEXT_REF_COLUMNS if c in frame.columns]
+    if not refs:
+        return frame
+    texts = read_texts(db_path, [ref for c in refs for ref in frame[c]])
+    frame = frame.drop(columns=refs)
+    for i, column in enumerate(refs):
+        frame[column[:-len(REF_SUFFIX)]] = texts[i * len(frame):(i + 1) * len(frame)]
+    return frame
+
+def main():
+    """Backfill the warehouse from result files and print recent hallucination rates"""
+    results_dir = os.getenv("RESULTS_DIR", DEFAULT_RESULTS_DIR)
+    dataset = os.getenv("DATASET") or None
+    last_n = int(os.getenv("LAST_N_RUNS", "5"))
+
+    with ResultsWarehouse(os.path.join(results_dir, WAREHOUSE_FILE)) as warehouse:
+        imported = warehouse.import_results_dir(results_dir)
+        print(f"Imported {len(imported)} result set(s) into {warehouse.db_path}")
+        stats = warehouse.blobs.stats()
+        print(f"Response texts: {stats['blobs']} distinct, {stats['text_chars']} chars in {stats['stored_bytes']} bytes")
+        print(warehouse.hallucination_rates(dataset=dataset, last_n=last_n).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
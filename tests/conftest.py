@@ -0,0 +1,6 @@
+"""Make the project root importable, as the entry points do, so tests can import src.*"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,160 @@
+"""Grading tests for src/evaluator.py"""
+
+import json
+
+import pytest
+
+from src.evaluator import (
+    DELTA_COLUMNS, GRADE_FLAG_COLUMNS, RATE_COLUMNS, HallucinationEvaluator, extract_quantities, quantities_match, segment_selfcrit
+)
+
+@pytest.fixture
+def fuzzy():
+    return HallucinationEvaluator(match_mode="fuzzy")
+
+def test_similarity_scores_the_closest_passage_of_a_long_answer(fuzzy):
+    gold = "Larry Page & Sergey Brin"
+    answer = "Thuật toán PageRank được phát minh bởi Larry Page và Sergey Brin tại Đại học Stanford, hai nhà sáng lập Google"
+    # Best window "page và sergey brin": 2 * 3 / (4 + 4), however long the rest of the answer
+    assert fuzzy.similarity_scores([answer], [gold])[0] == pytest.approx(0.75)
+    assert fuzzy.check_correctness(answer, gold)
+
+def test_similarity_penalises_scattered_gold_words(fuzzy):
+    gold = "đại dương lớn nhất"
+    close, scattered = fuzzy.similarity_scores(
+        ["đó là đại dương rất lớn nhất", "đại học có nhiều ý kiến về dương lịch, lớn tuổi và nhất định khác nhau"], [gold] * 2
+    )
+    assert close >= fuzzy.fuzzy_threshold > scattered
+
+def test_similarity_ignores_numbers(fuzzy):
+    assert fuzzy.similarity_scores(["2.4 lần"], ["1.4 lần"])[0] == pytest.approx(1.0)
+
+def test_fuzzy_never_overrides_numeric_mismatch(fuzzy):
+    gold = "1.4 lần khối lượng Mặt Trời"
+    assert not fuzzy.check_correctness("Khoảng 2.4 lần khối lượng Mặt Trời", gold)
+    assert fuzzy.check_correctness("Khoảng 1.4 lần khối lượng Mặt Trời", gold)
+
+def test_fuzzy_requires_numbers_of_textual_gold(fuzzy):
+    gold = "Mọi số chẵn lớn hơn 2 là tổng của hai số nguyên tố"
+    assert fuzzy.check_correctness("mọi số chẵn lớn hơn 2 đều là tổng của hai số nguyên tố", gold)
+    assert not fuzzy.check_correctness("mọi số chẵn lớn hơn 4 đều là tổng của hai số nguyên tố", gold)
+
+def test_fuzzy_accepts_paraphrase(fuzzy):
+    assert fuzzy.check_correctness("đó là thái bình dương", "Thái Bình Dương")
+    assert not HallucinationEvaluator().check_correctness("thái  dương bình", "Thái Bình Dương")
+
+def test_all_grading_paths_agree(fuzzy):
+    record = {"idx": 1, "question": "q", "direct_answer": "Khoảng 2.4 lần khối lượng Mặt Trời",
+              "selfcrit_answer": "Bước 3 — Cuối cùng: đó là thái bình dương"}
+    for gold in ("1.4 lần khối lượng Mặt Trời", "thái bình dương"):
+        graded = fuzzy.grade_record(record, gold)
+        assert graded["direct_correct"] == fuzzy.check_correctness(record["direct_answer"], gold)
+        assert graded["selfcrit_correct"] == fuzzy.check_correctness(record["selfcrit_answer"], gold)
+
+SELFCRIT_ANSWER = "**Bước 1 — Nháp:** 8 hành tinh\n**Bước 2 — Tự kiểm:** ok\n**Bước 3 — Cuối cùng:** 9 hành tinh"
+
+def test_streaming_metrics_include_revision_rate():
+    evaluator = HallucinationEvaluator(bootstrap_resamples=0)
+    accumulator = evaluator.new_accumulator()
+    for selfcrit in (SELFCRIT_ANSWER, "Bước 1: 8\nBước 3: 8", "no steps at all"):
+        accumulator.update(evaluator.grade_record(
+            {"idx": 1, "direct_answer": "8", "selfcrit_answer": selfcrit}, "8"))
+    assert accumulator.metrics()["selfcrit"]["revision_rate"] == pytest.approx(0.5)
+    frame = accumulator.flags_frame()
+    assert frame["selfcrit_revised"].isna().tolist() == [False, False, True]
+    assert evaluator.calculate_metrics(frame)["selfcrit"]["revision_rate"] == pytest.approx(0.5)
+
+@pytest.fixture
+def exact():
+    return HallucinationEvaluator()
+
+def _quantity(text):
+    (quantity,) = extract_quantities(text)
+    return quantity
+
+def test_quantities_match_within_tolerance_and_units():
+    assert quantities_match(_quantity("1.5 km"), _quantity("1500 m"), 0.02)
+    assert not quantities_match(_quantity("1.5 km"), _quantity("1500 kg"), 0.02)
+    assert quantities_match(_quantity("68%"), _quantity("0.68"), 0.02)
+    assert not quantities_match(_quantity("8"), _quantity("9"), 0.02)
+
+def test_range_gold_needs_the_whole_answer_inside(exact):
+    gold = "10-20 lần khối lượng Mặt Trời"
+    assert exact.numeric_matches(["khoảng 15 lần", "12-18 lần", "5-15 lần", "25 lần"], [gold] * 4).tolist() == \
+        [True, True, False, False]
+
+def test_ranges_written_with_den_and_toi(exact):
+    (quantity,) = extract_quantities("từ 10 tới 20 km")
+    assert quantity.values[0][:2] == (10.0, 20.0)
+    gold = "10 đến 20 lần khối lượng Mặt Trời"
+    assert exact.numeric_matches(["12 tới 18 lần", "5 đến 15 lần"], [gold] * 2).tolist() == [True, False]
+
+def test_year_ranges_get_no_relative_slack(exact):
+    golds = ["1939 đến 1945", "1967-1969", "Năm 1969"]
+    answers = ["Chiến tranh kéo dài từ 1939 đến 1945", "năm 1968", "năm 1969"]
+    assert exact.numeric_matches(answers, golds).tolist() == [True, True, True]
+    assert exact.numeric_matches(["năm 1950", "năm 1960", "năm 1970"], golds).tolist() == [False, False, False]
+
+def test_point_gold_accepts_either_end_of_an_answer_range(exact):
+    assert exact.numeric_matches(["khoảng 26.000 - 28.000 năm ánh sáng"], ["Khoảng 26000 năm ánh sáng"])[0]
+
+def test_numeric_matches_reads_separators_and_magnitudes(exact):
+    answers = ["6,626 × 10^-34 J·s", "1,4 tỷ người", "khoảng 300.000 km/s"]
+    golds = ["6.626e-34 J·s", "1400 triệu người", "3 × 10^5 km/s"]
+    assert exact.numeric_matches(answers, golds).tolist() == [True, True, True]
+
+def test_similarity_scores_are_best_window_dice(exact):
+    gold, answer = "đại dương thái bình", "thái bình dương"
+    # {đại, dương, thái, bình} against the shorter answer {thái, bình, dương}: 2 * 3 / (4 + 3)
+    assert exact.similarity_scores([answer], [gold])[0] == pytest.approx(6 / 7)
+    assert exact.similarity_scores(["vùng biển đại dương thái bình rất rộng"], [gold])[0] == pytest.approx(1.0)
+    assert exact.similarity_scores(["hoàn toàn khác"], [gold])[0] == 0.0
+
+def test_segment_selfcrit_offsets():
+    spans = segment_selfcrit(SELFCRIT_ANSWER)
+    assert {name: SELFCRIT_ANSWER[start:end].strip() for name, (start, end) in spans.items()} == \
+        {"draft": "8 hành tinh", "critique": "ok", "final": "9 hành tinh"}
+    assert segment_selfcrit("Trả lời thẳng, không có bước nào") == {}
+
+def test_segment_selfcrit_treats_leading_text_as_draft():
+    text = "Sơ bộ: 8\nBước 3 — Cuối cùng: 8"
+    spans = segment_selfcrit(text)
+    assert text[slice(*spans["draft"])].strip() == "Sơ bộ: 8"
+    assert "critique" not in spans
+
+def test_reworded_final_with_the_same_answer_is_not_revised(exact):
+    reworded = ("Bước 1 — Nháp: Sao Thủy.\nBước 2 — Tự kiểm: đúng.\n"
+                "Bước 3 — Cuối cùng: Hành tinh gần Mặt Trời nhất là **Sao Thủy**, quỹ đạo 88 ngày.")
+    same_number = ("Bước 1 — Nháp: khoảng 230 km/s\nBước 2 — Tự kiểm: ok\n"
+                   "Bước 3 — Cuối cùng: Hệ Mặt Trời quay quanh Ngân Hà với tốc độ khoảng **230 km/s**.")
+    changed_number = "Bước 1 — Nháp: 300 km/s\nBước 2 — Tự kiểm: sai\nBước 3 — Cuối cùng: 230 km/s"
+    record = {"idx": 1, "direct_answer": "x"}
+    assert not exact.grade_record({**record, "selfcrit_answer": reworded}, "Sao Thủy")["selfcrit_revised"]
+    assert not exact.grade_record({**record, "selfcrit_answer": same_number}, "220 km/s")["selfcrit_revised"]
+    assert exact.grade_record({**record, "selfcrit_answer": changed_number}, "220 km/s")["selfcrit_revised"]
+    assert exact.grade_record({**record, "selfcrit_answer": SELFCRIT_ANSWER}, "8")["selfcrit_revised"]
+
+def _flags_with_na():
+    import pandas as pd
+    flags = {column: pd.array([True, False, True, False, pd.NA, True], dtype="boolean")
+             for column in GRADE_FLAG_COLUMNS}
+    flags["direct_correct"] = pd.array([False, False, True, pd.NA, False, True], dtype="boolean")
+    return pd.DataFrame(flags)
+
+def test_confidence_intervals_leave_out_na_flags():
+    evaluator = HallucinationEvaluator(bootstrap_resamples=200, bootstrap_seed=0)
+    metrics = evaluator.calculate_metrics(_flags_with_na())
+    intervals = metrics["confidence_intervals"]
+    for section, metric, _ in RATE_COLUMNS:
+        low, high = intervals[section][metric]
+        assert 0.0 <= low <= metrics[section][metric] <= high <= 1.0
+
+def _reject_constant(name):
+    raise ValueError(f"metrics JSON holds {name}")
+
+def test_metrics_with_na_flags_round_trip_through_json():
+    metrics = HallucinationEvaluator(bootstrap_resamples=200, bootstrap_seed=0).calculate_metrics(_flags_with_na())
+    loaded = json.loads(json.dumps(metrics), parse_constant=_reject_constant)
+    for metric in DELTA_COLUMNS:
+        low, high = loaded["confidence_intervals"]["improvement"][metric]
+        assert -1.0 <= low <= loaded["improvement"][metric] <= high <= 1.0
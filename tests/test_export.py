@@ -0,0 +1,23 @@
+"""Archive export tests for src/export.py"""
+
+import os
+
+from src.export import _prune_exports
+
+def _archives(directory, count):
+    paths = [str(directory / f"results_2026010{i}_000000_000000.zip") for i in range(count)]
+    for path in paths:
+        open(path, "wb").close()
+    return paths
+
+def test_prune_leaves_recent_archives_alone(tmp_path):
+    paths = _archives(tmp_path, 3)
+    _prune_exports(str(tmp_path), keep=1)
+    assert all(os.path.exists(path) for path in paths)
+
+def test_prune_deletes_old_archives_beyond_keep(tmp_path):
+    paths = _archives(tmp_path, 3)
+    for path in paths:
+        os.utime(path, (0, 0))
+    _prune_exports(str(tmp_path), keep=1)
+    assert [os.path.exists(path) for path in paths] == [False, False, True]
@@ -0,0 +1,29 @@
+"""Shared frame cache tests for src/frame_cache.py"""
+
+import pandas as pd
+
+from src.frame_cache import FrameCache, frame_nbytes
+
+def _frame(rows):
+    return pd.DataFrame({"idx": range(rows)})
+
+def test_put_evicts_least_recently_used_frames_beyond_the_budget():
+    small = _frame(100)
+    cache = FrameCache(budget_bytes=2 * frame_nbytes(small))
+    cache.put("a", small)
+    cache.put("b", _frame(100))
+    cache.get("a", lambda: None)
+    cache.put("c", _frame(100))
+    assert cache.get("a", lambda: "reloaded") is small
+    assert cache.get("b", lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.budget_bytes
+
+def test_put_replaces_a_key_and_skips_frames_over_the_budget():
+    cache = FrameCache(budget_bytes=frame_nbytes(_frame(100)))
+    cache.put("a", _frame(100))
+    cache.put("a", _frame(50))
+    assert len(cache.get("a", lambda: None)) == 50
+    assert cache.stats()["bytes"] == frame_nbytes(_frame(50))
+    cache.put("big", _frame(1000))
+    assert cache.get("big", lambda: "reloaded") == "reloaded"
@@ -0,0 +1,95 @@
+"""Experiment queue tests for src/job_queue.py"""
+
+import os
+import socket
+import sqlite3
+import time
+
+import pytest
+
+from src import job_queue
+from src.job_queue import JobQueue, QueueProgress, QueueWorkers
+from src.jobs import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobCancelled
+
+def _heartbeat_at(queue, job_id):
+    conn = sqlite3.connect(queue.db_path)
+    (value,) = conn.execute("SELECT heartbeat_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return value
+
+def test_start_fails_jobs_orphaned_by_an_earlier_process_with_this_pid(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    orphan, _ = queue.submit("orphan", "experiment", {"n": 1}, "openai")
+    elsewhere, _ = queue.submit("elsewhere", "experiment", {"n": 2}, "openai")
+    queue.claim(f"{socket.gethostname()}:{os.getpid()}:99", ["experiment"], {})
+    queue.claim("other-host:1:0", ["experiment"], {})
+    workers = QueueWorkers(queue, {}, 0).start()
+    workers.stop()
+    assert queue.get(orphan).status == FAILED
+    assert queue.get(elsewhere).status == RUNNING
+
+def test_workers_heartbeat_while_the_handler_is_silent(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "HEARTBEAT_INTERVAL", 0.05)
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    seen = []
+
+    def silent(params, progress):
+        conn = sqlite3.connect(queue.db_path)
+        conn.execute("UPDATE jobs SET heartbeat_at = '2000-01-01T00:00:00'")
+        conn.commit()
+        conn.close()
+        time.sleep(0.5)
+        seen.append(_heartbeat_at(queue, job_id))
+        return {"success": True}
+
+    job_id, _ = queue.submit("silent", "experiment", {}, "ollama")
+    workers = QueueWorkers(queue, {"experiment": silent}, 1).start()
+    deadline = time.time() + 10
+    while queue.get(job_id).active and time.time() < deadline:
+        time.sleep(0.05)
+    workers.stop()
+    assert seen and seen[0] > "2000-01-01T00:00:00"
+
+def test_claim_takes_the_oldest_job_within_provider_limits(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    first, _ = queue.submit("openai 1", "experiment", {"n": 1}, "openai")
+    second, _ = queue.submit("openai 2", "experiment", {"n": 2}, "openai")
+    gemini, _ = queue.submit("gemini", "experiment", {"n": 3}, "gemini")
+    limits = {"openai": 1}
+    assert queue.claim("w:1:0", ["experiment"], limits).id == first
+    # openai is at its limit, so the next claim skips to the next provider
+    assert queue.claim("w:1:1", ["experiment"], limits).id == gemini
+    assert queue.claim("w:1:2", ["experiment"], limits, default_limit=1) is None
+    assert queue.claim("w:1:2", ["report"], {}) is None
+    assert queue.get(second).status == QUEUED
+
+def test_submit_deduplicates_active_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id, created = queue.submit("openai", "experiment", {"n": 1}, "openai")
+    assert created and queue.submit("openai", "experiment", {"n": 1}, "openai") == (job_id, False)
+
+def test_cancel_stops_queued_jobs_at_once_and_running_ones_at_their_next_report(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    running, _ = queue.submit("running", "experiment", {"n": 1}, "openai")
+    queued, _ = queue.submit("queued", "experiment", {"n": 2}, "openai")
+    queue.claim("w:1:0", ["experiment"], {"openai": 1})
+
+    assert queue.cancel(queued)
+    assert queue.get(queued).status == CANCELLED
+
+    assert queue.cancel(running)
+    assert queue.get(running).status == RUNNING
+    with pytest.raises(JobCancelled):
+        QueueProgress(queue, running).progress(0.5)
+
+    queue.finish(running, CANCELLED)
+    assert queue.get(running).status == CANCELLED
+
+def test_finished_jobs_cannot_be_cancelled(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id, _ = queue.submit("done", "experiment", {"n": 1}, "openai")
+    queue.claim("w:1:0", ["experiment"], {})
+    queue.finish(job_id, COMPLETED, result={"success": True})
+    assert not queue.cancel(job_id)
+    assert queue.get(job_id).status == COMPLETED
+    assert not queue.cancel("unknown")
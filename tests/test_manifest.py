@@ -0,0 +1,49 @@
+"""Result manifest tests for src/manifest.py"""
+
+import os
+import threading
+import time
+
+from src import manifest
+from src.manifest import load_manifest, manifest_path
+
+def _lock_path(results_dir):
+    return f"{manifest_path(str(results_dir))}.lock"
+
+def _mark(manifest_dict):
+    manifest_dict["result_sets"]["ollama/planets"] = {"provider": "ollama"}
+
+def test_live_lock_is_waited_for(tmp_path):
+    lock_path = _lock_path(tmp_path)
+    with open(lock_path, "w") as f:
+        f.write("other writer")
+    writer = threading.Thread(target=manifest._modify_manifest, args=(str(tmp_path), _mark))
+    writer.start()
+    time.sleep(0.3)
+    assert writer.is_alive() and os.path.exists(lock_path)
+    os.remove(lock_path)
+    writer.join(5)
+    assert "ollama/planets" in load_manifest(str(tmp_path))["result_sets"]
+
+def test_stale_lock_is_broken(tmp_path):
+    lock_path = _lock_path(tmp_path)
+    with open(lock_path, "w") as f:
+        f.write("crashed writer")
+    stale = time.time() - manifest.LOCK_TIMEOUT - 1
+    os.utime(lock_path, (stale, stale))
+    manifest._modify_manifest(str(tmp_path), _mark)
+    assert "ollama/planets" in load_manifest(str(tmp_path))["result_sets"]
+    assert not os.path.exists(lock_path)
+
+def test_writer_keeps_a_lock_taken_over_by_another(tmp_path):
+    lock_path = _lock_path(tmp_path)
+
+    def taken_over(manifest_dict):
+        # Our lock was broken and another writer now holds a new one
+        os.remove(lock_path)
+        with open(lock_path, "w") as f:
+            f.write("other writer")
+
+    manifest._modify_manifest(str(tmp_path), taken_over)
+    with open(lock_path) as f:
+        assert f.read() == "other writer"
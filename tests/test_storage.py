@@ -0,0 +1,57 @@
+"""Results storage tests for src/storage.py"""
+
+import os
+import threading
+
+import pandas as pd
+
+from src.storage import ParquetRowSink, mapped_results, read_results
+
+def test_concurrent_snapshot_writers_do_not_collide(tmp_path):
+    frame = pd.DataFrame({"idx": range(20000), "question": ["Câu hỏi dài " * 5] * 20000})
+    barrier = threading.Barrier(4)
+    errors, lengths = [], []
+
+    def load(path):
+        barrier.wait()
+        try:
+            lengths.append(len(mapped_results(path, lambda: frame)))
+        except Exception as e:
+            errors.append(e)
+
+    for trial in range(3):
+        path = str(tmp_path / f"snapshot_{trial}.arrow")
+        threads = [threading.Thread(target=load, args=(path,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert lengths == [len(frame)] * 12
+    assert not list(tmp_path.glob("*.tmp"))
+
+def _rows(n):
+    return [{"idx": i, "api": "ollama", "model": f"model-{i // 3}", "question": f"câu {i}",
+             "direct_answer": str(i), "direct_correct": i % 2 == 0, "direct_similarity": 0.5} for i in range(n)]
+
+def test_parquet_row_sink_writes_row_groups_as_it_goes(tmp_path):
+    import pyarrow.parquet as pq
+
+    path = str(tmp_path / "results_graded_planets.parquet")
+    with ParquetRowSink(path, batch_rows=3) as sink:
+        for row in _rows(7):
+            sink.write(row)
+        assert len(sink._rows) == 1 and not os.path.exists(path)
+    assert pq.ParquetFile(path).num_row_groups == 3
+    frame = read_results(path)
+    assert frame["idx"].tolist() == list(range(7))
+    assert frame["direct_correct"].tolist() == [i % 2 == 0 for i in range(7)]
+
+def test_arrow_row_sink_unifies_dictionaries_of_its_batches(tmp_path):
+    path = str(tmp_path / "results_graded_planets.arrow")
+    with ParquetRowSink(path, batch_rows=3) as sink:
+        for row in _rows(7):
+            sink.write(row)
+    frame = read_results(path)
+    assert frame["model"].astype(str).tolist() == [f"model-{i // 3}" for i in range(7)]
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,85 @@
+"""Results warehouse tests for src/warehouse.py"""
+
+import sqlite3
+
+import pytest
+
+from src.blobstore import BlobStore
+from src.evaluator import HallucinationEvaluator, selfcrit_segments
+from src.warehouse import RESPONSE_TEXT, SCHEMA_VERSION, ResultsWarehouse, with_texts
+
+def test_grades_keep_segment_offsets(tmp_path):
+    graded = HallucinationEvaluator().grade_record({
+        "idx": 1, "question": "Có bao nhiêu hành tinh?", "direct_answer": "8",
+        "selfcrit_answer": "Bước 1 — Nháp: 9\nBước 2 — Tự kiểm: sai\nBước 3 — Cuối cùng: 8",
+    }, "8")
+    with ResultsWarehouse(str(tmp_path / "results.db")) as warehouse:
+        run_id = warehouse.start_run("ollama", "llama", "planets")
+        warehouse.record_rows(run_id, [graded])
+        warehouse.finish_run(run_id, {})
+        row = warehouse.run_frame(run_id).iloc[0]
+    assert row["selfcrit_final_start"] == graded["selfcrit_final_start"]
+    assert bool(row["selfcrit_revised"])
+    assert selfcrit_segments(row) == {"draft": "9", "critique": "sai", "final": "8"}
+
+def _legacy_warehouse(db_path):
+    """A version 0 warehouse holding one response with inline texts"""
+    with ResultsWarehouse(db_path) as warehouse:
+        warehouse.start_run("ollama", "llama", "planets", run_id="r1")
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE responses")
+    conn.execute("CREATE TABLE responses (run_id TEXT, question_id INTEGER, %s TEXT)" % " TEXT, ".join(RESPONSE_TEXT))
+    conn.execute("INSERT INTO responses VALUES ('r1', 1, 'tám', 'Bước 3 — Cuối cùng: 8', '8', 'p1', 'p2')")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+def test_migration_moves_inline_texts_to_blobs(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    _legacy_warehouse(db_path)
+    with ResultsWarehouse(db_path) as warehouse:
+        (version,) = warehouse.conn.execute("PRAGMA user_version").fetchone()
+        refs = warehouse.conn.execute("SELECT direct_answer_ref, selfcrit_prompt_ref FROM responses").fetchone()
+        assert version == SCHEMA_VERSION
+        assert warehouse.texts(refs) == ["tám", "p2"]
+
+def test_failed_migration_leaves_version_0_table(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "results.db")
+    _legacy_warehouse(db_path)
+    def fail(self, texts):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(BlobStore, "put_many", fail)
+    with pytest.raises(RuntimeError):
+        ResultsWarehouse(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone() == (0,)
+    assert conn.execute("SELECT direct_answer FROM responses").fetchone() == ("tám",)
+    conn.close()
+
+def test_with_texts_resolves_only_given_rows(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    evaluator = HallucinationEvaluator()
+    rows = [evaluator.grade_record({"idx": i, "question": f"q{i}", "direct_answer": f"đáp án {i}",
+                                    "selfcrit_answer": f"Bước 3 — Cuối cùng: {i}"}, str(i)) for i in range(3)]
+    with ResultsWarehouse(db_path) as warehouse:
+        run_id = warehouse.start_run("ollama", "llama", "numbers")
+        warehouse.record_rows(run_id, rows)
+        warehouse.finish_run(run_id, {})
+        (result,) = warehouse.latest_results(text_refs=True)
+    frame = result["graded_data"]
+    assert "direct_answer" not in frame.columns and "direct_answer_ref" in frame.columns
+    shown = with_texts(frame.iloc[[2]], result["text_db"])
+    assert "direct_answer_ref" not in shown.columns
+    assert shown.iloc[0]["direct_answer"] == "đáp án 2"
+
+def test_latest_results_keep_each_model_of_a_provider(tmp_path):
+    evaluator = HallucinationEvaluator()
+    graded = evaluator.grade_record({"idx": 1, "question": "q", "direct_answer": "8",
+                                     "selfcrit_answer": "Bước 3 — Cuối cùng: 8"}, "8")
+    with ResultsWarehouse(str(tmp_path / "results.db")) as warehouse:
+        for provider, model in (("ollama", "llama"), ("ollama", "qwen"), ("openai", "gpt-4o-mini")):
+            run_id = warehouse.start_run(provider, model, "planets")
+            warehouse.record_rows(run_id, [graded])
+            warehouse.finish_run(run_id, {})
+        labels = sorted(result["label"] for result in warehouse.latest_results())
+    assert labels == ["ollama/llama", "ollama/qwen", "openai"]
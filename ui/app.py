@@ -7,12 +7,9 @@ import os
 import json
 import subprocess
 import time
-import importlib.util
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import sys
 
 # Streamlit Cloud compatible path setup
@@ -68,10 +65,8 @@ try:
     # Try to import config manager
     configs_path = os.path.join(parent_dir, 'configs', 'config_manager.py')
     if os.path.exists(configs_path):
-        spec = importlib.util.spec_from_file_location("config_manager", configs_path)
-        config_manager_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(config_manager_module)
-        ConfigManager = config_manager_module.ConfigManager
+        # configs/ is on sys.path; a plain import is cached across reruns instead of re-executed
+        from config_manager import ConfigManager
     else:
         # Fallback for Streamlit Cloud if config_manager.py not available
         class ConfigManager:
@@ -90,11 +85,11 @@ try:
     from experiment_runner import ExperimentRunner  
     from components.analytics import create_metrics_comparison, create_hallucination_trend
     from components.enhanced_analytics import (
-        load_all_existing_results, 
-        create_api_comparison_chart,
+        load_cached_results,
+        cached_aggregate,
         extract_hallucination_cases,
-        create_hallucination_analysis_chart,
-        create_detailed_metrics_table
+        graded_texts,
+        hallucination_case
     )
 except ImportError as e:
     st.error(f"Import error: {e}")
@@ -139,8 +134,8 @@ API_CONFIGS = {
 
 def init_session_state():
     """Initialize session state variables"""
-    if 'experiment_running' not in st.session_state:
-        st.session_state.experiment_running = False
+    if 'jobs_finished_seen' not in st.session_state:
+        st.session_state.jobs_finished_seen = set()
     if 'experiment_results' not in st.session_state:
         st.session_state.experiment_results = {}
     if 'selected_apis' not in st.session_state:
@@ -190,17 +185,25 @@ def check_api_availability():
     
     return available_apis, config_manager
 
-def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text, config_manager):
-    """Run experiment for specific API + dataset combination using unified APIRunner"""
+def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text, config_manager, evaluator=None,
+                   on_metrics=None):
+    """Run experiment for specific API + dataset combination using unified APIRunner
+    
+    Modules are imported once per process; the evaluator may be shared between runs.
+    on_metrics receives the running metrics (with Wilson CIs) after each graded question.
+    """
     try:
-        # Setup paths
+        # Setup paths: every run gets its own directory, so earlier runs are never overwritten
         dataset_path = DATASETS_DIR / dataset_name
-        result_dir = RESULTS_DIR / api_name.lower()
-        result_dir.mkdir(parents=True, exist_ok=True)
-        
         dataset_base = dataset_name.replace('.csv', '')
-        raw_output = result_dir / f"results_raw_{dataset_base}.csv"
-        graded_output = result_dir / f"results_graded_{dataset_base}.csv"
+        from src.manifest import create_run_dir
+        run_id, result_dir = create_run_dir(RESULTS_DIR, api_name, model_name, dataset_base)
+        result_dir = Path(result_dir)
+        
+        # Results format (csv/parquet/arrow) comes from the "storage" config section
+        from src.storage import results_path
+        raw_output = Path(results_path(result_dir, "raw", dataset_base))
+        graded_output = Path(results_path(result_dir, "graded", dataset_base))
         metrics_output = result_dir / f"metrics_{dataset_base}.json"
         
         # Get API config
@@ -212,14 +215,10 @@ def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text
         status_text.text(f"🤖 Running {api_name} inference...")
         progress_bar.progress(0.3)
         
-        # Import APIRunner từ src folder
-        src_path = os.path.join(parent_dir, 'src', 'api_runner.py')
-        spec = importlib.util.spec_from_file_location("api_runner", src_path)
-        api_runner_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(api_runner_module)
-        APIRunner = api_runner_module.APIRunner
+        # Import APIRunner từ src folder (cached in sys.modules after the first run)
+        from src.api_runner import APIRunner
         
-        # Initialize APIRunner
+        # Initialize APIRunner; its provider client is pooled across runs
         api_key = api_config.get("api_key") if api_name.lower() != "ollama" else None
         runner = APIRunner(
             provider=api_name.lower(),
@@ -259,90 +258,61 @@ def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text
         if answer_col is None:
             return {"error": f"No answer column found. Available columns: {list(df.columns)}"}
         
-        # Run experiments
-        results = []
+        # Steps 1-2: stream inference rows straight into grading and incremental sinks
+        from src.pipeline import run_streaming_pipeline
+        if evaluator is None:
+            from src.evaluator import HallucinationEvaluator
+            evaluator = HallucinationEvaluator()
         total_questions = len(df)
         
-        for idx, row in df.iterrows():
-            question = row[question_col]
-            correct_answer = row.get(answer_col, '')
-            
-            # Update progress
-            progress = 0.3 + (idx / total_questions) * 0.4
-            progress_bar.progress(progress)
-            status_text.text(f"🤖 Processing question {idx+1}/{total_questions}")
-            
-            try:
-                # Direct prompt
-                direct_response = runner.run_direct_prompt(question)
-                
-                # Self-critique prompt  
-                critique_response = runner.run_self_critique_prompt(question)
-                final_answer = runner.extract_final_answer(critique_response)
-                
-                results.append({
-                    'idx': idx + 1,  # Add index for evaluator
-                    'question': question,
-                    'answer': correct_answer,  # Gold answer 
-                    'direct_answer': direct_response,  # Match evaluator expectation
-                    'selfcrit_answer': critique_response,  # Full critique response
-                    'selfcrit_final_span': final_answer,  # Extracted final answer
-                    'api': api_name.lower(),
-                    'model': model_name
-                })
-                
-            except Exception as e:
-                results.append({
-                    'idx': idx + 1,
-                    'question': question,
-                    'answer': correct_answer,
-                    'direct_answer': f"ERROR: {str(e)}",
-                    'selfcrit_answer': f"ERROR: {str(e)}",
-                    'selfcrit_final_span': f"ERROR: {str(e)}",
-                    'api': api_name.lower(),
-                    'model': model_name
-                })
-        
-        # Save raw results
-        results_df = pd.DataFrame(results)
-        results_df.to_csv(raw_output, index=False)
+        def on_update(graded_row, accumulator):
+            """Advance progress and show running metrics after each graded question"""
+            done = accumulator.total
+            progress_bar.progress(0.3 + (done / total_questions) * 0.5)
+            running = accumulator.metrics()
+            status_text.text(
+                f"🤖 Processed question {done}/{total_questions} | "
+                f"hallucination direct {running['direct']['hallucination_rate']:.1%}, "
+                f"self-critique {running['selfcrit']['hallucination_rate']:.1%}"
+            )
+            if on_metrics:
+                on_metrics(running)
         
-        # Step 2: Evaluate responses
-        status_text.text("📊 Evaluating responses...")
-        progress_bar.progress(0.8)
-        
-        # Import evaluator từ src folder
-        evaluator_path = os.path.join(parent_dir, 'src', 'evaluator.py')
-        spec = importlib.util.spec_from_file_location("evaluator", evaluator_path)
-        evaluator_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(evaluator_module)
-        HallucinationEvaluator = evaluator_module.HallucinationEvaluator
-        
-        evaluator = HallucinationEvaluator()
-        
-        # Evaluate and save graded results
-        # Load original dataset for grading
-        questions_df = pd.read_csv(dataset_path)
-        
-        # Grade responses
-        graded_df = evaluator.grade_responses(results_df, questions_df)
-        
-        # Calculate metrics
-        metrics = evaluator.calculate_metrics(graded_df)
+        records = (
+            {**record, 'api': api_name.lower()}
+            for record in runner.iter_experiment(df, question_col=question_col, answer_col=answer_col)
+        )
+        # Every run is also recorded in the results warehouse (data/results/results.db)
+        from src.warehouse import open_warehouse
+        warehouse = open_warehouse(RESULTS_DIR)
+        if warehouse is not None:
+            warehouse.start_run(api_name, model_name, dataset_base, run_id=run_id, source=str(graded_output.resolve()))
         
-        # Save graded results
-        graded_df.to_csv(graded_output, index=False)
+        try:
+            metrics = run_streaming_pipeline(
+                records, evaluator, df,
+                raw_csv=str(raw_output),
+                graded_csv=str(graded_output),
+                metrics_json=str(metrics_output),
+                on_update=on_update,
+                warehouse=warehouse,
+                run_id=run_id
+            )
+        finally:
+            if warehouse is not None:
+                warehouse.close()
         
-        # Save metrics
-        with open(metrics_output, 'w') as f:
-            json.dump(metrics, f, indent=2)
+        from src.manifest import update_result_set
+        update_result_set(RESULTS_DIR, api_name, dataset_base, model=model_name,
+                          raw_path=str(raw_output), graded_path=str(graded_output),
+                          metrics_path=str(metrics_output), metrics=metrics,
+                          rows=metrics.get("total_questions"), run_id=run_id)
         
-        # Step 3: Generate report
-        status_text.text("📄 Generating report...")
-        progress_bar.progress(0.9)
+        # Step 3: Queue the Word report; it renders in the background off the critical path
+        from src.reports import submit_word_report
         
         report_path = result_dir / f"report_{dataset_base}.docx"
-        evaluator.generate_word_report(graded_df, metrics, str(report_path))
+        report_future = submit_word_report(graded_output, metrics, report_path)
         
         progress_bar.progress(1.0)
         status_text.text("✅ Experiment completed!")
@@ -353,6 +323,8 @@ def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text
             "graded_file": str(graded_output),
             "metrics_file": str(metrics_output),
             "report_file": str(report_path),
+            "run_id": run_id,
+            "report_future": report_future,
             "metrics": metrics
         }
         
@@ -362,25 +334,329 @@ def run_experiment(api_name, model_name, dataset_name, progress_bar, status_text
         status_text.text(f"❌ Error: {str(e)}")
         return {"error": error_msg}
 
+@st.cache_resource
+def get_job_queue():
+    """Shared experiment queue (data/results/jobs.db) and this process's fixed pool of queue workers
+
+    Every session and every dashboard process sees the same jobs; identical queued or
+    running experiments are deduplicated and providers are limited by PROVIDER_CONCURRENCY.
+    """
+    from src.jobs import max_workers_from_env
+    from src.job_queue import QueueWorkers, open_job_queue, provider_limits_from_env
+    queue = open_job_queue(RESULTS_DIR)
+    handlers = {"experiment": partial(experiment_job, evaluator=get_evaluator())}
+    QueueWorkers(queue, handlers, max_workers_from_env(), provider_limits_from_env()).start()
+    return queue
+
+@st.cache_resource
+def get_evaluator():
+    """Process-wide evaluator; its compiled patterns and gold-answer caches are built once"""
+    from src.evaluator import HallucinationEvaluator
+    return HallucinationEvaluator()
+
+def experiment_job(params, progress, evaluator=None):
+    """Queue handler: run_experiment reporting progress, status and running metrics to the job"""
+    config_manager = ConfigManager(config_file=os.path.join(parent_dir, "configs", "config.json"))
+    return run_experiment(params["api"], params["model"], params["dataset"], progress, progress, config_manager,
+                          evaluator, on_metrics=progress.metrics)
+
+def result_handle(result):
+    """Lightweight session-state handle of a finished experiment: run id, file paths and headline metrics
+
+    The graded frame is not kept; result["graded_data"] reads it through the shared frame cache.
+    """
+    if "success" not in result:
+        return {"error": result.get("error", "Unknown error")}
+    from src.manifest import LazyResult, headline_metrics
+    from src.storage import read_results
+    graded_file = result["graded_file"]
+    metrics = result.get("metrics") or {}
+    return LazyResult(
+        partial(read_results, graded_file),
+        # Same shape as the dashboard's file keys; the run id stands in for the content hash
+        cache_key=("file", graded_file, result.get("run_id"), None),
+        success=True,
+        run_id=result.get("run_id"),
+        graded_file=graded_file,
+        metrics_file=result.get("metrics_file"),
+        report_file=result.get("report_file"),
+        questions=metrics.get("total_questions", 0),
+        headline=headline_metrics(metrics),
+    )
+
+def read_file_bytes(path):
+    """Contents of a file, closing it before returning (deferred download data)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def read_archive_bytes(path, keys, kinds):
+    """Contents of an export archive, rebuilt at the same path if it was pruned since it was built"""
+    try:
+        return read_file_bytes(path)
+    except FileNotFoundError:
+        from src.export import write_results_zip
+        write_results_zip(RESULTS_DIR, path, keys=keys, kinds=kinds)
+        return read_file_bytes(path)
+
+def finished_experiment_results(queue):
+    """Handles of finished experiment jobs by (api, model, dataset), latest job last"""
+    from src.jobs import ACTIVE_STATES, CANCELLED
+    results = {}
+    for job in queue.jobs():
+        if job.status in ACTIVE_STATES or "api" not in job.metadata:
+            continue
+        if job.status == CANCELLED:
+            result = {"error": "Cancelled"}
+        else:
+            result = job.result if isinstance(job.result, dict) else {"error": job.error}
+        results[(job.metadata["api"], job.metadata.get("model") or "", job.metadata["dataset"])] = result_handle(result)
+    return results
+
+def show_experiment_jobs(queue):
+    """Progress of every job in the shared queue, refreshed by polling"""
+    from src.jobs import COMPLETED, FAILED
+    from components.enhanced_analytics import create_live_metrics_chart
+    
+    def render():
+        jobs = queue.jobs()
+        if not jobs:
+            return
+        st.header("🔄 Experiment Jobs")
+        active = [job for job in jobs if job.active]
+        st.caption(f"{len(active)} running or queued, {len(jobs) - len(active)} finished")
+        
+        for job in reversed(jobs):
+            exp_col1, exp_col2 = st.columns([3, 1])
+            with exp_col1:
+                st.subheader(job.label)
+                st.progress(job.progress)
+                st.caption(f"{job.status.title()} · {job.message}" if job.message else job.status.title())
+                # Partial metrics stay visible for cancelled/failed runs; completed ones are in the charts below
+                if job.metrics and job.status != COMPLETED:
+                    st.plotly_chart(create_live_metrics_chart(job.metrics), width='stretch',
+                                    key=f"live_metrics_{job.id}")
+            with exp_col2:
+                if job.active:
+                    if st.button("Cancel", key=f"cancel_{job.id}"):
+                        queue.cancel(job.id)
+                elif job.status == COMPLETED:
+                    st.success("✅ Completed")
+                elif job.status == FAILED:
+                    st.error(f"❌ Failed: {str(job.error).splitlines()[0] if job.error else 'Unknown error'}")
+                else:
+                    st.warning("⏹️ Cancelled")
+        
+        # A newly finished job changes the results below: rerun the whole page once.
+        # Compared by id, since the queue keeps only the latest MAX_FINISHED_JOBS
+        finished = {job.id for job in jobs if not job.active}
+        if finished - st.session_state.jobs_finished_seen:
+            st.session_state.jobs_finished_seen = finished
+            st.rerun()
+    
+    # Only this fragment reruns while polling, not the whole dashboard; idle pages
+    # still poll slowly to pick up jobs submitted from other sessions
+    poll_every = 2 if queue.jobs(active_only=True) else 10
+    st.fragment(run_every=poll_every)(render)()
+
+# Display titles of the self-critique segments precomputed at grading time
+SELFCRIT_SEGMENT_TITLES = {
+    "draft": "Bước 1 — Nháp",
+    "critique": "Bước 2 — Tự kiểm",
+    "final": "Bước 3 — Cuối cùng",
+}
+
+CASE_PAGE_SIZES = [10, 25, 50, 100]
+
+def render_hallucination_case(case):
+    """Detail view of one hallucination case (only rendered while its expander is open)"""
+    prompt_type = case.get('Prompt_Type', 'Unknown')
+    
+    
+    # Basic info
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"**API:** {case['API']}")
+        st.write(f"**Dataset:** {case['Dataset']}")
+        st.write(f"**Model:** {case.get('Model', 'Unknown')}")
+        
+        # Prominent prompt type display
+        if prompt_type == 'Direct':
+            st.info(f"🎯 **Prompt Type:** Direct Prompting")
+        elif prompt_type == 'Self-Critique':
+            st.warning(f"🧠 **Prompt Type:** Self-Critique Prompting")
+        else:
+            st.write(f"**Prompt Type:** {prompt_type}")
+    
+    with col2:
+        eval_details = case.get('Evaluation_Details', {})
+        st.write("**Evaluation Result:**")
+        st.write(f"✅ Correct: {eval_details.get('is_correct', 'N/A')}")
+        st.write(f"❓ Uncertain: {eval_details.get('is_uncertain', 'N/A')}")
+        st.write(f"⚠️ Hallucination: {eval_details.get('is_hallucination', 'N/A')}")
+    
+    st.write("---")
+    
+    # Question and answers
+    st.write(f"**❓ Question:**")
+    st.write(case['Question'])
+    
+    st.write(f"**✅ Correct Answer:**")
+    st.success(case['Correct_Answer'])
+    
+    st.write(f"**🤖 LLM Answer (Final):**")
+    st.error(case['LLM_Answer'])
+    
+    # Show full answer if different from final span
+    if case.get('Full_Answer') and case['Full_Answer'] != case['LLM_Answer']:
+        st.write(f"**📝 Full LLM Response:**")
+        with st.expander("View full response"):
+            st.text(case['Full_Answer'])
+    
+    # If self-critique content is available, show the draft + stepwise content
+    if case.get('SelfCrit_Steps'):
+        st.write("**🧠 Self-Critique Process Analysis:**")
+        with st.expander("🔍 View detailed self-critique reasoning steps", expanded=True):
+            st.markdown("**Quá trình suy luận của model từng bước:**")
+            
+            # Display the self-critique content with better formatting
+            selfcrit_content = case.get('SelfCrit_Steps', '')
+            
+            # Segments were split once when grading; only display them here
+            segments = case.get('SelfCrit_Segments') or {}
+            if segments:
+                shown = [segment for segment in SELFCRIT_SEGMENT_TITLES if segment in segments]
+                for i, segment in enumerate(shown):
+                    st.markdown(f"### 📝 {SELFCRIT_SEGMENT_TITLES[segment]}")
+                    st.markdown(segments[segment])
+                    if i < len(shown) - 1:
+                        st.markdown("---")
+            else:
+                # Fallback: display as-is if no clear step structure
+                st.markdown("**Nội dung Self-Critique:**")
+                st.text(selfcrit_content)
+            
+            # Add analysis of what went wrong
+            st.markdown("### 🔍 Phân tích kết quả:")
+            eval_details = case.get('Evaluation_Details', {})
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.error(f"❌ **Lý do Hallucination:** {eval_details.get('reasoning', 'N/A')}")
+            with col2:
+                st.warning(f"📊 **Chi tiết đánh giá:** {eval_details.get('calculation_steps', 'N/A')}")
+            
+            # Show final extracted answer vs correct answer
+            st.markdown("### 📝 So sánh kết quả:")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**✅ Đáp án đúng:**")
+                st.success(case.get('Correct_Answer', 'N/A'))
+            with col2:
+                st.markdown("**🤖 Đáp án model (được trích xuất):**")
+                st.error(case.get('LLM_Answer', 'N/A'))
+
+    # Evaluation methodology
+    st.write("**🔍 Evaluation Methodology:**")
+    eval_details = case.get('Evaluation_Details', {})
+    
+    st.info(f"**Calculation Steps:** {eval_details.get('calculation_steps', 'N/A')}")
+    st.info(f"**Logic:** {eval_details.get('reasoning', 'N/A')}")
+    
+    # Prompt information — show reconstructed prompt and full self-critique steps when available
+    st.write("**📋 Prompt Used:**")
+    if case['Prompt_Type'] == 'Direct':
+        prompt_text = case.get('Direct_Prompt') or "(Prompt not available)"
+        with st.expander("View prompt used"):
+            st.code(prompt_text, language="text")
+    else:
+        prompt_text = case.get('SelfCrit_Prompt') or "(Prompt not available)"
+        with st.expander("View prompt used"):
+            st.code(prompt_text, language="text")
+
+@st.fragment
+def show_hallucination_cases():
+    """Filtered, paginated hallucination cases; only the current page is rendered"""
+    results = load_cached_results()
+    case_index = cached_aggregate("hallucination_case_index")
+    if case_index is None or case_index.empty:
+        st.info("No hallucination cases found in the existing results")
+        return
+    
+    # Filters
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with filter_col1:
+        apis = st.multiselect("API", sorted(case_index["API"].unique()), key="cases_api")
+    with filter_col2:
+        datasets = st.multiselect("Dataset", sorted(case_index["Dataset"].unique()), key="cases_dataset")
+    with filter_col3:
+        prompt_types = st.multiselect("Prompt type", ["Direct", "Self-Critique"], key="cases_prompt_type")
+    
+    cases = case_index
+    if apis:
+        cases = cases[cases["API"].isin(apis)]
+    if datasets:
+        cases = cases[cases["Dataset"].isin(datasets)]
+    if prompt_types:
+        cases = cases[cases["Prompt_Type"].isin(prompt_types)]
+    
+    st.write(f"**Found {len(cases)} hallucination cases** ({len(case_index)} across all APIs)")
+    if cases.empty:
+        return
+    
+    # Pagination
+    page_col1, page_col2 = st.columns(2)
+    with page_col1:
+        page_size = st.selectbox("Cases per page", CASE_PAGE_SIZES, index=0, key="cases_page_size")
+    n_pages = (len(cases) - 1) // page_size + 1
+    with page_col2:
+        page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key="cases_page")
+    start = (min(int(page), n_pages) - 1) * page_size
+    
+    for i, case in enumerate(cases.iloc[start:start + page_size].to_dict("records"), start + 1):
+        question = case['Question']
+        question_preview = question[:80] + "..." if len(question) > 80 else question
+        
+        # Add prompt type badge to the expander title
+        prompt_badge = {"Direct": "🎯 Direct", "Self-Critique": "🧠 Self-Critique"}.get(case['Prompt_Type'], "❓ Unknown")
+        expander_title = f"**Case {i}:** {case['API']} · {case['Dataset']} · {prompt_badge} | {question_preview}"
+        
+        # Keyed per case so the open state survives paging; details are only built while open
+        expander = st.expander(expander_title, on_change="rerun",
+                               key=f"case_{case['API']}_{case['Dataset']}_{case['Prompt_Type']}_{case['row']}")
+        if expander.open:
+            with expander:
+                render_hallucination_case(hallucination_case(results, case))
+
+def headline_columns(headline):
+    """Display columns of a handle's headline metrics (see manifest.headline_metrics)"""
+    direct_correct = headline.get("direct_correct_rate", 0)
+    selfcrit_correct = headline.get("selfcrit_correct_rate", 0)
+    return {
+        "Accuracy (Direct)": direct_correct,
+        "Accuracy (Self-Critique)": selfcrit_correct,
+        "Hallucination Rate (Direct)": headline.get("direct_hallucination_rate", 0),
+        "Hallucination Rate (Self-Critique)": headline.get("selfcrit_hallucination_rate", 0),
+        "Accuracy Gain": selfcrit_correct - direct_correct,
+        "Hallucination Reduction": headline.get("improvement_hallucination_delta", 0),
+    }
+
 def create_metrics_chart(results_data):
     """Create comparison chart of metrics across APIs"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if not results_data:
         return None
     
     # Prepare data for plotting
     chart_data = []
-    for (api, dataset), result in results_data.items():
-        if "metrics" in result:
-            metrics = result["metrics"]
+    for (api, model, dataset), result in results_data.items():
+        if "headline" in result:
             chart_data.append({
                 "API": api,
+                "Model": model,
                 "Dataset": dataset,
-                "Accuracy (Direct)": metrics.get("accuracy_direct", 0),
-                "Accuracy (Self-Critique)": metrics.get("accuracy_selfcrit", 0),
-                "Hallucination Rate (Direct)": metrics.get("hallu_rate_direct", 0),
-                "Hallucination Rate (Self-Critique)": metrics.get("hallu_rate_selfcrit", 0),
-                "Accuracy Gain": metrics.get("accuracy_gain", 0),
-                "Hallucination Reduction": metrics.get("hallu_reduction", 0)
+                **headline_columns(result["headline"])
             })
     
     if not chart_data:
@@ -397,55 +673,55 @@ def create_metrics_chart(results_data):
     )
     
     # Accuracy comparison
-    for api in df["API"].unique():
-        api_data = df[df["API"] == api]
+    for (api, model), api_data in df.groupby(["API", "Model"], sort=False):
         color = API_CONFIGS.get(api, {}).get("color", "#000000")
+        series = f"{api} · {model}" if model else api
         
         fig.add_trace(
-            go.Bar(name=f"{api} (Direct)", x=api_data["Dataset"], y=api_data["Accuracy (Direct)"], 
+            go.Bar(name=f"{series} (Direct)", x=api_data["Dataset"], y=api_data["Accuracy (Direct)"], 
                    marker_color=color, opacity=0.7),
             row=1, col=1
         )
         fig.add_trace(
-            go.Bar(name=f"{api} (Self-Critique)", x=api_data["Dataset"], y=api_data["Accuracy (Self-Critique)"], 
+            go.Bar(name=f"{series} (Self-Critique)", x=api_data["Dataset"], y=api_data["Accuracy (Self-Critique)"], 
                    marker_color=color, opacity=1.0),
             row=1, col=1
         )
     
     # Hallucination rate
-    for api in df["API"].unique():
-        api_data = df[df["API"] == api]
+    for (api, model), api_data in df.groupby(["API", "Model"], sort=False):
         color = API_CONFIGS.get(api, {}).get("color", "#000000")
+        series = f"{api} · {model}" if model else api
         
         fig.add_trace(
-            go.Bar(name=f"{api} (Direct)", x=api_data["Dataset"], y=api_data["Hallucination Rate (Direct)"], 
+            go.Bar(name=f"{series} (Direct)", x=api_data["Dataset"], y=api_data["Hallucination Rate (Direct)"], 
                    marker_color=color, opacity=0.7, showlegend=False),
             row=1, col=2
         )
         fig.add_trace(
-            go.Bar(name=f"{api} (Self-Critique)", x=api_data["Dataset"], y=api_data["Hallucination Rate (Self-Critique)"], 
+            go.Bar(name=f"{series} (Self-Critique)", x=api_data["Dataset"], y=api_data["Hallucination Rate (Self-Critique)"], 
                    marker_color=color, opacity=1.0, showlegend=False),
             row=1, col=2
         )
     
     # Accuracy gain
-    for api in df["API"].unique():
-        api_data = df[df["API"] == api]
+    for (api, model), api_data in df.groupby(["API", "Model"], sort=False):
         color = API_CONFIGS.get(api, {}).get("color", "#000000")
+        series = f"{api} · {model}" if model else api
         
         fig.add_trace(
-            go.Bar(name=api, x=api_data["Dataset"], y=api_data["Accuracy Gain"], 
+            go.Bar(name=series, x=api_data["Dataset"], y=api_data["Accuracy Gain"], 
                    marker_color=color, showlegend=False),
             row=2, col=1
         )
     
     # Hallucination reduction
-    for api in df["API"].unique():
-        api_data = df[df["API"] == api]
+    for (api, model), api_data in df.groupby(["API", "Model"], sort=False):
         color = API_CONFIGS.get(api, {}).get("color", "#000000")
+        series = f"{api} · {model}" if model else api
         
         fig.add_trace(
-            go.Bar(name=api, x=api_data["Dataset"], y=api_data["Hallucination Reduction"], 
+            go.Bar(name=series, x=api_data["Dataset"], y=api_data["Hallucination Reduction"], 
                    marker_color=color, showlegend=False),
             row=2, col=2
         )
@@ -474,7 +750,8 @@ def main():
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     
-    existing_results = load_all_existing_results()
+    # Cached across reruns and sessions; reloaded only when result files change
+    existing_results = load_cached_results()
     
     if existing_results:
         st.success(f"Found {len(existing_results)} existing result sets")
@@ -484,7 +761,7 @@ def main():
         
         with tab1:
             st.subheader("API Performance Comparison")
-            comparison_chart = create_api_comparison_chart(existing_results)
+            comparison_chart = cached_aggregate("api_comparison_chart")
             if comparison_chart:
                 st.plotly_chart(comparison_chart, width='stretch')
             else:
@@ -492,13 +769,13 @@ def main():
             
             # Hallucination analysis
             st.subheader("Hallucination Analysis by API")
-            hallu_chart = create_hallucination_analysis_chart(existing_results)
+            hallu_chart = cached_aggregate("hallucination_analysis_chart")
             if hallu_chart:
                 st.plotly_chart(hallu_chart, width='stretch')
         
         with tab2:
             st.subheader("Detailed Performance Metrics")
-            metrics_table = create_detailed_metrics_table(existing_results)
+            metrics_table = cached_aggregate("detailed_metrics_table")
             if metrics_table is not None:
                 st.dataframe(metrics_table, width='stretch')
             else:
@@ -513,190 +790,7 @@ def main():
             - ⚠️ **Hallucination**: NOT correct AND NOT uncertain = Confident but wrong answer
             """)
             
-            hallucination_cases = extract_hallucination_cases(existing_results, 20)
-            
-            if hallucination_cases:
-                st.write(f"**Found {len(hallucination_cases)} hallucination cases across all APIs:**")
-                
-                # Group by API
-                api_groups = {}
-                for case in hallucination_cases:
-                    api = case['API']
-                    if api not in api_groups:
-                        api_groups[api] = []
-                    api_groups[api].append(case)
-                
-                for api, cases in api_groups.items():
-                    # Count by prompt type
-                    direct_cases = [c for c in cases if c.get('Prompt_Type') == 'Direct']
-                    selfcrit_cases = [c for c in cases if c.get('Prompt_Type') == 'Self-Critique']
-                    
-                    st.subheader(f"{api} - {len(cases)} hallucination cases")
-                    
-                    # Show breakdown
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("🎯 Direct Cases", len(direct_cases))
-                    with col2:
-                        st.metric("🧠 Self-Critique Cases", len(selfcrit_cases))
-                    
-                    for i, case in enumerate(cases, 1):
-                        question_preview = case['Question'][:80] + "..." if len(case['Question']) > 80 else case['Question']
-                        
-                        # Add prompt type badge to the expander title
-                        prompt_type = case.get('Prompt_Type', 'Unknown')
-                        if prompt_type == 'Direct':
-                            prompt_badge = "🎯 Direct"
-                            badge_color = "blue"
-                        elif prompt_type == 'Self-Critique':
-                            prompt_badge = "🧠 Self-Critique"
-                            badge_color = "orange"
-                        else:
-                            prompt_badge = "❓ Unknown"
-                            badge_color = "gray"
-                        
-                        expander_title = f"**Case {i}:** {prompt_badge} | {question_preview}"
-                        
-                        with st.expander(expander_title):
-                            
-                            # Basic info
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.write(f"**API:** {case['API']}")
-                                st.write(f"**Dataset:** {case['Dataset']}")
-                                st.write(f"**Model:** {case.get('Model', 'Unknown')}")
-                                
-                                # Prominent prompt type display
-                                if prompt_type == 'Direct':
-                                    st.info(f"🎯 **Prompt Type:** Direct Prompting")
-                                elif prompt_type == 'Self-Critique':
-                                    st.warning(f"🧠 **Prompt Type:** Self-Critique Prompting")
-                                else:
-                                    st.write(f"**Prompt Type:** {prompt_type}")
-                            
-                            with col2:
-                                eval_details = case.get('Evaluation_Details', {})
-                                st.write("**Evaluation Result:**")
-                                st.write(f"✅ Correct: {eval_details.get('is_correct', 'N/A')}")
-                                st.write(f"❓ Uncertain: {eval_details.get('is_uncertain', 'N/A')}")
-                                st.write(f"⚠️ Hallucination: {eval_details.get('is_hallucination', 'N/A')}")
-                            
-                            st.write("---")
-                            
-                            # Question and answers
-                            st.write(f"**❓ Question:**")
-                            st.write(case['Question'])
-                            
-                            st.write(f"**✅ Correct Answer:**")
-                            st.success(case['Correct_Answer'])
-                            
-                            st.write(f"**🤖 LLM Answer (Final):**")
-                            st.error(case['LLM_Answer'])
-                            
-                            # Show full answer if different from final span
-                            if case.get('Full_Answer') and case['Full_Answer'] != case['LLM_Answer']:
-                                st.write(f"**📝 Full LLM Response:**")
-                                with st.expander("View full response"):
-                                    st.text(case['Full_Answer'])
-                            
-                            # If self-critique content is available, show the draft + stepwise content
-                            if case.get('SelfCrit_Steps'):
-                                st.write("**🧠 Self-Critique Process Analysis:**")
-                                with st.expander("🔍 View detailed self-critique reasoning steps", expanded=True):
-                                    st.markdown("**Quá trình suy luận của model từng bước:**")
-                                    
-                                    # Display the self-critique content with better formatting
-                                    selfcrit_content = case.get('SelfCrit_Steps', '')
-                                    
-                                    # Try to parse and format the steps if they follow the expected format
-                                    if "Bước" in selfcrit_content:
-                                        # Split by steps and format nicely
-                                        import re
-                                        
-                                        # Split by **Bước or just Bước patterns (more flexible)
-                                        step_pattern = r'(\*\*Bước\s+\d+[^*]*\*\*|Bước\s+\d+[^—\n]*[—\-][^*\n]*)'
-                                        parts = re.split(step_pattern, selfcrit_content)
-                                        
-                                        current_step = None
-                                        step_content = ""
-                                        step_count = 0
-                                        
-                                        for part in parts:
-                                            part = part.strip()
-                                            if not part:
-                                                continue
-                                                
-                                            # Check if this is a step header
-                                            if re.match(r'(\*\*)?Bước\s+\d+', part):
-                                                # If we have a previous step, display it
-                                                if current_step and step_content:
-                                                    step_count += 1
-                                                    st.markdown(f"### 📝 {current_step}")
-                                                    st.markdown(step_content.strip())
-                                                    st.markdown("---")
-                                                
-                                                # Start new step
-                                                current_step = part.replace("**", "").strip()
-                                                step_content = ""
-                                            else:
-                                                # This is step content
-                                                step_content += part + "\n"
-                                        
-                                        # Display the last step
-                                        if current_step and step_content:
-                                            step_count += 1
-                                            st.markdown(f"### 📝 {current_step}")
-                                            st.markdown(step_content.strip())
-                                            
-                                        # If no steps were found, try simpler parsing
-                                        if step_count == 0:
-                                            st.markdown("**Nội dung Self-Critique (không phân tích được theo bước):**")
-                                            st.text(selfcrit_content)
-                                            
-                                    else:
-                                        # Fallback: display as-is if no clear step structure
-                                        st.markdown("**Nội dung Self-Critique:**")
-                                        st.text(selfcrit_content)
-                                    
-                                    # Add analysis of what went wrong
-                                    st.markdown("### 🔍 Phân tích kết quả:")
-                                    eval_details = case.get('Evaluation_Details', {})
-                                    
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        st.error(f"❌ **Lý do Hallucination:** {eval_details.get('reasoning', 'N/A')}")
-                                    with col2:
-                                        st.warning(f"📊 **Chi tiết đánh giá:** {eval_details.get('calculation_steps', 'N/A')}")
-                                    
-                                    # Show final extracted answer vs correct answer
-                                    st.markdown("### 📝 So sánh kết quả:")
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        st.markdown("**✅ Đáp án đúng:**")
-                                        st.success(case.get('Correct_Answer', 'N/A'))
-                                    with col2:
-                                        st.markdown("**🤖 Đáp án model (được trích xuất):**")
-                                        st.error(case.get('LLM_Answer', 'N/A'))
-            
-                            # Evaluation methodology
-                            st.write("**🔍 Evaluation Methodology:**")
-                            eval_details = case.get('Evaluation_Details', {})
-                            
-                            st.info(f"**Calculation Steps:** {eval_details.get('calculation_steps', 'N/A')}")
-                            st.info(f"**Logic:** {eval_details.get('reasoning', 'N/A')}")
-                            
-                            # Prompt information — show reconstructed prompt and full self-critique steps when available
-                            st.write("**📋 Prompt Used:**")
-                            if case['Prompt_Type'] == 'Direct':
-                                prompt_text = case.get('Direct_Prompt') or "(Prompt not available)"
-                                with st.expander("View prompt used"):
-                                    st.code(prompt_text, language="text")
-                            else:
-                                prompt_text = case.get('SelfCrit_Prompt') or "(Prompt not available)"
-                                with st.expander("View prompt used"):
-                                    st.code(prompt_text, language="text")
-            else:
-                st.info("No hallucination cases found in the existing results")
+            show_hallucination_cases()
         
         with tab4:
             st.subheader("Generate Enhanced Reports")
@@ -705,47 +799,60 @@ def main():
             
             with col1:
                 st.write("**Individual API Reports**")
-                # Select API for detailed report
-                available_apis = list(set([api for api, dataset in existing_results.keys()]))
+                # Select API and dataset for detailed report
+                available_apis = sorted(set([api for api, dataset in existing_results.keys()]))
                 selected_api = st.selectbox("Select API for detailed report:", available_apis)
+                api_datasets = sorted(dataset for api, dataset in existing_results.keys() if api == selected_api)
+                selected_dataset = st.selectbox("Select dataset:", api_datasets)
                 
-                if st.button("Generate API Report", type="secondary"):
+                result = existing_results.get((selected_api, selected_dataset))
+                if result and 'graded_data' in result and result.get('metrics'):
                     try:
-                        # Find results for selected API
-                        api_results = {k: v for k, v in existing_results.items() if k[0] == selected_api}
+                        from src import reports
                         
-                        if api_results:
-                            # Take the first dataset for this API
-                            (api, dataset), result = list(api_results.items())[0]
-                            
-                            # Create report using built-in evaluator
-                            from src.evaluator import HallucinationEvaluator
-                            evaluator = HallucinationEvaluator()
-                            
-                            output_path = f"enhanced_report_{api}_{dataset}.docx"
-                            evaluator.generate_word_report(
-                                result['graded_data'], 
-                                result['metrics'], 
-                                output_path
-                            )
-                            
-                            st.success(f"✅ Enhanced report generated: {output_path}")
-                            
-                            # Show download link
-                            if os.path.exists(output_path):
-                                with open(output_path, "rb") as file:
-                                    st.download_button(
-                                        label="📥 Download API Report",
-                                        data=file.read(),
-                                        file_name=output_path,
-                                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                                    )
-                        else:
-                            st.error("No results found for selected API")
-                            
+                        graded_data = graded_texts(result)
+                        page_size = st.select_slider("Questions per page:", options=[25, 50, 100, 200], value=reports.DEFAULT_PAGE_SIZE)
+                        pages = reports.page_count(len(graded_data), page_size)
+                        page = st.number_input(f"Page (1-{pages}):", min_value=1, max_value=pages, value=1, step=1)
+                        
+                        # Quick-look report renders in milliseconds; the .docx is only built on download
+                        with st.expander("📄 Report preview", expanded=True):
+                            st.markdown(reports.render_markdown_report(graded_data, result['metrics'], page=int(page), page_size=page_size))
+                        
+                        base_name = f"report_{selected_api}_{selected_dataset}"
+                        st.download_button(
+                            label="📥 Download HTML Report",
+                            data=reports.render_html_report(graded_data, result['metrics'], page_size=page_size),
+                            file_name=f"{base_name}.html",
+                            mime="text/html"
+                        )
+                        st.download_button(
+                            label="📥 Download Word Report",
+                            data=lambda: reports.word_report_bytes(graded_data, result['metrics']),
+                            file_name=f"{base_name}.docx",
+                            mime=reports.DOCX_MIME
+                        )
                     except Exception as e:
                         st.error(f"Error generating report: {e}")
-            
+                else:
+                    st.info("No graded results found for selected API and dataset")
+
+                st.write("**All Result Sets**")
+                if st.button("🔁 Regenerate All Reports"):
+                    try:
+                        from src import reports
+
+                        with st.spinner("Rendering reports for every API and dataset..."):
+                            summary = reports.generate_all_reports(os.path.join(parent_dir, "data", "results"))
+                        st.success(
+                            f"✅ Rendered {len(summary['rendered'])} report(s), "
+                            f"{len(summary['skipped'])} unchanged"
+                        )
+                        if summary['failed']:
+                            st.error(f"Failed: {', '.join(summary['failed'])}")
+                    except Exception as e:
+                        st.error(f"Error generating reports: {e}")
+
             with col2:
                 st.write("**Comprehensive Hallucination Analysis**")
                 st.write("Phân tích mẫu hình hallucination và đề xuất cải thiện prompt")
@@ -757,7 +864,7 @@ def main():
                             st.info("📊 Using enhanced analytics from loaded results...")
                             
                             # Calculate comprehensive stats from loaded data
-                            all_results = load_all_existing_results()
+                            all_results = load_cached_results()
                             if all_results:
                                 total_cases = len(all_results)
                                 hallucination_cases = extract_hallucination_cases(all_results)
@@ -861,72 +968,37 @@ def main():
     # Experiment controls
     st.sidebar.subheader("🚀 Run Experiments")
     
-    if st.sidebar.button("Start Experiments", type="primary", disabled=st.session_state.experiment_running):
+    queue = get_job_queue()
+    if st.sidebar.button("Start Experiments", type="primary"):
         if not selected_apis:
             st.sidebar.error("Please select at least one API")
         elif not selected_datasets:
             st.sidebar.error("Please select at least one dataset")
         else:
-            st.session_state.experiment_running = True
-            st.session_state.experiment_results = {}
+            # Experiments run on the shared queue's workers; the page only polls their progress
+            duplicates = []
+            for api_name, model_name in selected_apis.items():
+                for dataset in selected_datasets:
+                    _, created = queue.submit(
+                        f"{api_name} → {dataset}", "experiment",
+                        {"api": api_name, "model": model_name, "dataset": dataset},
+                        provider=api_name.lower()
+                    )
+                    if not created:
+                        duplicates.append(f"{api_name} → {dataset}")
+            if duplicates:
+                st.session_state.duplicate_jobs = duplicates
             st.rerun()
+    duplicates = st.session_state.pop('duplicate_jobs', None)
+    if duplicates:
+        st.sidebar.info("Already queued or running, not submitted again: " + ", ".join(duplicates))
     
     # Main content area
-    if st.session_state.experiment_running:
-        st.header("🔄 Running Experiments...")
-        
-        total_experiments = len(selected_apis) * len(selected_datasets)
-        experiment_count = 0
-        
-        # Create progress tracking
-        overall_progress = st.progress(0)
-        overall_status = st.empty()
-        
-        # Run experiments
-        for api_name, model_name in selected_apis.items():
-            for dataset in selected_datasets:
-                experiment_count += 1
-                
-                overall_status.text(f"Experiment {experiment_count}/{total_experiments}: {api_name} on {dataset}")
-                
-                # Individual experiment progress
-                exp_col1, exp_col2 = st.columns([3, 1])
-                
-                with exp_col1:
-                    st.subheader(f"{api_name} → {dataset}")
-                    exp_progress = st.progress(0)
-                    exp_status = st.empty()
-                
-                # Run the experiment
-                result = run_experiment(api_name, model_name, dataset, exp_progress, exp_status, config_manager)
-                
-                # Store result
-                st.session_state.experiment_results[(api_name, dataset)] = result
-                
-                # Show result
-                with exp_col2:
-                    if "error" in result:
-                        st.error(f"❌ Failed: {result['error']}")
-                    else:
-                        st.success("✅ Completed")
-                        if "metrics" in result:
-                            metrics = result["metrics"]
-                            st.metric("Accuracy Gain", f"{metrics.get('accuracy_gain', 0):.3f}")
-                            st.metric("Hallu Reduction", f"{metrics.get('hallu_reduction', 0):.3f}")
-                
-                # Update overall progress
-                overall_progress.progress(experiment_count / total_experiments)
-        
-        # Mark experiments as completed
-        st.session_state.experiment_running = False
-        overall_status.text("✅ All experiments completed!")
-        
-        # Auto refresh to show results
-        time.sleep(1)
-        st.rerun()
+    show_experiment_jobs(queue)
+    st.session_state.experiment_results = finished_experiment_results(queue)
     
     # Results dashboard
-    if st.session_state.experiment_results and not st.session_state.experiment_running:
+    if st.session_state.experiment_results:
         st.header("📊 Results Dashboard")
         
         # Create tabs for different views
@@ -961,24 +1033,20 @@ def main():
             
             # Prepare detailed results table
             detailed_data = []
-            for (api, dataset), result in st.session_state.experiment_results.items():
-                if "metrics" in result:
-                    metrics = result["metrics"]
+            for (api, model, dataset), result in st.session_state.experiment_results.items():
+                if "headline" in result:
                     detailed_data.append({
                         "API": api,
+                        "Model": model,
                         "Dataset": dataset,
-                        "Questions": metrics.get("n_questions", 0),
-                        "Accuracy (Direct)": f"{metrics.get('accuracy_direct', 0):.3f}",
-                        "Accuracy (Self-Critique)": f"{metrics.get('accuracy_selfcrit', 0):.3f}",
-                        "Hallucination Rate (Direct)": f"{metrics.get('hallu_rate_direct', 0):.3f}",
-                        "Hallucination Rate (Self-Critique)": f"{metrics.get('hallu_rate_selfcrit', 0):.3f}",
-                        "Accuracy Gain": f"{metrics.get('accuracy_gain', 0):.3f}",
-                        "Hallucination Reduction": f"{metrics.get('hallu_reduction', 0):.3f}",
+                        "Questions": result["questions"],
+                        **{column: f"{value:.3f}" for column, value in headline_columns(result["headline"]).items()},
                         "Status": "✅ Success" if "success" in result else "❌ Failed"
                     })
                 else:
                     detailed_data.append({
                         "API": api,
+                        "Model": model,
                         "Dataset": dataset,
                         "Questions": 0,
                         "Accuracy (Direct)": "N/A",
@@ -1003,50 +1071,57 @@ def main():
                 if st.button("📊 Generate Cross-Model Report"):
                     with st.spinner("Generating comprehensive report..."):
                         try:
-                            result = subprocess.run("python scripts/cross_model_comparison.py", 
-                                                   shell=True, capture_output=True, text=True)
+                            # The script writes into data/results/reports, relative to the project root
+                            result = subprocess.run([sys.executable, "scripts/cross_model_comparison.py"],
+                                                    cwd=parent_dir, capture_output=True, text=True)
                             if result.returncode == 0:
                                 st.success("✅ Report generated successfully!")
-                                
-                                # Show download link if report exists
-                                report_file = "cross_model_comparison_report.txt"
-                                if os.path.exists(report_file):
-                                    with open(report_file, 'r', encoding='utf-8') as f:
-                                        report_content = f.read()
-                                    
-                                    st.download_button(
-                                        label="📥 Download Report",
-                                        data=report_content,
-                                        file_name=f"hallucination_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                                        mime="text/plain"
-                                    )
                             else:
                                 st.error(f"Report generation failed: {result.stderr}")
                         except Exception as e:
                             st.error(f"Error generating report: {str(e)}")
+                
+                # Show download link if report exists; the file is only read when downloaded
+                from src.export import reports_dir
+                report_file = Path(reports_dir(RESULTS_DIR)) / "cross_model_comparison_report.txt"
+                if report_file.exists():
+                    st.download_button(
+                        label="📥 Download Report",
+                        data=report_file.read_bytes,
+                        file_name=f"hallucination_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                        mime="text/plain"
+                    )
             
             with col2:
-                # Export raw data as CSV
-                if st.session_state.experiment_results:
-                    # Combine all results into one CSV
-                    all_data = []
-                    for (api, dataset), result in st.session_state.experiment_results.items():
-                        if "graded_data" in result and not result["graded_data"].empty:
-                            df = result["graded_data"].copy()
-                            df["api"] = api
-                            df["dataset"] = dataset
-                            all_data.append(df)
-                    
-                    if all_data:
-                        combined_df = pd.concat(all_data, ignore_index=True)
-                        csv_data = combined_df.to_csv(index=False)
-                        
-                        st.download_button(
-                            label="📥 Download Raw Data (CSV)",
-                            data=csv_data,
-                            file_name=f"experiment_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
+                # Bulk export: a zip of the selected result sets, built file by file on disk
+                from src.export import EXPORT_KINDS, export_results
+                from src.manifest import result_sets
+                
+                set_keys = [f"{entry['provider']}/{entry['dataset']}" for entry in result_sets(RESULTS_DIR)]
+                selected_sets = st.multiselect("Result sets", set_keys, default=set_keys, key="export_sets")
+                selected_kinds = st.multiselect("Files", list(EXPORT_KINDS), default=list(EXPORT_KINDS),
+                                                key="export_kinds")
+                
+                if st.button("📦 Build Results Archive", disabled=not (selected_sets and selected_kinds)):
+                    with st.spinner("Writing archive..."):
+                        try:
+                            summary = export_results(RESULTS_DIR, keys=selected_sets, kinds=selected_kinds)
+                            st.session_state.export_archive = {**summary, "keys": selected_sets,
+                                                               "kinds": selected_kinds}
+                        except Exception as e:
+                            st.error(f"Error building archive: {e}")
+                
+                archive = st.session_state.get('export_archive')
+                if archive:
+                    st.caption(f"{archive['result_sets']} result set(s), {archive['files']} file(s), "
+                               f"{archive['size'] / 1e6:.1f} MB")
+                    # Deferred: the archive is only opened (or rebuilt, if pruned) when the button is clicked
+                    st.download_button(
+                        label="📥 Download Results (ZIP)",
+                        data=partial(read_archive_bytes, archive['path'], archive['keys'], archive['kinds']),
+                        file_name=os.path.basename(archive['path']),
+                        mime="application/zip"
+                    )
     
     # Footer
     st.sidebar.markdown("---")
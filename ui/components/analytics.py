@@ -5,12 +5,11 @@ import streamlit as st
 import pandas as pd
 import json
 from pathlib import Path
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.express as px
 
 def create_metrics_comparison(metrics_data):
     """Create metrics comparison chart"""
+    import plotly.graph_objects as go
+
     if not metrics_data:
         return None
     
@@ -55,6 +54,8 @@ def create_metrics_comparison(metrics_data):
 
 def create_hallucination_trend(results_data):
     """Create hallucination trend analysis"""
+    import plotly.graph_objects as go
+
     if not results_data:
         return None
     
@@ -87,6 +88,9 @@ def create_hallucination_trend(results_data):
 
 def create_api_comparison_chart(results_data):
     """Create detailed API comparison chart"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if not results_data:
         return None
     
@@ -156,6 +160,8 @@ def create_api_comparison_chart(results_data):
 
 def create_dataset_difficulty_analysis(results_data):
     """Analyze dataset difficulty across models"""
+    import plotly.express as px
+
     if not results_data:
         return None
     
@@ -252,6 +258,8 @@ def show_question_level_analysis(results_data):
 
 def show_improvement_analysis(results_data):
     """Analyze self-critique improvement patterns"""
+    import plotly.express as px
+
     st.subheader("📈 Self-Critique Improvement Analysis")
     
     if not results_data:
@@ -8,11 +8,19 @@ import pandas as pd
 import json
 import os
 from pathlib import Path
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.express as px
 from typing import Dict, List, Tuple
-import glob
+from functools import partial
+
+try:
+    from src.evaluator import selfcrit_segments
+    from src.manifest import LazyResult, entry_path, load_entry_metrics, load_manifest, manifest_path, result_sets
+    from src.storage import ARROW_CACHE_DIR, FORMAT_EXTENSIONS, mapped_results, prompt_text, prune_arrow_cache, read_results
+    from src.warehouse import open_warehouse, run_snapshot_path, with_texts
+except ImportError:
+    from evaluator import selfcrit_segments
+    from manifest import LazyResult, entry_path, load_entry_metrics, load_manifest, manifest_path, result_sets
+    from storage import ARROW_CACHE_DIR, FORMAT_EXTENSIONS, mapped_results, prompt_text, prune_arrow_cache, read_results
+    from warehouse import open_warehouse, run_snapshot_path, with_texts
 
 # Import default prompt templates so we can reconstruct prompts for display
 try:
@@ -33,8 +41,44 @@ except Exception:
         "Câu hỏi: {q}"
     )
 
-def load_all_existing_results(results_dir=None):
-    """Load all existing results from all API providers"""
+def default_results_dir():
+    """data/results of the project, as an absolute path like in UI app.py"""
+    # Get the project root directory (parent of ui directory)
+    current_file = os.path.abspath(__file__)
+    ui_components_dir = os.path.dirname(current_file)  # components/
+    ui_dir = os.path.dirname(ui_components_dir)        # ui/
+    project_root = os.path.dirname(ui_dir)             # project root
+    return os.path.join(project_root, "data", "results")
+
+def results_signature(results_dir=None):
+    """(results_dir, (path, mtime, size) of the manifest and every file it lists)
+    
+    Every writer updates the manifest, so this changes exactly when results
+    change; it only costs a few stat calls per rerun.
+    """
+    results_dir = str(results_dir or default_results_dir())
+    paths = [manifest_path(results_dir)]
+    for entry in load_manifest(results_dir)["result_sets"].values():
+        paths += [entry_path(results_dir, entry, kind) for kind in ("graded", "metrics") if kind in entry]
+    
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return results_dir, tuple(signature)
+
+def load_all_existing_results(results_dir=None, columns=None):
+    """Load all existing results from all API providers
+    
+    columns limits which graded-result columns are read (e.g. GRADE_COLUMNS
+    for views that only need grade flags); None loads everything. Results are
+    keyed by (api, dataset); with the warehouse, api is "provider/model" for
+    providers with several models (the manifest holds one model per provider
+    and dataset).
+    """
     import os
     from pathlib import Path
     
@@ -42,12 +86,7 @@ def load_all_existing_results(results_dir=None):
     
     # Use absolute path like in UI app.py
     if results_dir is None:
-        # Get the project root directory (parent of ui directory)
-        current_file = os.path.abspath(__file__)
-        ui_components_dir = os.path.dirname(current_file)  # components/
-        ui_dir = os.path.dirname(ui_components_dir)        # ui/
-        project_root = os.path.dirname(ui_dir)             # project root
-        results_dir = os.path.join(project_root, "data", "results")
+        results_dir = default_results_dir()
     
     results_path = Path(results_dir)
     if not results_path.exists():
@@ -68,64 +107,58 @@ def load_all_existing_results(results_dir=None):
             print(f"Results directory not found: {results_dir}")
         return results_data
     
-    # Define API directories
-    api_dirs = ["openai", "deepseek", "gemini", "ollama"]
+    # Graded frames are memory-mapped from Arrow snapshots, so reruns and
+    # concurrent sessions share page-cache pages instead of private copies
+    arrow_cache_dir = os.path.join(results_dir, ARROW_CACHE_DIR)
+    snapshots = []
+
+    # Query the results warehouse, backfilled from the results manifest
+    warehouse = open_warehouse(results_dir)
+    if warehouse is not None:
+        with warehouse:
+            warehouse.import_results_dir(results_dir)
+            # Frames keep response texts as blob hashes; shown rows are resolved with graded_texts()
+            for result in warehouse.latest_results(columns=columns, arrow_cache_dir=arrow_cache_dir, text_refs=True):
+                # Keyed by label, so several models of one provider stay apart
+                result.update(api=result["label"], file_path=result["source"] or warehouse.db_path)
+                results_data[(result["label"], result["dataset"])] = result
+                snapshots.append(run_snapshot_path(arrow_cache_dir, result["run_id"], text_refs=True))
+        prune_arrow_cache(arrow_cache_dir, snapshots)
+        return results_data
     
-    for api in api_dirs:
-        api_path = results_path / api
-        if api_path.exists():
-            # Find all results files
-            graded_files = list(api_path.glob("*graded*.csv"))
-            metrics_files = list(api_path.glob("metrics*.json"))
-            
-            for graded_file in graded_files:
-                # Extract dataset name from filename
-                filename = graded_file.name
-                if "questions_50_hard" in filename:
-                    dataset = "questions_50_hard"
-                elif "scientific_facts_basic" in filename:
-                    dataset = "scientific_facts_basic"
-                elif "astronomy_hard" in filename:
-                    dataset = "astronomy_hard"
-                elif "mathematics_hard" in filename:
-                    dataset = "mathematics_hard"
-                elif "test_results" in filename:
-                    dataset = "test"
-                else:
-                    # General fallback for any other datasets
-                    dataset = filename.replace("results_graded_", "").replace(".csv", "")
-                
-                # Load graded results
-                try:
-                    graded_df = pd.read_csv(graded_file)
-                    
-                    # Find corresponding metrics file
-                    metrics_file = None
-                    for mf in metrics_files:
-                        if dataset in mf.name:
-                            metrics_file = mf
-                            break
-                    
-                    metrics = {}
-                    if metrics_file and metrics_file.exists():
-                        with open(metrics_file, 'r', encoding='utf-8') as f:
-                            metrics = json.load(f)
-                    
-                    results_data[(api, dataset)] = {
-                        "graded_data": graded_df,
-                        "metrics": metrics,
-                        "dataset": dataset,
-                        "api": api,
-                        "file_path": str(graded_file)
-                    }
-                    
-                except Exception as e:
-                    st.warning(f"Error loading {graded_file}: {e}")
+    # Without the warehouse, read the manifest; graded frames load on first access
+    for entry in result_sets(results_dir):
+        graded_file = entry_path(results_dir, entry, "graded")
+        if graded_file is None:
+            continue
+        try:
+            if graded_file.endswith(FORMAT_EXTENSIONS["arrow"]):
+                load_graded = partial(read_results, graded_file, columns=columns)
+            else:
+                # Snapshots are keyed by content hash, so a rewritten file gets a new one
+                snapshot = os.path.join(arrow_cache_dir, entry["provider"],
+                                        f"{entry['dataset']}-{entry['graded']['sha256'][:16]}{FORMAT_EXTENSIONS['arrow']}")
+                load_graded = partial(mapped_results, snapshot, partial(read_results, graded_file), columns)
+                snapshots.append(snapshot)
+            results_data[(entry["provider"], entry["dataset"])] = LazyResult(
+                load_graded,
+                cache_key=("file", graded_file, entry["graded"].get("sha256"), tuple(columns) if columns else None),
+                metrics=load_entry_metrics(results_dir, entry),
+                dataset=entry["dataset"],
+                api=entry["provider"],
+                file_path=graded_file
+            )
+        except Exception as e:
+            st.warning(f"Error loading {graded_file}: {e}")
     
+    prune_arrow_cache(arrow_cache_dir, snapshots)
     return results_data
 
 def create_api_comparison_chart(results_data):
     """Create comprehensive API comparison chart"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if not results_data:
         return None
     
@@ -223,6 +256,74 @@ def create_api_comparison_chart(results_data):
     
     return fig
 
+def graded_texts(result, rows=None):
+    """Rows of a result's graded frame (all by default) with response texts resolved
+
+    Warehouse-backed frames hold blob hashes; only the rows asked for are looked up.
+    """
+    df = result["graded_data"] if rows is None else rows
+    if result.get("text_db"):
+        return with_texts(df, result["text_db"])
+    return df
+
+def _hallucination_masks(df):
+    """Boolean hallucination mask per prompt type ("Direct", "Self-Critique")"""
+    masks = {}
+    for prompt_type, prefix, legacy_type in (("Direct", "direct", "direct"),
+                                             ("Self-Critique", "selfcrit", "self_critique")):
+        # Try different possible column names
+        if f'{prefix}_hallucination' in df.columns:
+            mask = df[f'{prefix}_hallucination'] == True
+        elif 'is_hallucinated' in df.columns and 'prompt_type' in df.columns:
+            mask = (df['is_hallucinated'] == True) & (df['prompt_type'] == legacy_type)
+        else:
+            continue
+        masks[prompt_type] = mask.fillna(False).astype(bool)
+    return masks
+
+def _case_record(api, dataset, row, prompt_type):
+    """Display record of one hallucination case (row of a graded frame)"""
+    prefix = "direct" if prompt_type == "Direct" else "selfcrit"
+    is_correct = row.get(f'{prefix}_correct', row.get('is_correct', False))
+    is_uncertain = row.get(f'{prefix}_uncertain', row.get('is_uncertain', False))
+    is_hallucination = row.get(f'{prefix}_hallucination', row.get('is_hallucinated', False))
+    
+    # Try the stored prompt (text or template) first, fallback to reconstruction
+    default_prompt = DEFAULT_DIRECT_PROMPT if prompt_type == "Direct" else DEFAULT_SELFCRIT_PROMPT
+    prompt = prompt_text(row, f'{prefix}_prompt') or default_prompt.format(q=row['question']) if row.get('question') is not None else ""
+    
+    case = {
+        "API": api.upper(),
+        "Dataset": dataset,
+        "Question": row.get('question', ''),
+        "Correct_Answer": row.get('gold_answer', row.get('answer', row.get('correct_answer', ''))),
+        "Prompt_Type": prompt_type,
+        "Hallucination_Type": "Confident but Wrong",
+        "Model": row.get('model', 'Unknown'),
+        "Evaluation_Details": {
+            "is_correct": is_correct,
+            "is_uncertain": is_uncertain,
+            "is_hallucination": is_hallucination,
+            "calculation_steps": f"Correct={is_correct}, Uncertain={is_uncertain} → Hallucination={is_hallucination} (Confident but Wrong)",
+            "reasoning": "Hallucination = NOT correct AND NOT uncertain (confident wrong answer)"
+        }
+    }
+    if prompt_type == "Direct":
+        case.update({
+            "LLM_Answer": row.get('direct_answer', ''),
+            "Full_Answer": row.get('direct_answer', ''),
+            "Direct_Prompt": prompt,
+        })
+    else:
+        case.update({
+            "LLM_Answer": row.get('selfcrit_final_span', ''),
+            "Full_Answer": row.get('selfcrit_answer', ''),
+            "SelfCrit_Prompt": prompt,
+            "SelfCrit_Steps": row.get('selfcrit_answer', ''),
+            "SelfCrit_Segments": selfcrit_segments(row),
+        })
+    return case
+
 def extract_hallucination_cases(results_data, max_per_api=10):
     """Extract hallucination cases from results with detailed evaluation info"""
     hallucination_cases = []
@@ -233,85 +334,65 @@ def extract_hallucination_cases(results_data, max_per_api=10):
             
             # Find hallucination cases with error handling
             try:
-                # Try different possible column names
-                if 'direct_hallucination' in df.columns:
-                    direct_hallu = df[df['direct_hallucination'] == True]
-                elif 'is_hallucinated' in df.columns and 'prompt_type' in df.columns:
-                    direct_hallu = df[(df['is_hallucinated'] == True) & (df['prompt_type'] == 'direct')]
-                else:
-                    direct_hallu = pd.DataFrame()  # Empty if no matching columns
-                
-                if 'selfcrit_hallucination' in df.columns:
-                    selfcrit_hallu = df[df['selfcrit_hallucination'] == True]
-                elif 'is_hallucinated' in df.columns and 'prompt_type' in df.columns:
-                    selfcrit_hallu = df[(df['is_hallucinated'] == True) & (df['prompt_type'] == 'self_critique')]
-                else:
-                    selfcrit_hallu = pd.DataFrame()  # Empty if no matching columns
+                masks = _hallucination_masks(df)
             except Exception as e:
                 print(f"Error processing hallucination data for {api}/{dataset}: {e}")
-                direct_hallu = pd.DataFrame()
-                selfcrit_hallu = pd.DataFrame()
+                masks = {}
             
             # Sample random cases
-            if len(direct_hallu) > 0:
-                sample_direct = direct_hallu.sample(min(max_per_api//2, len(direct_hallu)))
-                for _, row in sample_direct.iterrows():
-                    # Try to get prompt from CSV first, fallback to reconstruction
-                    direct_prompt = row.get('direct_prompt', '') or DEFAULT_DIRECT_PROMPT.format(q=row['question']) if row.get('question') is not None else ""
-                    
-                    hallucination_cases.append({
-                        "API": api.upper(),
-                        "Dataset": dataset,
-                        "Question": row.get('question', ''),
-                        "Correct_Answer": row.get('gold_answer', row.get('answer', row.get('correct_answer', ''))),
-                        "LLM_Answer": row.get('direct_answer', ''),
-                        "Full_Answer": row.get('direct_answer', ''),
-                        "Prompt_Type": "Direct",
-                        "Hallucination_Type": "Confident but Wrong",
-                        "Model": row.get('model', 'Unknown'),
-                        # Use prompt from CSV if available, otherwise reconstruct
-                        "Direct_Prompt": direct_prompt,
-                        "Evaluation_Details": {
-                            "is_correct": row.get('direct_correct', row.get('is_correct', False)),
-                            "is_uncertain": row.get('direct_uncertain', row.get('is_uncertain', False)), 
-                            "is_hallucination": row.get('direct_hallucination', row.get('is_hallucinated', False)),
-                            "calculation_steps": f"Correct={row.get('direct_correct', row.get('is_correct', False))}, Uncertain={row.get('direct_uncertain', row.get('is_uncertain', False))} → Hallucination={row.get('direct_hallucination', row.get('is_hallucinated', False))} (Confident but Wrong)",
-                            "reasoning": "Hallucination = NOT correct AND NOT uncertain (confident wrong answer)"
-                        }
-                    })
-            
-            if len(selfcrit_hallu) > 0:
-                sample_selfcrit = selfcrit_hallu.sample(min(max_per_api//2, len(selfcrit_hallu)))
-                for _, row in sample_selfcrit.iterrows():
-                    # Try to get prompt from CSV first, fallback to reconstruction
-                    selfcrit_prompt = row.get('selfcrit_prompt', '') or DEFAULT_SELFCRIT_PROMPT.format(q=row['question']) if row.get('question') is not None else ""
-                    
-                    hallucination_cases.append({
-                        "API": api.upper(),
-                        "Dataset": dataset,
-                        "Question": row.get('question', ''),
-                        "Correct_Answer": row.get('gold_answer', row.get('answer', row.get('correct_answer', ''))),
-                        "LLM_Answer": row.get('selfcrit_final_span', ''),
-                        "Full_Answer": row.get('selfcrit_answer', ''),
-                        "Prompt_Type": "Self-Critique",
-                        "Hallucination_Type": "Confident but Wrong",
-                        "Model": row.get('model', 'Unknown'),
-                        # Use prompt from CSV if available, otherwise reconstruct
-                        "SelfCrit_Prompt": selfcrit_prompt,
-                        "SelfCrit_Steps": row.get('selfcrit_answer', ''),
-                        "Evaluation_Details": {
-                            "is_correct": row.get('selfcrit_correct', row.get('is_correct', False)),
-                            "is_uncertain": row.get('selfcrit_uncertain', row.get('is_uncertain', False)),
-                            "is_hallucination": row.get('selfcrit_hallucination', row.get('is_hallucinated', False)),
-                            "calculation_steps": f"Correct={row.get('selfcrit_correct', row.get('is_correct', False))}, Uncertain={row.get('selfcrit_uncertain', row.get('is_uncertain', False))} → Hallucination={row.get('selfcrit_hallucination', row.get('is_hallucinated', False))} (Confident but Wrong)",
-                            "reasoning": "Hallucination = NOT correct AND NOT uncertain (confident wrong answer)"
-                        }
-                    })
+            for prompt_type, mask in masks.items():
+                cases = df[mask]
+                if len(cases) > 0:
+                    sample = graded_texts(result, cases.sample(min(max_per_api//2, len(cases))))
+                    for _, row in sample.iterrows():
+                        hallucination_cases.append(_case_record(api, dataset, row, prompt_type))
     
     return hallucination_cases
 
+# Columns of the case index; answer text stays out of it
+CASE_INDEX_COLUMNS = ["API", "Dataset", "Prompt_Type", "Question", "result_key", "row"]
+
+def hallucination_case_index(results_data):
+    """One light row per hallucination case across all results, in a stable order
+    
+    Details are built with hallucination_case() for the rows actually shown.
+    """
+    parts = []
+    for (api, dataset), result in sorted(results_data.items()):
+        df = result.get("graded_data")
+        if df is None or len(df) == 0:
+            continue
+        try:
+            masks = _hallucination_masks(df)
+        except Exception as e:
+            print(f"Error processing hallucination data for {api}/{dataset}: {e}")
+            continue
+        questions = df['question'].astype(str).to_numpy() if 'question' in df.columns else None
+        for prompt_type, mask in masks.items():
+            rows = mask.to_numpy().nonzero()[0]
+            parts.append(pd.DataFrame({
+                "API": api.upper(),
+                "Dataset": dataset,
+                "Prompt_Type": prompt_type,
+                "Question": questions[rows] if questions is not None else "",
+                "result_key": [(api, dataset)] * len(rows),
+                "row": rows,
+            }))
+    if not parts:
+        return pd.DataFrame(columns=CASE_INDEX_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+def hallucination_case(results_data, case):
+    """Full display record of one row of hallucination_case_index()"""
+    api, dataset = case["result_key"]
+    result = results_data[(api, dataset)]
+    row = graded_texts(result, result["graded_data"].iloc[[int(case["row"])]]).iloc[0]
+    return _case_record(api, dataset, row, case["Prompt_Type"])
+
 def create_hallucination_analysis_chart(results_data):
     """Create detailed hallucination analysis"""
+    import plotly.graph_objects as go
+
     if not results_data:
         return None
     
@@ -384,7 +465,46 @@ def create_hallucination_analysis_chart(results_data):
         barmode="group",
         height=400
     )
-    
+
+    return fig
+
+# (metric, label) of the rates shown while an experiment is running
+LIVE_RATES = [("correct_rate", "Correct"), ("uncertainty_rate", "Uncertain"), ("hallucination_rate", "Hallucination")]
+
+def create_live_metrics_chart(metrics):
+    """Running rates of one API × dataset with their confidence intervals as error bars"""
+    import plotly.graph_objects as go
+
+    intervals = metrics.get("confidence_intervals", {})
+    fig = go.Figure()
+
+    for section, name, color in (("direct", "Direct", "lightblue"), ("selfcrit", "Self-Critique", "darkblue")):
+        rates = [metrics.get(section, {}).get(metric, 0) * 100 for metric, _ in LIVE_RATES]
+        bounds = [intervals.get(section, {}).get(metric) for metric, _ in LIVE_RATES]
+        fig.add_trace(go.Bar(
+            name=name,
+            x=[label for _, label in LIVE_RATES],
+            y=rates,
+            marker_color=color,
+            error_y=dict(
+                type="data",
+                symmetric=False,
+                array=[bound[1] * 100 - rate if bound else 0 for rate, bound in zip(rates, bounds)],
+                arrayminus=[rate - bound[0] * 100 if bound else 0 for rate, bound in zip(rates, bounds)]
+            )
+        ))
+
+    level = intervals.get("level")
+    fig.update_layout(
+        title=f"Running rates after {metrics.get('total_questions', 0)} questions"
+              + (f" ({level:.0%} CI)" if level else ""),
+        yaxis_title="Rate (%)",
+        yaxis_range=[0, 100],
+        barmode="group",
+        height=300,
+        margin=dict(t=40, b=20)
+    )
+
     return fig
 
 def create_detailed_metrics_table(results_data):
@@ -398,6 +518,11 @@ def create_detailed_metrics_table(results_data):
             selfcrit = metrics.get("selfcrit", {})
             improvement = metrics.get("improvement", {})
             
+            # Paired bootstrap CIs, shown in the same sign convention as the improvement columns
+            ci = metrics.get("confidence_intervals", {}).get("improvement", {})
+            correct_ci = ci.get("correct_delta")
+            hallu_ci = ci.get("hallucination_delta")
+            
             table_data.append({
                 "API": api.upper(),
                 "Dataset": dataset,
@@ -409,7 +534,37 @@ def create_detailed_metrics_table(results_data):
                 "SelfCrit Uncertain %": f"{selfcrit.get('uncertainty_rate', 0)*100:.1f}%",
                 "SelfCrit Hallucination %": f"{selfcrit.get('hallucination_rate', 0)*100:.1f}%",
                 "Improvement (Correct)": f"{improvement.get('correct_delta', 0)*100:+.1f}%",
-                "Improvement (Hallucination)": f"{-improvement.get('hallucination_delta', 0)*100:+.1f}%"
+                "Improvement (Hallucination)": f"{-improvement.get('hallucination_delta', 0)*100:+.1f}%",
+                "Correct Δ CI": f"[{correct_ci[0]*100:+.1f}%, {correct_ci[1]*100:+.1f}%]" if correct_ci else "N/A",
+                "Hallucination Δ CI": f"[{-hallu_ci[1]*100:+.1f}%, {-hallu_ci[0]*100:+.1f}%]" if hallu_ci else "N/A"
             })
     
-    return pd.DataFrame(table_data) if table_data else None
\ No newline at end of file
+    return pd.DataFrame(table_data) if table_data else None
+
+# Aggregates of the loaded results that are cached together with them
+CACHED_AGGREGATES = {
+    "api_comparison_chart": create_api_comparison_chart,
+    "hallucination_analysis_chart": create_hallucination_analysis_chart,
+    "detailed_metrics_table": create_detailed_metrics_table,
+    "hallucination_case_index": hallucination_case_index,
+}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _cached_results(results_dir, columns, signature):
+    """load_all_existing_results for one results signature, shared by all sessions"""
+    return load_all_existing_results(results_dir, list(columns) if columns else None)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _cached_aggregate(name, results_dir, signature):
+    """One of CACHED_AGGREGATES for one results signature"""
+    return CACHED_AGGREGATES[name](_cached_results(results_dir, None, signature))
+
+def load_cached_results(results_dir=None, columns=None):
+    """load_all_existing_results, reused across reruns and sessions until result files change"""
+    results_dir, signature = results_signature(results_dir)
+    return _cached_results(results_dir, tuple(columns) if columns else None, signature)
+
+def cached_aggregate(name, results_dir=None):
+    """Chart or table from CACHED_AGGREGATES, rebuilt only when result files change"""
+    results_dir, signature = results_signature(results_dir)
+    return _cached_aggregate(name, results_dir, signature)
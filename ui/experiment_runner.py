@@ -8,6 +8,16 @@ import pandas as pd
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 import time
+from functools import partial
+
+try:
+    from src.manifest import LazyResult, entry_path, load_entry_metrics, result_sets
+    from src.storage import read_results
+    from src.warehouse import open_warehouse
+except ImportError:
+    from manifest import LazyResult, entry_path, load_entry_metrics, result_sets
+    from storage import read_results
+    from warehouse import open_warehouse
 
 class ExperimentRunner:
     """Backend class to run experiments for the UI"""
@@ -156,39 +166,35 @@ class ExperimentRunner:
             }
     
     def load_existing_results(self) -> Dict[Tuple[str, str], Dict]:
-        """Load existing experiment results from files"""
+        """Load existing experiment results (from the results warehouse when enabled)"""
         results = {}
         
-        for api_dir in self.results_dir.iterdir():
-            if api_dir.is_dir():
-                api_name = api_dir.name.title()
-                
-                # Find all metrics files
-                for metrics_file in api_dir.glob("metrics_*.json"):
-                    # Extract dataset name from filename
-                    dataset_name = metrics_file.stem.replace("metrics_", "") + ".csv"
-                    
-                    try:
-                        # Load metrics
-                        with open(metrics_file, 'r', encoding='utf-8') as f:
-                            metrics = json.load(f)
-                        
-                        # Load graded data if exists
-                        graded_file = metrics_file.parent / f"results_graded_{metrics_file.stem.replace('metrics_', '')}.csv"
-                        graded_df = pd.DataFrame()
-                        if graded_file.exists():
-                            graded_df = pd.read_csv(graded_file)
-                        
-                        results[(api_name, dataset_name)] = {
-                            "success": True,
-                            "metrics": metrics,
-                            "graded_data": graded_df,
-                            "loaded_from_cache": True
-                        }
-                        
-                    except Exception as e:
-                        print(f"Error loading {metrics_file}: {e}")
-                        continue
+        warehouse = open_warehouse(self.results_dir)
+        if warehouse is not None:
+            with warehouse:
+                warehouse.import_results_dir(str(self.results_dir))
+                for result in warehouse.latest_results():
+                    result.update(success=True, loaded_from_cache=True)
+                    label = result["provider"].title() + result["label"][len(result["provider"]):]
+                    results[(label, f"{result['dataset']}.csv")] = result
+            return results
+        
+        # Without the warehouse, read the results manifest; graded frames load on first access
+        for entry in result_sets(self.results_dir):
+            if "metrics" not in entry or "graded" not in entry:
+                continue
+            try:
+                graded_file = entry_path(self.results_dir, entry, "graded")
+                results[(entry["provider"].title(), f"{entry['dataset']}.csv")] = LazyResult(
+                    partial(read_results, graded_file),
+                    cache_key=("file", graded_file, entry["graded"].get("sha256"), None),
+                    success=True,
+                    metrics=load_entry_metrics(self.results_dir, entry),
+                    loaded_from_cache=True
+                )
+            except Exception as e:
+                print(f"Error loading {entry['provider']}/{entry['dataset']}: {e}")
+                continue
         
         return results
     
@@ -202,7 +208,7 @@ class ExperimentRunner:
             )
             
             if result.returncode == 0:
-                report_file = "cross_model_comparison_report.txt"
+                report_file = os.path.join("data", "results", "reports", "cross_model_comparison_report.txt")
                 if os.path.exists(report_file):
                     with open(report_file, 'r', encoding='utf-8') as f:
                         return f.read()